@@ -0,0 +1,79 @@
+"""
+Compara la extracción de ID de cliente, nombre y serial ONU fila por fila (implementación
+anterior de /download-hosts) contra extraer_datos_hosts sobre nombres sintéticos.
+
+Uso: python benchmarks/bench_extraccion_hosts.py [cantidad]
+"""
+import os
+import re
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from zabbix_functions import extraer_datos_hosts, MAPA_LOCALIDADES
+
+
+# Implementación anterior: dos re.search por host dentro de un bucle de Python
+def extraer_con_bucle(nombres):
+    filas = []
+    for name in nombres:
+        serial_onu_pattern = r"(TPLG\w{8}|FHTT\w{8}|ALCL\w{8})"
+        customer_id_pattern = r"(ID\d{6,9})"
+
+        serial_onu_match = re.search(serial_onu_pattern, name)
+        customer_id_match = re.search(customer_id_pattern, name)
+
+        serial_onu = serial_onu_match.group(0) if serial_onu_match else "N/A"
+        customer_id_full = customer_id_match.group(0) if customer_id_match else "N/A"
+
+        customer_id = customer_id_full[2:] if customer_id_full != "N/A" else "N/A"
+
+        nombre = name.split(serial_onu)[0].strip() if serial_onu != "N/A" else name
+
+        filas.append([customer_id, nombre, serial_onu])
+    return filas
+
+
+# Genera nombres con el formato de process_excel, incluyendo hosts sin serial (PDFN) y sin ID
+def generar_nombres(cantidad, semilla=42):
+    rnd = random.Random(semilla)
+    localidades = list(MAPA_LOCALIDADES.values())
+    nombres = []
+    for i in range(cantidad):
+        cliente = f"Cliente {rnd.choice(['Perez', 'Gonzalez', 'Rodriguez', 'Garcia'])} {i}"
+        tipo = rnd.random()
+        if tipo < 0.8:
+            serial = f"{rnd.choice(['TPLG', 'FHTT', 'ALCL'])}{rnd.getrandbits(32):08X}"
+        else:
+            serial = "PDFN"
+        customer = f"ID{rnd.randint(100000, 999999999)}" if tipo < 0.95 else "SIN-ID"
+        nombres.append(f"{cliente} {serial} {customer} {rnd.choice(localidades)}")
+    return nombres
+
+
+def main():
+    cantidad = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    nombres = generar_nombres(cantidad)
+
+    inicio = time.perf_counter()
+    esperado = extraer_con_bucle(nombres)
+    tiempo_bucle = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    datos = extraer_datos_hosts(nombres)
+    tiempo_extract = time.perf_counter() - inicio
+
+    obtenido = datos[["customer id", "nombre", "serial onu"]].values.tolist()
+    if obtenido != esperado:
+        raise SystemExit("Los resultados de ambas implementaciones no coinciden")
+
+    print(f"Nombres: {cantidad}")
+    print(f"Bucle con re.search: {tiempo_bucle:.2f} s")
+    print(f"extraer_datos_hosts (str.extract por columna): {tiempo_extract:.2f} s")
+    print(f"Aceleración: {tiempo_bucle / tiempo_extract:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Compara quitar_acentos (tabla de traducción + caché) y quitar_acentos_serie contra la
+implementación anterior basada solo en NFKD, y verifica que la salida sea idéntica.
+
+Uso: python benchmarks/bench_quitar_acentos.py [cantidad]
+"""
+import os
+import sys
+import time
+import random
+import unicodedata
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from zabbix_functions import quitar_acentos, quitar_acentos_serie, _quitar_acentos_texto
+
+
+# Implementación anterior
+def quitar_acentos_original(cadena):
+    if not isinstance(cadena, str):
+        return cadena
+    cadena = unicodedata.normalize("NFKD", cadena)
+    return "".join(c for c in cadena if not unicodedata.combining(c)).replace("ñ", "n").replace("Ñ", "N")
+
+
+# Nombres de clientes con acentos frecuentes, algunos caracteres fuera de Latin-1 y muchos repetidos
+def generar_nombres(cantidad, semilla=7):
+    rnd = random.Random(semilla)
+    nombres = ["José", "María", "Ñuñez", "Andrés", "Gómez", "Pérez", "Müller", "Ana", "Luis", "Zoë", "Raúl", "Inés"]
+    apellidos = ["Hernández", "Rodríguez", "Peña", "Ibáñez", "Çelik", "Smith", "Ortíz", "Martínez", "Ramírez"]
+    # Caracteres que no están en la tabla y pasan por NFKD
+    otros = ["Łukasz", "Nguyễn", "ﬁgueroa", "Ｆｕｌｌ"]
+    distintos = []
+    for i in range(cantidad // 20 + 1):
+        nombre = rnd.choice(otros) if rnd.random() < 0.05 else rnd.choice(nombres)
+        distintos.append(f"{nombre} {rnd.choice(apellidos)} {i}")
+    return [rnd.choice(distintos) for _ in range(cantidad)]
+
+
+def medir(nombre, funcion):
+    inicio = time.perf_counter()
+    resultado = funcion()
+    print(f"{nombre}: {time.perf_counter() - inicio:.3f} s")
+    return resultado
+
+
+def main():
+    cantidad = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    nombres = generar_nombres(cantidad)
+
+    # Todos los caracteres Unicode, uno por uno, más los nombres generados
+    caracteres = [chr(c) for c in range(0x110000) if not 0xD800 <= c <= 0xDFFF]
+    for texto in caracteres + nombres:
+        if quitar_acentos(texto) != quitar_acentos_original(texto):
+            raise SystemExit(f"Resultado distinto para {texto!r}")
+    _quitar_acentos_texto.cache_clear()
+
+    print(f"Nombres: {cantidad} ({len(set(nombres))} distintos)")
+    esperado = medir("NFKD fila por fila", lambda: [quitar_acentos_original(n) for n in nombres])
+    obtenido = medir("quitar_acentos (sin caché)", lambda: [_quitar_acentos_texto.__wrapped__(n) for n in nombres])
+    if obtenido != esperado:
+        raise SystemExit("quitar_acentos sin caché no coincide")
+    obtenido = medir("quitar_acentos (con caché)", lambda: [quitar_acentos(n) for n in nombres])
+    if obtenido != esperado:
+        raise SystemExit("quitar_acentos con caché no coincide")
+    serie = pd.Series(nombres, dtype=object)
+    obtenido = medir("quitar_acentos_serie", lambda: quitar_acentos_serie(serie).tolist())
+    if obtenido != esperado:
+        raise SystemExit("quitar_acentos_serie no coincide")
+
+
+if __name__ == "__main__":
+    main()
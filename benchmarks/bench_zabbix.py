@@ -0,0 +1,158 @@
+"""
+Mide process_excel, process_update_zabbix (completo y diferencial) y /download-hosts contra
+mock_zabbix.py: filas por segundo, p50/p99 por método de la API y pico de memoria (RSS).
+
+Cada escenario corre en un proceso propio para que el pico de RSS sea solo suyo; el mock corre
+en otro proceso. Los escenarios se ejecutan en orden sobre el mismo mock: crear agrega hosts
+nuevos y diferencial corre antes que actualizar, que aplica todos los campos de todas las filas.
+Los límites de carga del cliente se toman de las variables ZABBIX_* igual que en producción
+(por ejemplo ZABBIX_MAX_RPS=50 agrega un techo de llamadas por segundo).
+
+Uso: python benchmarks/bench_zabbix.py [--filas 5000] [--hosts 20000] [--formato xlsx|csv]
+                                       [--escenarios crear diferencial actualizar descarga]
+                                       [--latencia 0.005] [--jitter 0.002] [--latencia-host 0.0005]
+                                       [--errores 0.0] [--puerto 8900]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import tempfile
+import subprocess
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(DIRECTORIO))
+sys.path.insert(0, DIRECTORIO)
+
+from generar_hojas import escribir_hoja, filas_crear, filas_actualizar, COLUMNAS_CREAR, COLUMNAS_ACTUALIZAR, CAMPOS_ACTUALIZAR
+
+ESCENARIOS = ["crear", "diferencial", "actualizar", "descarga"]
+
+
+# Ejecuta un escenario en este proceso y devuelve sus mediciones
+def ejecutar_escenario(escenario, archivo, filas, formato, url):
+    from zabbix_functions import configurar_cliente
+    from create_update import process_excel, process_update_zabbix
+
+    client = configurar_cliente(url, "Admin", "zabbix")
+    client.login()
+    os.makedirs("results", exist_ok=True)
+
+    inicio = time.perf_counter()
+    if escenario == "crear":
+        resumen, _ = process_excel(archivo)
+        if not resumen["total"]:
+            raise SystemExit("\n".join(resumen["mensajes"]))
+        errores = resumen["conteo"].get("error", 0) + resumen["conteo"].get("duplicate", 0)
+    elif escenario in ("diferencial", "actualizar"):
+        resultado = process_update_zabbix(archivo, CAMPOS_ACTUALIZAR, solo_cambios=escenario == "diferencial")
+        if "error" in resultado:
+            raise SystemExit(resultado["error"])
+        errores = resultado["resumen"]["conteo"].get("error", 0)
+    else:
+        from main_zabbix import app
+        app.config["RESULTS_FOLDER"] = os.path.abspath("results")
+        respuesta = app.test_client().get(f"/download-hosts?formato={formato}")
+        if respuesta.status_code != 200:
+            raise SystemExit(respuesta.get_data(as_text=True))
+        errores = 0
+    segundos = time.perf_counter() - inicio
+
+    return {
+        "escenario": escenario,
+        "filas": filas,
+        "errores": errores,
+        "segundos": segundos,
+        "filas_por_segundo": filas / segundos if segundos else 0.0,
+        # ru_maxrss está en KB en Linux
+        "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "metodos": client.stats(),
+    }
+
+
+def iniciar_mock(args):
+    comando = [
+        sys.executable, os.path.join(DIRECTORIO, "mock_zabbix.py"),
+        "--puerto", str(args.puerto), "--hosts", str(args.hosts),
+        "--latencia", str(args.latencia), "--jitter", str(args.jitter),
+        "--latencia-host", str(args.latencia_host), "--errores", str(args.errores),
+    ]
+    mock = subprocess.Popen(comando, stdout=subprocess.PIPE, text=True)
+    # El mock imprime una línea cuando terminó de cargar los hosts y ya escucha
+    if not mock.stdout.readline():
+        raise SystemExit("No se pudo iniciar el mock de Zabbix")
+    return mock
+
+
+def imprimir(medicion):
+    print(f"\n{medicion['escenario']}: {medicion['filas']} filas en {medicion['segundos']:.2f} s "
+          f"({medicion['filas_por_segundo']:.0f} filas/s), {medicion['errores']} errores, "
+          f"pico RSS {medicion['rss_mb']:.0f} MB")
+    print(f"  {'método':<16}{'llamadas':>10}{'errores':>9}{'p50 ms':>9}{'p99 ms':>9}{'máx ms':>9}")
+    for metodo, stats in sorted(medicion["metodos"].items()):
+        print(f"  {metodo:<16}{stats['calls']:>10}{stats['errors']:>9}"
+              f"{stats['p50_ms']:>9.1f}{stats['p99_ms']:>9.1f}{stats['max_ms']:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de cargas contra un mock de Zabbix")
+    parser.add_argument("--filas", type=int, default=5000, help="filas de las hojas de creación y actualización")
+    parser.add_argument("--hosts", type=int, default=20000, help="hosts existentes en el mock")
+    parser.add_argument("--formato", choices=["xlsx", "csv"], default="xlsx")
+    parser.add_argument("--escenarios", nargs="+", choices=ESCENARIOS, default=ESCENARIOS)
+    parser.add_argument("--latencia", type=float, default=0.005)
+    parser.add_argument("--jitter", type=float, default=0.002)
+    parser.add_argument("--latencia-host", type=float, default=0.0005)
+    parser.add_argument("--errores", type=float, default=0.0)
+    parser.add_argument("--puerto", type=int, default=8900)
+    # Uso interno: ejecuta un solo escenario y devuelve la medición en JSON
+    parser.add_argument("--ejecutar", choices=ESCENARIOS, help=argparse.SUPPRESS)
+    parser.add_argument("--archivo", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    url = f"http://127.0.0.1:{args.puerto}/api_jsonrpc.php"
+    if args.ejecutar:
+        print(json.dumps(ejecutar_escenario(args.ejecutar, args.archivo, args.filas, args.formato, url)))
+        return
+
+    if args.filas > args.hosts:
+        raise SystemExit("--filas no puede superar --hosts: la hoja de actualización usa hosts existentes")
+
+    with tempfile.TemporaryDirectory() as directorio:
+        hoja_crear = os.path.join(directorio, f"crear.{args.formato}")
+        hoja_actualizar = os.path.join(directorio, f"actualizar.{args.formato}")
+        escribir_hoja(hoja_crear, COLUMNAS_CREAR, filas_crear(args.filas))
+        escribir_hoja(hoja_actualizar, COLUMNAS_ACTUALIZAR, filas_actualizar(args.filas))
+
+        print(f"Mock: {args.hosts} hosts, latencia {args.latencia * 1000:.1f} ms + hasta {args.jitter * 1000:.1f} ms "
+              f"+ {args.latencia_host * 1000:.2f} ms por host, {args.errores:.1%} de HTTP 503")
+        mock = iniciar_mock(args)
+        try:
+            hosts = args.hosts
+            for escenario in args.escenarios:
+                if escenario == "crear":
+                    archivo, filas = hoja_crear, args.filas
+                elif escenario == "descarga":
+                    archivo, filas = None, hosts
+                else:
+                    archivo, filas = hoja_actualizar, args.filas
+                comando = [
+                    sys.executable, os.path.abspath(__file__), "--ejecutar", escenario,
+                    "--filas", str(filas), "--formato", args.formato, "--puerto", str(args.puerto),
+                ]
+                if archivo:
+                    comando += ["--archivo", archivo]
+                salida = subprocess.run(comando, cwd=directorio, stdout=subprocess.PIPE, text=True, check=True).stdout
+                medicion = json.loads(salida.strip().splitlines()[-1])
+                imprimir(medicion)
+                if escenario == "crear":
+                    hosts += filas - medicion["errores"]
+        finally:
+            mock.terminate()
+            mock.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Genera hojas sintéticas con las columnas reales de las cargas de creación y actualización,
+y los datos de los hosts que mock_zabbix.py carga como existentes.
+
+Uso: python benchmarks/generar_hojas.py crear|actualizar cantidad archivo.xlsx|archivo.csv
+"""
+import os
+import csv
+import sys
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openpyxl import Workbook
+from zabbix_functions import quitar_acentos, GRUPOS_LOCALIDAD, MAPA_LOCALIDADES
+
+COLUMNAS_CREAR = [
+    "Nombre", "Customer", "Localidad", "OLT", "Feeder", "Slot", "PON",
+    "NAP", "ONT/ONU", "Dirección IP", "MAC address", "Ubicación de la caja NAP (Coordenadas)",
+    "Dirección", "Numero de telefono"
+]
+COLUMNAS_ACTUALIZAR = ["hostid"] + COLUMNAS_CREAR
+
+# Campos que actualiza el benchmark, con los nombres del formulario de actualización
+CAMPOS_ACTUALIZAR = ["Hostname", "modify_groups", "NAP", "OLT", "Slot", "PON", "ONT/ONU", "Numero de telefono"]
+
+# Grupos de OLT y Feeder que existen en el mock, además de los de localidad
+OLTS = [f"OLT-{i}" for i in range(1, 11)]
+FEEDERS = [f"Feeder {i}" for i in range(1, 21)]
+
+# Primer hostid de los hosts existentes del mock
+PRIMER_HOSTID = 10001
+
+NOMBRES = ["José Pérez", "María González", "Ángel Rodríguez", "Luisa García", "Andrés Núñez", "Carmen Díaz"]
+
+
+# Datos de una fila de cliente; i identifica al cliente y separa los rangos de serial, IP y Customer
+def datos_cliente(i, rnd, prefijo_serial="TPLG", red="10"):
+    localidad = rnd.choice(list(GRUPOS_LOCALIDAD))
+    return {
+        "Nombre": f"{rnd.choice(NOMBRES)} {i}",
+        "Customer": str(1000000 + i),
+        "Localidad": localidad,
+        "OLT": rnd.choice(OLTS),
+        "Feeder": rnd.choice(FEEDERS + ["N/A"]),
+        "Slot": str(rnd.randint(1, 16)),
+        "PON": str(rnd.randint(1, 16)),
+        "NAP": f"NAP-{rnd.randint(1, 500)}",
+        "ONT/ONU": f"{prefijo_serial}{i:08X}",
+        "Dirección IP": f"{red}.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}",
+        "MAC address": ":".join(f"{rnd.getrandbits(8):02x}" for _ in range(6)),
+        "Ubicación de la caja NAP (Coordenadas)": f"{rnd.uniform(8, 11):.6f}, {rnd.uniform(-68, -63):.6f}",
+        "Dirección": f"Calle {rnd.randint(1, 200)}, casa {rnd.randint(1, 99)}",
+        "Numero de telefono": f"0412{rnd.randint(1000000, 9999999)}",
+    }
+
+
+# Hosts existentes del mock: mismos datos que devolvería una carga anterior, en otro rango de serial e IP
+def hosts_existentes(cantidad, semilla=7):
+    rnd = random.Random(semilla)
+    for i in range(cantidad):
+        datos = datos_cliente(i, rnd, prefijo_serial="FHTT", red="172")
+        localidad = MAPA_LOCALIDADES.get(datos["Localidad"], datos["Localidad"])
+        datos["hostname"] = f"{quitar_acentos(datos['Nombre'])} {datos['ONT/ONU']} ID{datos['Customer']} {localidad}"
+        yield PRIMER_HOSTID + i, datos
+
+
+def filas_crear(cantidad, semilla=42):
+    rnd = random.Random(semilla)
+    for i in range(cantidad):
+        yield datos_cliente(i, rnd)
+
+
+# Filas de actualización sobre los primeros hosts existentes; una de cada cuatro cambia de NAP y OLT
+def filas_actualizar(cantidad, semilla=7):
+    rnd = random.Random(semilla + 1)
+    for hostid, datos in hosts_existentes(cantidad, semilla):
+        fila = {"hostid": str(hostid), **{columna: datos[columna] for columna in COLUMNAS_CREAR}}
+        if rnd.random() < 0.25:
+            fila["NAP"] = f"NAP-{rnd.randint(501, 999)}"
+            fila["OLT"] = rnd.choice(OLTS)
+        yield fila
+
+
+def escribir_hoja(file_path, columnas, filas):
+    if file_path.lower().endswith(".csv"):
+        with open(file_path, "w", newline="", encoding="utf-8-sig") as f:
+            writer = csv.writer(f)
+            writer.writerow(columnas)
+            for fila in filas:
+                writer.writerow([fila[columna] for columna in columnas])
+    else:
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet()
+        ws.append(columnas)
+        for fila in filas:
+            ws.append([fila[columna] for columna in columnas])
+        wb.save(file_path)
+
+
+def main():
+    if len(sys.argv) != 4 or sys.argv[1] not in ("crear", "actualizar"):
+        raise SystemExit(__doc__)
+    tipo, cantidad, file_path = sys.argv[1], int(sys.argv[2]), sys.argv[3]
+    if tipo == "crear":
+        escribir_hoja(file_path, COLUMNAS_CREAR, filas_crear(cantidad))
+    else:
+        escribir_hoja(file_path, COLUMNAS_ACTUALIZAR, filas_actualizar(cantidad))
+    print(f"{file_path}: {cantidad} filas")
+
+
+if __name__ == "__main__":
+    main()
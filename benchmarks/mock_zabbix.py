@@ -0,0 +1,268 @@
+"""
+Servidor local que imita api_jsonrpc.php de Zabbix para los benchmarks. Atiende user.login,
+host.get (con search/searchInventory), hostgroup.get, host.create, host.update, host.massupdate
+(solo grupos) y auditlog.get (solo hosts) en memoria, con latencia configurable (fija, aleatoria
+y por host enviado) e inyección de errores HTTP 503.
+
+Uso: python benchmarks/mock_zabbix.py [--puerto 8900] [--hosts 10000] [--latencia 0.005]
+                                      [--jitter 0.002] [--latencia-host 0.0005] [--errores 0.0]
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import itertools
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generar_hojas import hosts_existentes, OLTS, FEEDERS, PRIMER_HOSTID
+from zabbix_functions import GroupResolver, GRUPOS_LOCALIDAD, GRUPO_INICIAL_ID, GRUPO_RED_NO_PROPIA_ID, GRUPO_FINAL_ID
+
+TOKEN = "mock-token"
+
+
+# Error de la API con el formato de Zabbix
+class ErrorAPI(Exception):
+    def __init__(self, data, code=-32602, message="Invalid params."):
+        super().__init__(data)
+        self.error = {"code": code, "message": message, "data": data}
+
+
+# Estado en memoria de un Zabbix: grupos y hosts con interfaces, grupos e inventario
+class MockZabbix:
+
+    def __init__(self, latencia=0.0, jitter=0.0, latencia_host=0.0, errores=0.0, semilla=42):
+        self.latencia = latencia
+        self.jitter = jitter
+        self.latencia_host = latencia_host
+        self.errores = errores
+        self.rnd = random.Random(semilla)
+        self.lock = threading.Lock()
+
+        nombres = list(GRUPOS_LOCALIDAD.values()) + OLTS + FEEDERS
+        self.grupos = [{"groupid": str(1000 + i), "name": nombre} for i, nombre in enumerate(nombres)]
+        self.grupos += [{"groupid": groupid, "name": f"Grupo {groupid}"}
+                        for groupid in (GRUPO_INICIAL_ID, GRUPO_RED_NO_PROPIA_ID, GRUPO_FINAL_ID)]
+        self.hosts = {}
+        self.nombres = {}
+        # Registros (clock, hostid, action) de auditlog.get para los hosts creados y actualizados
+        self.auditoria = []
+        self._ids = itertools.count(PRIMER_HOSTID)
+
+    def sembrar(self, cantidad):
+        resolver = GroupResolver(self.grupos)
+        for hostid, datos in hosts_existentes(cantidad):
+            groupids = resolver.resolver(datos["Localidad"], datos["OLT"], datos["Feeder"])
+            self._agregar(str(hostid), {
+                "host": datos["hostname"],
+                "name": datos["hostname"],
+                "description": f"NAP: {datos['NAP']}",
+                "inventory_mode": "0",
+                "groups": [{"groupid": groupid} for groupid in groupids],
+                "interfaces": [{"ip": datos["Dirección IP"]}],
+                "inventory": {
+                    "notes": f"NAP: {datos['NAP']}",
+                    "serialno_a": datos["ONT/ONU"],
+                    "contact": datos["Numero de telefono"],
+                    "site_address_a": datos["OLT"],
+                    "site_address_b": datos["Slot"],
+                    "site_address_c": datos["PON"],
+                    "site_city": datos["Localidad"],
+                },
+            })
+        self._ids = itertools.count(PRIMER_HOSTID + cantidad)
+
+    def _agregar(self, hostid, host):
+        host["hostid"] = hostid
+        self.hosts[hostid] = host
+        self.nombres[host["host"]] = hostid
+
+    # Demora de la llamada: fija, aleatoria y proporcional a la cantidad de hosts enviados
+    def demora(self, params):
+        cantidad = len(params) if isinstance(params, list) else len(params.get("hosts", [None]))
+        return self.latencia + self.rnd.uniform(0, self.jitter) + self.latencia_host * cantidad
+
+    def atender(self, metodo, params, auth):
+        if metodo == "user.login":
+            return TOKEN
+        if auth != TOKEN:
+            raise ErrorAPI("Session terminated, re-login, please.")
+        with self.lock:
+            if metodo == "hostgroup.get":
+                return self.grupos
+            if metodo == "host.get":
+                return self.host_get(params)
+            if metodo == "host.create":
+                return self.host_create(params if isinstance(params, list) else [params])
+            if metodo == "host.update":
+                return self.host_update(params if isinstance(params, list) else [params])
+            if metodo == "host.massupdate":
+                return self.host_update([{"hostid": host["hostid"], "groups": params["groups"]} for host in params["hosts"]])
+            if metodo == "auditlog.get":
+                return self.auditlog_get(params)
+        raise ErrorAPI(f'Incorrect API "{metodo}".', -32601, "Method not found.")
+
+    def host_get(self, params):
+        if "hostids" in params:
+            hosts = [self.hosts[str(hostid)] for hostid in params["hostids"] if str(hostid) in self.hosts]
+        else:
+            hosts = list(self.hosts.values())
+        if "search" in params or "searchInventory" in params:
+            hosts = [host for host in hosts if self.coincide(host, params)]
+        if params.get("sortfield") == "hostid":
+            hosts.sort(key=lambda host: int(host["hostid"]), reverse=params.get("sortorder") == "DESC")
+        if "limit" in params:
+            hosts = hosts[:params["limit"]]
+
+        salida = params.get("output", "extend")
+        resultado = []
+        for host in hosts:
+            if salida == "extend":
+                fila = {campo: valor for campo, valor in host.items() if campo not in ("groups", "interfaces", "inventory")}
+            else:
+                fila = {campo: host.get(campo, "") for campo in salida}
+            for parametro, campo in (("selectGroups", "groups"), ("selectInterfaces", "interfaces")):
+                if parametro in params:
+                    fila[campo] = host.get(campo, [])
+            if "selectInventory" in params:
+                campos = params["selectInventory"]
+                inventario = host.get("inventory", {})
+                fila["inventory"] = dict(inventario) if campos == "extend" else {campo: inventario.get(campo, "") for campo in campos}
+            resultado.append(fila)
+        return resultado
+
+    # search y searchInventory comparan por contenido sin distinguir mayúsculas; searchByAny une los valores con OR
+    def coincide(self, host, params):
+        condiciones = [(host.get(campo, ""), valores) for campo, valores in params.get("search", {}).items()]
+        condiciones += [(host.get("inventory", {}).get(campo, ""), valores)
+                        for campo, valores in params.get("searchInventory", {}).items()]
+        resultados = []
+        for valor, buscados in condiciones:
+            buscados = buscados if isinstance(buscados, list) else [buscados]
+            resultados.append(any(buscado.lower() in str(valor).lower() for buscado in buscados))
+        return any(resultados) if params.get("searchByAny") else all(resultados)
+
+    # Como Zabbix, la llamada es una transacción: si un host falla no se crea ninguno
+    def host_create(self, hosts):
+        nombres = [host["host"] for host in hosts]
+        for nombre in nombres:
+            if nombre in self.nombres or nombres.count(nombre) > 1:
+                raise ErrorAPI(f'Host with the same name "{nombre}" already exists.')
+        hostids = []
+        for host in hosts:
+            hostid = str(next(self._ids))
+            self._agregar(hostid, {
+                "host": host["host"],
+                "name": host.get("name", host["host"]),
+                "description": host.get("description", ""),
+                "inventory_mode": str(host.get("inventory_mode", -1)),
+                "groups": [{"groupid": grupo["groupid"]} for grupo in host.get("groups", [])],
+                "interfaces": [{"ip": interfaz.get("ip", "")} for interfaz in host.get("interfaces", [])],
+                "inventory": dict(host.get("inventory", {})),
+            })
+            hostids.append(hostid)
+        self.auditar(hostids, 0)
+        return {"hostids": hostids}
+
+    def host_update(self, hosts):
+        for host in hosts:
+            if str(host["hostid"]) not in self.hosts:
+                raise ErrorAPI("No permissions to referred object or it does not exist!")
+        for host in hosts:
+            actual = self.hosts[str(host["hostid"])]
+            for campo, valor in host.items():
+                if campo == "inventory":
+                    actual.setdefault("inventory", {}).update(valor)
+                elif campo == "groups":
+                    actual["groups"] = [{"groupid": grupo["groupid"]} for grupo in valor]
+                elif campo == "host":
+                    self.nombres.pop(actual["host"], None)
+                    actual["host"] = valor
+                    self.nombres[valor] = actual["hostid"]
+                elif campo in ("name", "description", "inventory_mode"):
+                    actual[campo] = str(valor)
+        self.auditar([str(host["hostid"]) for host in hosts], 1)
+        return {"hostids": [str(host["hostid"]) for host in hosts]}
+
+    def auditar(self, hostids, accion):
+        ahora = int(time.time())
+        self.auditoria += [(ahora, hostid, accion) for hostid in hostids]
+
+    def auditlog_get(self, params):
+        desde = params.get("time_from", 0)
+        registros = [{"clock": str(clock), "resourceid": hostid, "action": str(accion)}
+                     for clock, hostid, accion in self.auditoria if clock >= desde]
+        return registros[:params["limit"]] if "limit" in params else registros
+
+
+def crear_handler(mock):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Encabezados y cuerpo en un solo envío, sin esperar el ACK retardado del cliente
+        wbufsize = 1 << 16
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def responder(self, codigo, cuerpo=b""):
+            self.send_response(codigo)
+            self.send_header("Content-Type", "application/json-rpc")
+            self.send_header("Content-Length", str(len(cuerpo)))
+            self.end_headers()
+            self.wfile.write(cuerpo)
+
+        def do_POST(self):
+            pedido = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            params = pedido.get("params", {})
+            time.sleep(mock.demora(params))
+            if mock.errores and mock.rnd.random() < mock.errores:
+                self.responder(503)
+                return
+            respuesta = {"jsonrpc": "2.0", "id": pedido.get("id")}
+            try:
+                respuesta["result"] = mock.atender(pedido["method"], params, pedido.get("auth"))
+            except ErrorAPI as e:
+                respuesta["error"] = e.error
+            self.responder(200, json.dumps(respuesta).encode("utf-8"))
+
+    return Handler
+
+
+class Servidor(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+def iniciar(mock, puerto=8900):
+    servidor = Servidor(("127.0.0.1", puerto), crear_handler(mock))
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock de api_jsonrpc.php de Zabbix")
+    parser.add_argument("--puerto", type=int, default=8900)
+    parser.add_argument("--hosts", type=int, default=10000, help="hosts existentes al iniciar")
+    parser.add_argument("--latencia", type=float, default=0.005, help="segundos fijos por llamada")
+    parser.add_argument("--jitter", type=float, default=0.002, help="segundos aleatorios adicionales por llamada")
+    parser.add_argument("--latencia-host", type=float, default=0.0005, help="segundos por host en create/update por lotes")
+    parser.add_argument("--errores", type=float, default=0.0, help="fracción de llamadas que responden HTTP 503")
+    args = parser.parse_args()
+
+    mock = MockZabbix(args.latencia, args.jitter, args.latencia_host, args.errores)
+    mock.sembrar(args.hosts)
+    servidor = iniciar(mock, args.puerto)
+    print(f"Mock de Zabbix escuchando en http://127.0.0.1:{args.puerto}/api_jsonrpc.php ({args.hosts} hosts)", flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        servidor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
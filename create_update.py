@@ -1,56 +1,219 @@
 import os
 import requests
-import json
 import pandas as pd
 import datetime
-from zabbix_functions import login_zabbix, get_host_groups, obtener_ids, quitar_acentos, MAPA_LOCALIDADES, URL, USERNAME, PASSWORD
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from inventory import aplicar_en_inventario
+from journal import Journal, clave_ejecucion
+from metrics import Cronometro
+from report_writer import ReportWriter, REPORT_FORMAT
+from sheet_reader import iter_bloques, leer_encabezados, contar_filas, READ_CHUNK_SIZE
+from zabbix_functions import get_client, get_hosts_by_ids, inventario_host, buscar_hostids, group_cache, quitar_acentos, quitar_acentos_serie, HostIndex, MAPA_LOCALIDADES, CLAVE_HOSTID
 
 """ FUNCIONES PARA CREAR HOSTS EN ZABBIX """
 
-# Función para crear conexión en Zabbix (Estructura JSON)
-def create_host(url, auth_token, hostname, hostip, mac_add, groupids, contact, 
-                address, lat, lon, notes, onu_sn, olt, slot, pon, city):
-    data = {
-        "jsonrpc": "2.0",
-        "method": "host.create",
-        "params": {
-            "host": hostname,
-            "description": "NAP: " + notes,
-            "visible": 1,
-            "groups": [{"groupid": groupid} for groupid in groupids],
-            "templates": [{"templateid": "10566"}],
-            "interfaces": [
-                {"type": 1, "main": 1, "useip": 1, "ip": hostip, "dns": "", "port": "10050"}
-            ],
-            "inventory_mode": 0,
-            "inventory": {
-                "macaddress_a": mac_add,
-                "contact": contact,
-                "location": address,
-                "location_lat": lat,
-                "location_lon": lon,
-                "notes": "NAP: " + notes,
-                "serialno_a": onu_sn, 
-                "site_address_a": olt,
-                "site_address_b": slot,
-                "site_address_c": pon,
-                "site_city": city,
-            },
+# Cantidad de hosts que se envían en cada llamada host.create (acepta un arreglo de hosts)
+CREATE_BATCH_SIZE = 100
+
+# Qué hacer con una fila cuyo nombre, IP o serial ya existe en Zabbix: informarla como duplicada,
+# o actualizar ese host en lugar de crearlo. Solo se actualiza si coincide el nombre técnico y todas
+# las coincidencias son del mismo host: coincidir solo en IP o serial puede ser otro host, que el
+# host.update renombraría con el nombre de la hoja
+DUPLICADOS_REPORTAR = "reportar"
+DUPLICADOS_ACTUALIZAR = "actualizar"
+
+ETIQUETAS_DUPLICADOS = {"nombre": "nombre", "ip": "IP", "serial": "serial ONU"}
+
+# Cantidad de mensajes de error que se conservan para la página de resultados; el detalle completo
+# de cada fila queda en el journal y se descarga desde ahí
+RESULTS_MAX_MESSAGES = 200
+
+# Estados con que se registra cada fila, en el orden y con el texto en que se muestran
+ETIQUETAS_ESTADOS = {
+    "success": "Correctos",
+    "updated": "Existentes actualizados",
+    "unchanged": "Sin cambios",
+    "reanudado": "Completados en una ejecución anterior",
+    "duplicate": "Duplicados",
+    "error": "Errores",
+}
+
+# Resumen acotado de una carga: cantidad de filas por estado y los primeros mensajes de error
+class ResumenCarga:
+
+    def __init__(self, ejecucion=None, mensajes=None, max_mensajes=RESULTS_MAX_MESSAGES):
+        self.ejecucion = ejecucion
+        self.max_mensajes = max_mensajes
+        self.conteo = {}
+        self.mensajes = list(mensajes or [])
+        self.omitidos = 0
+
+    # Cuenta una fila; solo se guarda su mensaje si es un error o un duplicado y todavía hay lugar
+    def agregar(self, estado, mensaje):
+        self.conteo[estado] = self.conteo.get(estado, 0) + 1
+        if estado in ("error", "duplicate"):
+            if len(self.mensajes) < self.max_mensajes:
+                self.mensajes.append(mensaje)
+            else:
+                self.omitidos += 1
+
+    @property
+    def total(self):
+        return sum(self.conteo.values())
+
+    def como_dict(self):
+        return {
+            "ejecucion": self.ejecucion,
+            "total": self.total,
+            "conteo": dict(self.conteo),
+            "mensajes": self.mensajes,
+            "omitidos": self.omitidos,
+        }
+
+# Función para armar los parámetros de un host en Zabbix (Estructura JSON)
+def build_host_params(hostname, hostip, mac_add, groupids, contact, address, lat, lon,
+                      notes, onu_sn, olt, slot, pon, city):
+    return {
+        "host": hostname,
+        "description": "NAP: " + notes,
+        "visible": 1,
+        "groups": [{"groupid": groupid} for groupid in groupids],
+        "templates": [{"templateid": "10566"}],
+        "interfaces": [
+            {"type": 1, "main": 1, "useip": 1, "ip": hostip, "dns": "", "port": "10050"}
+        ],
+        "inventory_mode": 0,
+        "inventory": {
+            "macaddress_a": mac_add,
+            "contact": contact,
+            "location": address,
+            "location_lat": lat,
+            "location_lon": lon,
+            "notes": "NAP: " + notes,
+            "serialno_a": onu_sn, 
+            "site_address_a": olt,
+            "site_address_b": slot,
+            "site_address_c": pon,
+            "site_city": city,
         },
-        "auth": auth_token,
-        "id": 2,
     }
-    headers = {"Content-Type": "application/json"}
-    response = requests.post(url, headers=headers, data=json.dumps(data))
-    response_json = response.json()
 
-    if "error" in response_json:
-        raise Exception(f"Error al crear el host: {response_json['error']}")
-    else:
-        return f"Host creado exitosamente. Host ID: {response_json['result']['hostids'][0]}"
+# Función para crear varios hosts en una sola llamada host.create
+def create_hosts_batch(client, hosts_params):
+    """
+    Envía una lista de hosts en un único host.create y devuelve sus hostids en el mismo orden.
+    Zabbix procesa la llamada en una transacción: si un host falla, no se crea ninguno.
+    """
+    return client.call("host.create", hosts_params, "Error al crear el host")["hostids"]
+
+# Función para actualizar varios hosts existentes en una sola llamada host.update
+def update_hosts_batch(client, hosts_params):
+    return client.call("host.update", hosts_params, "Error al actualizar el host")["hostids"]
+
+# Función que convierte los parámetros de host.create en los de host.update para un host existente
+def params_actualizacion(params, hostid):
+    """
+    Se conservan la interfaz y los templates del host existente, que host.update reemplazaría.
+    """
+    return {"hostid": hostid, **{campo: valor for campo, valor in params.items() if campo not in ("interfaces", "templates")}}
+
+# Función que crea un lote de hosts y lo divide en mitades cuando falla, hasta aislar las filas con error
+def crear_lote(client, lote, enviar=create_hosts_batch):
+    """
+    Recibe una lista de tuplas (indice, params) y devuelve una lista de tuplas
+    (indice, hostid, error) en el mismo orden, donde solo uno de hostid/error tiene valor.
+    enviar es la llamada por lote (create_hosts_batch o update_hosts_batch).
+    """
+    try:
+        hostids = enviar(client, [params for _, params in lote])
+        return [(indice, hostid, None) for (indice, _), hostid in zip(lote, hostids)]
+    except requests.exceptions.RequestException as e:
+        # Error de red: dividir el lote no ayuda, se reporta en todas las filas
+        return [(indice, None, e) for indice, _ in lote]
+    except Exception as e:
+        if len(lote) == 1:
+            return [(lote[0][0], None, e)]
+        mitad = len(lote) // 2
+        return crear_lote(client, lote[:mitad], enviar) + crear_lote(client, lote[mitad:], enviar)
     
-# Función principal que permite extraer una lista con los resultados de la creación de las conexiones clientes en Zabbix y sus posibles errores
-def process_excel(file_path):
+# Función que valida los grupos de toda la hoja con la caché de grupos. Si faltan grupos se vuelve
+# a consultar Zabbix una vez, por si fueron creados después de la última carga de la caché
+def resolver_grupos(client, combinaciones):
+    combinaciones = list(combinaciones)
+    resolver = group_cache.get(client)
+    errores = resolver.validar(combinaciones)
+    if errores:
+        group_cache.invalidar()
+        resolver = group_cache.get(client)
+        errores = resolver.validar(combinaciones)
+    return resolver, errores
+
+# Función que prepara la hoja completa por columnas y arma los params de host.create de cada fila
+def preparar_filas(df, resolver):
+    """
+    Recibe el DataFrame de la hoja (texto, con "N/A" en las celdas vacías) y devuelve una lista
+    de tuplas (row, params, error) en el orden de la hoja. row es el registro de la fila con su
+    hostname; params está listo para host.create, o error indica por qué no se puede crear.
+    """
+    df["Nombre"] = quitar_acentos_serie(df["Nombre"]).str.strip()
+    for columna in ["Customer", "ONT/ONU", "Localidad", "OLT", "Slot", "PON"]:
+        df[columna] = df[columna].str.strip()
+
+    ont = df["ONT/ONU"].mask(df["ONT/ONU"].isin(["", "N/A"]), "PDFN")
+    localidad_abrev = df["Localidad"].map(MAPA_LOCALIDADES).fillna(df["Localidad"])
+    df["hostname"] = df["Nombre"] + " " + ont + " ID" + df["Customer"] + " " + localidad_abrev
+
+    # Coordenadas "lat, lon": sin coma quedan vacías, con más de una coma la fila es inválida
+    coordenadas = df["Ubicación de la caja NAP (Coordenadas)"].str.strip()
+    comas = coordenadas.str.count(",")
+    partes = coordenadas.where(comas == 1, ",").str.split(",", n=1, expand=True)
+    latitud = partes[0].str.strip()
+    longitud = partes[1].str.strip()
+
+    # Los grupos se resuelven una sola vez por cada combinación distinta de Localidad, OLT y Feeder
+    combinaciones = {}
+    for combinacion in df[["Localidad", "OLT", "Feeder"]].drop_duplicates().itertuples(index=False, name=None):
+        try:
+            combinaciones[combinacion] = (resolver.resolver(*combinacion), None)
+        except Exception as e:
+            combinaciones[combinacion] = (None, e)
+    grupos = [combinaciones[combinacion] for combinacion in zip(df["Localidad"], df["OLT"], df["Feeder"])]
+
+    ip = df["Dirección IP"].str.strip()
+    direccion = df["Dirección"].str.strip()
+
+    filas = []
+    for row, (groupids, error), comas_fila, lat, lon, hostip, address in zip(
+            df.to_dict(orient="records"), grupos, comas, latitud, longitud, ip, direccion):
+        if error is None and comas_fila > 1:
+            error = ValueError("Formato de coordenadas inválido: se esperaba 'latitud, longitud'")
+        if error is not None:
+            filas.append((row, None, error))
+            continue
+        params = build_host_params(
+            row["hostname"], hostip, row["MAC address"], groupids,
+            row["Numero de telefono"], address, lat, lon, row["NAP"],
+            row["ONT/ONU"], row["OLT"], row["Slot"], row["PON"], row["Localidad"]
+        )
+        filas.append((row, params, None))
+    return filas
+
+# Función que devuelve el nombre, las IP y el serial con los que se buscan duplicados de un host
+def claves_host(params):
+    return params["host"], [interfaz["ip"] for interfaz in params["interfaces"]], params["inventory"]["serialno_a"]
+
+# Función que describe las coincidencias de HostIndex.buscar para el mensaje de la fila
+def describir_duplicados(en_hoja, en_zabbix):
+    return "; ".join(
+        [f"{ETIQUETAS_DUPLICADOS[campo]} {valor} repetido en la fila {fila + 1}" for campo, valor, fila in en_hoja] +
+        [f"{ETIQUETAS_DUPLICADOS[campo]} {valor} ya existe en Zabbix (hostid {hostid})" for campo, valor, hostid in en_zabbix]
+    )
+
+# Función principal que crea las conexiones clientes en Zabbix y devuelve el resumen de la carga (ResumenCarga.como_dict) y el nombre del reporte
+def process_excel(file_path, batch_size=CREATE_BATCH_SIZE, read_chunk_size=READ_CHUNK_SIZE, reanudar=False,
+                  duplicados=DUPLICADOS_REPORTAR, formato_reporte=REPORT_FORMAT, progreso=None):
 
 
     columns = [
@@ -59,81 +222,149 @@ def process_excel(file_path):
         "Dirección", "Numero de telefono"
     ]
 
-    df = pd.read_excel(file_path, usecols=columns, dtype={'Slot': str,'PON': str})
-    df = df.fillna("N/A").astype(str)
-
-    df["Nombre"] = df["Nombre"].apply(quitar_acentos).str.strip()
-    df["Customer"] = df["Customer"].str.strip()
-    df["ONT/ONU"] = df["ONT/ONU"].str.strip()
-    df["Localidad"] = df["Localidad"].str.strip()
-
-    df["hostname"] = df.apply(
-        lambda row: f"{row['Nombre']} {'PDFN' if row['ONT/ONU'] in ['', 'N/A'] else row['ONT/ONU']} ID{row['Customer']} {MAPA_LOCALIDADES.get(row['Localidad'], row['Localidad'])}",
-        axis=1
-    )
-
-    df["OLT"] = df["OLT"].str.strip()
-    df["Slot"] = df["Slot"].str.strip()
-    df["PON"] = df["PON"].str.strip()
-
-    client_data_dict = df.to_dict(orient="records")
-
+    cronometro = Cronometro("crear", progreso)
+    client = get_client()
     try:
-        auth_token = login_zabbix(URL, USERNAME, PASSWORD)
+        with cronometro.etapa("login"):
+            client.login()
     except Exception as e:
-        return f"Error al iniciar sesión en Zabbix: {e}"
+        return ResumenCarga(mensajes=[f"Error al iniciar sesión en Zabbix: {e}"]).como_dict(), None
     
-    host_groups = get_host_groups(URL, auth_token)
-    zabbix_group_ids = {group['name'].strip(): group['groupid'].strip() for group in host_groups}
-
-    resultados = []
-    failures = []
-    datos_con_hostid = []
-    for row in client_data_dict:
-        try:
-            hostname = row["hostname"]
-            groupids = obtener_ids(row["Localidad"], row["OLT"], row["Feeder"], zabbix_group_ids)
-            
-            coordenadas = row["Ubicación de la caja NAP (Coordenadas)"].strip()
-            if coordenadas and "," in coordenadas:
-                latitud, longitud = map(str.strip, coordenadas.split(","))
-            else:
-                latitud = ""
-                longitud = ""
-
-                """ if "," not in coordenadas:
-                    raise ValueError("Formato de coordenadas inválido: no se encontró una coma.") """
-            
-            response = create_host(
-                URL, auth_token, hostname, row["Dirección IP"].strip(), row["MAC address"], groupids, 
-                row["Numero de telefono"], row["Dirección"].strip(), latitud, longitud, row["NAP"],
-                row["ONT/ONU"], row["OLT"], row["Slot"], row["PON"], row["Localidad"]
-            )
-            host_id = response.split("Host ID: ")[-1]  # Extraer hostid
-            row["hostid"] = host_id
-            datos_con_hostid.append(row)
-            resultados.append(f"{hostname} → {response}")
-        except Exception as e:
-            resultados.append(f"Error al crear host {row['hostname']}: {e}")
-
-    print(resultados)
-
-    if resultados:
-        # Guardar Excel con hostids
-        timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"created_hosts_{timestamp}.xlsx"
-        file_path_result = os.path.join(RESULTS_FOLDER, filename)
+    # Primera lectura, solo de los grupos: si falta alguno en Zabbix no se crea ningún host y se informan todos
+    combinaciones = [
+        (row["Localidad"], row["OLT"], row["Feeder"])
+        for bloque in cronometro.iterar("lectura", iter_bloques(file_path, ["Localidad", "OLT", "Feeder"], relleno="N/A"))
+        for row in bloque
+    ]
+    with cronometro.etapa("grupos"):
+        resolver, errores_grupos = resolver_grupos(client, combinaciones)
+    if errores_grupos:
+        return ResumenCarga(mensajes=["No se creó ningún host: hay grupos no definidos en Zabbix."] + errores_grupos).como_dict(), None
 
-        df_result = pd.DataFrame(datos_con_hostid)
+    # Verificación previa: los hosts existentes se indexan una vez y cada fila se compara contra
+    # ellos y contra las filas anteriores de la hoja, antes de enviar cualquier host.create
+    try:
+        with cronometro.etapa("duplicados"):
+            existentes = HostIndex.from_client(client)
+    except Exception as e:
+        return ResumenCarga(mensajes=[f"Error al obtener los hosts existentes en Zabbix: {e}"]).como_dict(), None
+    vistos = HostIndex()
 
-        if not df_result.empty and 'hostid' in df_result.columns:
-            cols = ['hostid'] + [c for c in df_result.columns if c != 'hostid']
-            df_result = df_result[cols]
+    if progreso:
+        progreso.iniciar(len(combinaciones))
+    del combinaciones
 
-        df_result.to_excel(file_path_result, index=False)
-        return resultados, filename
+    # Reporte con los hostids, escrito por bloques a medida que se crean los hosts
+    timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+    filename = f"created_hosts_{timestamp}_{uuid.uuid4().hex[:8]}.{formato_reporte}"
+    file_path_result = os.path.join(RESULTS_FOLDER, filename)
+    encabezados = ["hostid"] + columns + ["hostname"]
+
+    # Cada resultado queda en el journal apenas se conoce; con reanudar se omiten las filas ya creadas
+    ejecucion = clave_ejecucion(file_path, "crear", duplicados)
+    resumen = ResumenCarga(ejecucion)
+    with Journal() as journal, ReportWriter(file_path_result, encabezados, formato_reporte) as reporte:
+        journal.iniciar(ejecucion, reanudar)
+
+        def registrar(registros):
+            with cronometro.etapa("journal"):
+                journal.registrar(ejecucion, registros)
+            for _, estado, _, mensaje, _ in registros:
+                cronometro.contar(estado)
+                resumen.agregar(estado, mensaje)
+
+        # La hoja se procesa por bloques: los hosts de un bloque se envían mientras el resto sigue sin leerse
+        fila_inicial = 0
+        bloques = iter_bloques(file_path, columns, chunk_size=read_chunk_size, relleno="N/A")
+        for bloque in cronometro.iterar("lectura", bloques):
+            with cronometro.etapa("preparacion"):
+                filas = preparar_filas(pd.DataFrame(bloque, columns=columns), resolver)
+            completadas = journal.completadas(ejecucion, fila_inicial, fila_inicial + len(filas)) if reanudar else {}
+
+            # Un mensaje por fila del bloque, en el orden de la hoja
+            resultados_bloque = [None] * len(filas)
+            pendientes = []
+            actualizaciones = []
+            registros = []
+            for indice, (row, params, error) in enumerate(filas):
+                fila = fila_inicial + indice
+                if params is not None:
+                    claves = claves_host(params)
+                    en_hoja = vistos.buscar(*claves)
+                    vistos.agregar(fila, *claves)
+                if fila in completadas:
+                    resultados_bloque[indice] = completadas[fila][0]
+                    resumen.agregar("reanudado", resultados_bloque[indice])
+                    if progreso:
+                        progreso.registrar(True)
+                elif error is None:
+                    en_zabbix = existentes.buscar(*claves)
+                    hostids = {hostid for _, _, hostid in en_zabbix}
+                    mismo_nombre = any(campo == "nombre" for campo, _, _ in en_zabbix)
+                    if not en_hoja and not en_zabbix:
+                        pendientes.append((indice, params))
+                    elif not en_hoja and duplicados == DUPLICADOS_ACTUALIZAR and mismo_nombre and len(hostids) == 1:
+                        actualizaciones.append((indice, params_actualizacion(params, hostids.pop())))
+                    else:
+                        resultados_bloque[indice] = f"Host {row['hostname']} duplicado: {describir_duplicados(en_hoja, en_zabbix)}"
+                        registros.append((fila, "duplicate", None, resultados_bloque[indice], row))
+                        if progreso:
+                            progreso.registrar(False)
+                else:
+                    resultados_bloque[indice] = f"Error al crear host {row['hostname']}: {error}"
+                    registros.append((fila_inicial + indice, "error", None, resultados_bloque[indice], row))
+                    if progreso:
+                        progreso.registrar(False)
+            if registros:
+                registrar(registros)
+
+            envios = [
+                (pendientes, create_hosts_batch, "success", "Host creado exitosamente", "crear"),
+                (actualizaciones, update_hosts_batch, "updated", "Host existente actualizado", "actualizar"),
+            ]
+            aplicados = []
+            for lista, enviar, estado, texto, accion in envios:
+                for inicio in range(0, len(lista), batch_size):
+                    lote = lista[inicio:inicio + batch_size]
+                    registros = []
+                    with cronometro.etapa("zabbix"):
+                        enviados = crear_lote(client, lote, enviar)
+                    params_lote = dict(lote)
+                    aplicados += [dict(params_lote[indice], hostid=host_id) for indice, host_id, error in enviados if error is None]
+                    for indice, host_id, error in enviados:
+                        row = filas[indice][0]
+                        if error is None:
+                            row["hostid"] = host_id
+                            resultados_bloque[indice] = f"{row['hostname']} → {texto}. Host ID: {host_id}"
+                        else:
+                            resultados_bloque[indice] = f"Error al {accion} host {row['hostname']}: {error}"
+                        registros.append((fila_inicial + indice, "error" if error else estado, host_id, resultados_bloque[indice], row))
+                        if progreso:
+                            progreso.registrar(error is None)
+                    registrar(registros)
+
+            # La copia local de hosts se actualiza una vez por bloque con lo enviado, sin volver a pedirlo a Zabbix
+            with cronometro.etapa("inventario"):
+                aplicar_en_inventario(aplicados)
+
+            # Filas del bloque con hostid, en el orden de la hoja (incluye las creadas en ejecuciones anteriores)
+            filas_reporte = []
+            for indice, (row, _, _) in enumerate(filas):
+                if fila_inicial + indice in completadas:
+                    filas_reporte.append(completadas[fila_inicial + indice][1])
+                elif "hostid" in row:
+                    filas_reporte.append(row)
+            with cronometro.etapa("reporte"):
+                reporte.agregar([datos.get(columna, "") for columna in encabezados] for datos in filas_reporte)
+
+            fila_inicial += len(filas)
+
+    # Sin ningún host creado o actualizado el reporte queda vacío y no se ofrece
+    if reporte.filas:
+        return resumen.como_dict(), filename
     else:
-        return resultados, None
+        os.remove(file_path_result)
+        return resumen.como_dict(), None
 
 
 """ FUNCIONES PARA ACTUALIZAR HOSTS EN ZABBIX """
@@ -161,6 +392,14 @@ UPDATABLE_FIELDS = {
 
 RESULTS_FOLDER = "results"
 
+# Cantidad de host.update simultáneos y reintentos ante errores de red (espera inicial en segundos, se duplica en cada intento)
+UPDATE_WORKERS = 10
+UPDATE_RETRIES = 3
+UPDATE_BACKOFF = 1
+
+# Cantidad de hosts que se envían en cada host.massupdate al reasignar grupos por lote
+MASSUPDATE_BATCH_SIZE = 500
+
 def get_friendly_to_technical():
     friendly_to_technical = {}
     # Agregar campo especial 'description'
@@ -171,7 +410,37 @@ def get_friendly_to_technical():
         friendly_to_technical[friendly] = tech
     return friendly_to_technical
 
-def update_host(url, auth_token, hostid, selected_fields, row_data, group_ids_dict):
+# Función que compara los params de host.update con el host actual y deja solo lo que cambia
+def calcular_cambios(params, actual):
+    """
+    actual es el host devuelto por get_hosts_by_ids. Devuelve los params reducidos a los
+    campos con valores distintos, o None si el host ya tiene todos los valores.
+    """
+    cambios = {"hostid": params["hostid"]}
+
+    for campo in ("host", "name", "description"):
+        if campo in params and str(params[campo]) != str(actual.get(campo, "")):
+            cambios[campo] = params[campo]
+
+    if "groups" in params:
+        nuevos = {str(g["groupid"]) for g in params["groups"]}
+        if nuevos != {str(g["groupid"]) for g in actual.get("groups", [])}:
+            cambios["groups"] = params["groups"]
+
+    inventario = inventario_host(actual)
+    modo_distinto = str(actual.get("inventory_mode")) != str(params["inventory_mode"])
+    inventario_cambios = {
+        campo: valor for campo, valor in params.get("inventory", {}).items()
+        if modo_distinto or str(valor) != str(inventario.get(campo, ""))
+    }
+    if inventario_cambios:
+        cambios["inventory"] = inventario_cambios
+    if modo_distinto or inventario_cambios:
+        cambios["inventory_mode"] = params["inventory_mode"]
+
+    return cambios if len(cambios) > 1 else None
+
+def update_host(client, hostid, selected_fields, row_data, resolver, actual=None):
     params = {
         "hostid": hostid,
         "inventory_mode": 0,
@@ -179,15 +448,16 @@ def update_host(url, auth_token, hostid, selected_fields, row_data, group_ids_di
 
     friendly_to_tech = get_friendly_to_technical()
 
-    nap_value = row_data.get("NAP", "")
+    nap_value = row_data.get("NAP") or ""
     if "description" in selected_fields:
         params["description"] = f"NAP: {nap_value}"
 
     if "Hostname" in selected_fields:
-        nombre = quitar_acentos(str(row_data.get("Nombre", "")).strip())
-        customer = str(row_data.get("Customer", "")).strip()
-        ont = str(row_data.get("ONT/ONU", "")).strip()
-        localidad = str(row_data.get("Localidad", "")).strip()
+        # Las celdas vacías llegan como None desde iter_bloques
+        nombre = quitar_acentos(str(row_data.get("Nombre") or "").strip())
+        customer = str(row_data.get("Customer") or "").strip()
+        ont = str(row_data.get("ONT/ONU") or "").strip()
+        localidad = str(row_data.get("Localidad") or "").strip()
         localidad_abrev = MAPA_LOCALIDADES.get(localidad, localidad)
         hostname = f"{nombre} {ont} ID{customer} {localidad_abrev}"
         params["host"] = hostname
@@ -195,10 +465,7 @@ def update_host(url, auth_token, hostid, selected_fields, row_data, group_ids_di
 
     if "modify_groups" in selected_fields:
         try:
-            localidad = row_data.get("Localidad", "").strip()
-            olt = row_data.get("OLT", "").strip()
-            feeder = row_data.get("Feeder", "N/A").strip()
-            nuevos_group_ids = obtener_ids(localidad, olt, feeder, group_ids_dict)
+            nuevos_group_ids = grupos_fila(row_data, resolver)
             params["groups"] = [{"groupid": gid} for gid in nuevos_group_ids]
         except Exception as e:
             return {
@@ -217,7 +484,7 @@ def update_host(url, auth_token, hostid, selected_fields, row_data, group_ids_di
         if tech_field == "notes":
             inventory_fields[tech_field] = f"NAP: {nap_value}"
         elif friendly_field == "Latitud" or friendly_field == "Longitud":
-            coordenadas = row_data.get("Ubicación de la caja NAP (Coordenadas)", "").strip()
+            coordenadas = (row_data.get("Ubicación de la caja NAP (Coordenadas)") or "").strip()
             if coordenadas and "," in coordenadas:
                 latitud, longitud = map(str.strip, coordenadas.split(",", 1))
                 if friendly_field == "Latitud" and latitud:
@@ -230,92 +497,315 @@ def update_host(url, auth_token, hostid, selected_fields, row_data, group_ids_di
     if inventory_fields:
         params["inventory"] = inventory_fields
 
-    data = {
-        "jsonrpc": "2.0",
-        "method": "host.update",
-        "params": params,
-        "auth": auth_token,
-        "id": 2,
-    }
-
-    print("JSON que se enviará a Zabbix:", json.dumps(data, indent=2))
-
-    headers = {"Content-Type": "application/json"}
-    response = requests.post(url, headers=headers, data=json.dumps(data))
-    response_json = response.json()
+    # Modo diferencial: solo se envía lo que cambia respecto del host actual en Zabbix
+    if actual is not None:
+        params = calcular_cambios(params, actual)
+        if params is None:
+            return {
+                "status": "unchanged",
+                "hostid": hostid,
+                "message": "Sin cambios"
+            }
 
-    if "error" in response_json:
-        raise Exception(f"Error al actualizar el host: {response_json['error']}")
-    else:
-        return {
-            "status": "success",
-            "hostid": hostid,
-            "message": "Host actualizado exitosamente"
-        }
+    client.call("host.update", params, "Error al actualizar el host")
+    return {
+        "status": "success",
+        "hostid": hostid,
+        "message": "Host actualizado exitosamente",
+        "fields": [campo for campo in params if campo not in ("hostid", "inventory_mode")],
+        "params": params
+    }
 
-def process_update_zabbix(file_path, selected_fields):
+# Función que obtiene los groupids de una fila según su Localidad, OLT y Feeder. Las celdas vacías
+# (None) o las columnas que faltan cuentan como "N/A", igual que en la validación previa y al crear
+def grupos_fila(row_data, resolver):
+    localidad, olt, feeder = ((row_data.get(columna) or "N/A").strip() for columna in ("Localidad", "OLT", "Feeder"))
+    return resolver.resolver(localidad, olt, feeder)
+
+# Función que reemplaza los grupos de varios hosts por los mismos groupids en una sola llamada host.massupdate
+def massupdate_grupos(client, hosts_params, groupids, reintentos=UPDATE_RETRIES, backoff=UPDATE_BACKOFF):
+    params = {"hosts": hosts_params, "groups": [{"groupid": groupid} for groupid in groupids]}
+    # Como host.update, host.massupdate es idempotente y se puede reintentar ante errores de red
+    for intento in range(reintentos + 1):
+        try:
+            return client.call("host.massupdate", params, "Error al actualizar los grupos")["hostids"]
+        except requests.exceptions.RequestException:
+            if intento == reintentos:
+                raise
+            time.sleep(backoff * 2 ** intento)
+
+# Función que reasigna grupos con un host.massupdate por cada conjunto distinto de grupos
+def actualizar_grupos_masivo(client, hosts_grupos, batch_size=MASSUPDATE_BATCH_SIZE, mapa=map):
+    """
+    hosts_grupos: lista de tuplas (indice, hostid, groupids). Devuelve un diccionario
+    indice -> error (None si se actualizó). Los hosts que van a los mismos grupos se envían
+    juntos, de a batch_size; si una llamada falla se divide como en crear_lote. Los conjuntos
+    de un solo host no se envían (no ahorran llamadas): quedan para host.update con el resto
+    de los campos. mapa permite repartir las llamadas en hilos (executor.map).
+    """
+    por_conjunto = {}
+    for indice, hostid, groupids in hosts_grupos:
+        por_conjunto.setdefault(tuple(sorted(groupids)), []).append((indice, {"hostid": hostid}))
+
+    lotes = [
+        (groupids, lista[inicio:inicio + batch_size])
+        for groupids, lista in por_conjunto.items() if len(lista) > 1
+        for inicio in range(0, len(lista), batch_size)
+    ]
+    def enviar_lote(groupids, lote):
+        return crear_lote(client, lote, lambda client, hosts: massupdate_grupos(client, hosts, groupids))
+
+    errores = {}
+    for enviados in mapa(lambda tarea: enviar_lote(*tarea), lotes):
+        for indice, _, error in enviados:
+            errores[indice] = error
+    return errores
+
+# Función que reintenta update_host con espera exponencial cuando falla la conexión con Zabbix
+def update_host_con_reintentos(client, hostid, selected_fields, row_data, resolver, actual=None,
+                               reintentos=UPDATE_RETRIES, backoff=UPDATE_BACKOFF):
+    for intento in range(reintentos + 1):
+        try:
+            return update_host(client, hostid, selected_fields, row_data, resolver, actual)
+        except requests.exceptions.RequestException:
+            if intento == reintentos:
+                raise
+            time.sleep(backoff * 2 ** intento)
+
+def process_update_zabbix(file_path, selected_fields, max_workers=UPDATE_WORKERS, solo_cambios=False,
+                          read_chunk_size=READ_CHUNK_SIZE, reanudar=False, formato_reporte=REPORT_FORMAT,
+                          clave=CLAVE_HOSTID, grupos_masivos=False, progreso=None):
+    """
+    clave es la columna que identifica al host en cada fila: hostid, Customer (customer id del
+    nombre del host) u ONT/ONU (serialno_a del inventario). Con Customer u ONT/ONU los hostids de
+    cada bloque se buscan con buscar_hostids, y las filas sin host o con más de uno quedan con error.
+
+    Con grupos_masivos y modify_groups, los grupos de cada bloque se envían con un host.massupdate
+    por conjunto de grupos (actualizar_grupos_masivo) y el resto de los campos con host.update.
+    Si se envían otros campos a todos los hosts (sin solo_cambios) los grupos van en ese mismo
+    host.update, porque massupdate solo agregaría llamadas.
+    """
+    grupos_masivos = grupos_masivos and "modify_groups" in selected_fields and (solo_cambios or selected_fields == ["modify_groups"])
+    cronometro = Cronometro("actualizar", progreso)
+    client = get_client()
     try:
-        auth_token = login_zabbix(URL, USERNAME, PASSWORD)
+        with cronometro.etapa("login"):
+            client.login()
     except Exception as e:
         return {"error": f"Error al iniciar sesión en Zabbix: {e}"}
 
-    df_update = pd.read_excel(file_path, dtype={'hostid': str, 'Slot': str,'PON': str})
+    encabezados = leer_encabezados(file_path)
+
+    if clave not in encabezados:
+        return {"error": f"Falta la columna {clave} para identificar los hosts"}
 
     required_for_hostname = ["Nombre", "Customer", "ONT/ONU", "Localidad"]
     if "Hostname" in selected_fields:
-        df_columns = df_update.columns.tolist()
-        missing_cols = [col for col in required_for_hostname if col not in df_columns]
+        missing_cols = [col for col in required_for_hostname if col not in encabezados]
         if missing_cols:
             return {"error": f"Faltan las siguientes columnas requeridas para construir el hostname: {', '.join(missing_cols)}"}
-
-    resultados = []
-    report_data = []
     
-    group_list = get_host_groups(URL, auth_token)
-    group_ids_dict = {g["name"]: g["groupid"] for g in group_list}
+    # Si falta algún grupo en Zabbix no se actualiza ningún host y se informan todos los faltantes
+    if "modify_groups" in selected_fields:
+        columnas_grupos = [col for col in ["Localidad", "OLT", "Feeder"] if col in encabezados]
+        combinaciones = [
+            (row.get("Localidad", "N/A"), row.get("OLT", "N/A"), row.get("Feeder", "N/A"))
+            for bloque in cronometro.iterar("lectura", iter_bloques(file_path, columnas_grupos, relleno="N/A"))
+            for row in bloque
+        ]
+        with cronometro.etapa("grupos"):
+            resolver, errores_grupos = resolver_grupos(client, combinaciones)
+        if errores_grupos:
+            return {"error": "No se actualizó ningún host, hay grupos no definidos en Zabbix: " + "; ".join(errores_grupos)}
+    else:
+        with cronometro.etapa("grupos"):
+            resolver = group_cache.get(client)
 
 
-    for index, row in df_update.iterrows():
-        if pd.notna(row['hostid']):
-            row_data = row.to_dict()
+    # Procesa una fila de la hoja y devuelve el mensaje y la entrada del reporte
+    # Con grupos (lista de campos ya enviados por host.massupdate, vacía si no cambiaban) no se vuelven a enviar.
+    # Los params enviados con host.update se agregan a aplicados, para la copia local de hosts
+    def procesar_fila(index, row, actuales, error_fila=None, grupos=None, aplicados=None):
+        if error_fila:
+            return f"Error en fila {index+1}: {error_fila}", {
+                "hostid": row.get('hostid'),
+                "status": "error",
+                "message": error_fila,
+                "updated_fields": ""
+            }
+        if pd.notna(row.get('hostid')):
+            row_data = dict(row)
             try:
-                result = update_host(URL, auth_token, row['hostid'], selected_fields, row_data, group_ids_dict)
-                resultados.append(f"Host {row['hostid']} actualizado correctamente")
-                report_data.append({
+                actual = None
+                if actuales is not None:
+                    actual = actuales.get(str(row['hostid']).strip())
+                    if actual is None:
+                        raise Exception("El host no existe en Zabbix")
+
+                if grupos is None:
+                    result = update_host_con_reintentos(client, row['hostid'], selected_fields, row_data, resolver, actual)
+                else:
+                    campos = [campo for campo in selected_fields if campo != "modify_groups"]
+                    result = {"status": "unchanged", "fields": []}
+                    if campos:
+                        result = update_host_con_reintentos(client, row['hostid'], campos, row_data, resolver, actual)
+                    if result["status"] == "unchanged" and grupos:
+                        result = {"status": "success", "fields": grupos}
+                    elif result["status"] == "success":
+                        result["fields"] = grupos + result["fields"]
+                if result["status"] == "error":
+                    raise Exception(result["message"])
+                if aplicados is not None and result.get("params"):
+                    aplicados.append(result["params"])
+                if result["status"] == "unchanged":
+                    return f"Host {row['hostid']} sin cambios", {
+                        "hostid": row['hostid'],
+                        "status": "unchanged",
+                        "message": "Sin cambios",
+                        "updated_fields": ""
+                    }
+
+                return f"Host {row['hostid']} actualizado correctamente", {
                     "hostid": row['hostid'],
                     "status": "success",
                     "message": "Actualización exitosa",
-                    "updated_fields": ", ".join(selected_fields)
-                })
+                    "updated_fields": ", ".join(result["fields"] if solo_cambios else selected_fields)
+                }
 
             except Exception as e:
-                resultados.append(f"Error al actualizar host {row['hostid']}: {str(e)}")
-                report_data.append({
+                return f"Error al actualizar host {row['hostid']}: {str(e)}", {
                     "hostid": row['hostid'],
                     "status": "error",
                     "message": str(e),
                     "updated_fields": ""
-                })
+                }
 
         else:
-            msg = f"Host ID no encontrado para fila {index+1}"
-            resultados.append(msg)
-            report_data.append({
+            return f"Host ID no encontrado para fila {index+1}", {
                 "hostid": None,
                 "status": "error",
                 "message": "Falta hostid en la fila",
                 "updated_fields": ""
-            })
+            }
+
+    if progreso:
+        progreso.iniciar(contar_filas(file_path))
 
-    # Generar reporte Excel
+    # La hoja se lee por bloques; executor.map devuelve los resultados de cada bloque en el orden de la hoja
+    # Cada resultado queda en el journal por bloque (host.update es idempotente); con reanudar se omiten las filas ya hechas
     timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
-    report_filename = f"zabbix_update_report_{timestamp}.xlsx"
+    report_filename = f"zabbix_update_report_{timestamp}_{uuid.uuid4().hex[:8]}.{formato_reporte}"
     report_path = os.path.join(RESULTS_FOLDER, report_filename)
+    encabezados = ["hostid", "status", "message", "updated_fields"]
+    if clave != CLAVE_HOSTID:
+        encabezados.insert(0, clave)
+
+    # La clave por defecto no cambia la clave de ejecución, para poder reanudar cargas anteriores
+    opciones = [sorted(selected_fields), solo_cambios] + ([clave] if clave != CLAVE_HOSTID else [])
+    opciones += ["grupos_masivos"] if grupos_masivos else []
+    ejecucion = clave_ejecucion(file_path, "actualizar", *opciones)
+    resumen = ResumenCarga(ejecucion)
+    with Journal() as journal, ReportWriter(report_path, encabezados, formato_reporte) as reporte:
+        journal.iniciar(ejecucion, reanudar)
+
+        fila_inicial = 0
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for bloque in cronometro.iterar("lectura", iter_bloques(file_path, chunk_size=read_chunk_size)):
+                completadas = journal.completadas(ejecucion, fila_inicial, fila_inicial + len(bloque)) if reanudar else {}
+                pendientes = [(fila_inicial + i, row) for i, row in enumerate(bloque) if fila_inicial + i not in completadas]
+
+                # Con Customer u ONT/ONU como clave, los hostids del bloque se resuelven en pocas llamadas host.get
+                errores_fila = {}
+                if clave != CLAVE_HOSTID:
+                    with cronometro.etapa("claves"):
+                        encontrados = buscar_hostids(client, clave, [row[clave] for _, row in pendientes if row.get(clave)])
+                    for fila, row in pendientes:
+                        valor = row.get(clave)
+                        hostids = encontrados.get(valor, [])
+                        if len(hostids) == 1:
+                            row['hostid'] = hostids[0]
+                        elif hostids:
+                            errores_fila[fila] = f"{clave} {valor} corresponde a varios hosts: {', '.join(hostids)}"
+                        else:
+                            errores_fila[fila] = f"No se encontró ningún host con {clave} {valor}" if valor else f"Falta {clave} en la fila"
+
+                # Modo diferencial: estado actual de los hosts del bloque en pocas llamadas host.get
+                actuales = None
+                if solo_cambios:
+                    hostids = {str(row['hostid']).strip() for _, row in pendientes if pd.notna(row.get('hostid'))}
+                    with cronometro.etapa("estado_actual"):
+                        actuales = get_hosts_by_ids(client, hostids, list(UPDATABLE_FIELDS["inventory"]))
+
+                # El tiempo de "zabbix" es la espera de los resultados de los hilos, no la suma de sus llamadas
+                # Grupos por lote: las filas con hostid van a actualizar_grupos_masivo; en modo diferencial
+                # se omiten los hosts que ya tienen esos grupos. Las filas que no quedan en grupos_filas
+                # (sin hostid, sin host o únicas en su conjunto de grupos) envían los grupos con host.update
+                grupos_filas = {}
+                if grupos_masivos:
+                    hosts_grupos = []
+                    for fila, row in pendientes:
+                        if fila in errores_fila or pd.isna(row.get('hostid')):
+                            continue
+                        hostid = str(row['hostid']).strip()
+                        try:
+                            groupids = grupos_fila(row, resolver)
+                        except Exception as e:
+                            errores_fila[fila] = f"Error en grupos: {e}"
+                            continue
+                        if actuales is not None:
+                            actual = actuales.get(hostid)
+                            if actual is None:
+                                continue
+                            if {str(g) for g in groupids} == {str(g["groupid"]) for g in actual.get("groups", [])}:
+                                grupos_filas[fila] = []
+                                continue
+                        hosts_grupos.append((fila, hostid, groupids))
+                    with cronometro.etapa("zabbix"):
+                        errores_grupos = actualizar_grupos_masivo(client, hosts_grupos, mapa=executor.map)
+                    for fila, error in errores_grupos.items():
+                        if error is None:
+                            grupos_filas[fila] = ["groups"]
+                        else:
+                            errores_fila[fila] = f"Error en grupos: {error}"
+
+                aplicados = []
+                tareas = [
+                    (fila, row, actuales, errores_fila.get(fila), grupos_filas.get(fila), aplicados)
+                    for fila, row in pendientes
+                ]
+                filas_pendientes = dict(pendientes)
+                resultados_pendientes = cronometro.iterar("zabbix", executor.map(lambda tarea: procesar_fila(*tarea), tareas))
+                registros = []
+                filas_reporte = []
+                for fila in range(fila_inicial, fila_inicial + len(bloque)):
+                    if fila in completadas:
+                        mensaje, datos = completadas[fila]
+                        resumen.agregar("reanudado", mensaje)
+                        filas_reporte.append(datos)
+                        if progreso:
+                            progreso.registrar(True)
+                        continue
+                    mensaje, datos = next(resultados_pendientes)
+                    if clave != CLAVE_HOSTID:
+                        datos[clave] = filas_pendientes[fila].get(clave)
+                    resumen.agregar(datos["status"], mensaje)
+                    filas_reporte.append(datos)
+                    registros.append((fila, datos["status"], datos["hostid"], mensaje, datos))
+                    if progreso:
+                        progreso.registrar(datos["status"] != "error")
+                    cronometro.contar(datos["status"])
+                with cronometro.etapa("journal"):
+                    journal.registrar(ejecucion, registros)
+                # La copia local de hosts se actualiza una vez por bloque, fuera de los hilos de host.update
+                with cronometro.etapa("inventario"):
+                    aplicar_en_inventario(aplicados)
+                with cronometro.etapa("reporte"):
+                    reporte.agregar([datos.get(columna) for columna in encabezados] for datos in filas_reporte)
+                fila_inicial += len(bloque)
 
-    pd.DataFrame(report_data).to_excel(report_path, index=False)
     
     return {
-        "resultados": resultados,
+        "resumen": resumen.como_dict(),
         "report_path": report_path,
         "report_filename": report_filename
     }
@@ -0,0 +1,22 @@
+"""
+Configuración de gunicorn para wsgi.py: gunicorn -c gunicorn.conf.py wsgi:app
+
+Un proceso (ver wsgi.py) con hilos gthread: una carga o una descarga larga ocupa un hilo y los
+demás pedidos siguen atendiéndose. Las cargas corren en los hilos de JobManager, no en los del
+servidor, así que el pedido de subida termina en cuanto el archivo queda en disco.
+"""
+import os
+
+bind = os.environ.get("BIND", "0.0.0.0:8000")
+workers = 1
+worker_class = "gthread"
+threads = int(os.environ.get("WEB_THREADS", 16))
+
+# Con gthread el proceso avisa que sigue vivo desde su hilo principal: un pedido largo no dispara timeout
+timeout = 60
+# Al reiniciar se espera a los pedidos en curso; los trabajos en proceso se pierden y se retoman con "reanudar"
+graceful_timeout = int(os.environ.get("WEB_GRACEFUL_TIMEOUT", 120))
+keepalive = 5
+
+accesslog = "-"
+errorlog = "-"
@@ -0,0 +1,290 @@
+import json
+import time
+import sqlite3
+import threading
+from zabbix_functions import iter_hosts, extraer_datos_hosts, inventario_host, HOSTS_PAGE_SIZE
+
+# Base SQLite con la copia local de los hosts de Zabbix
+INVENTORY_PATH = "inventario.sqlite3"
+
+# Campos de inventario que se copian de cada host (los que cargan las hojas de creación y actualización)
+INVENTORY_FIELDS = [
+    "alias", "macaddress_a", "contact", "location", "location_lat", "location_lon", "notes",
+    "serialno_a", "site_address_a", "site_address_b", "site_address_c", "site_city",
+]
+
+# Segundos que se restan a la última sincronización al pedir el auditlog, por diferencias de reloj con Zabbix
+SYNC_MARGIN = 300
+
+# Máximo de registros de auditlog por sincronización; si se alcanza se hace una sincronización completa
+AUDITLOG_LIMIT = 50000
+
+# Tipo de recurso "host" y acción "eliminar" en auditlog.get
+AUDIT_RESOURCE_HOST = 4
+AUDIT_ACTION_DELETE = 2
+
+# Copia local de los hosts de Zabbix para exportar y buscar sin recorrer host.get completo
+class InventoryMirror:
+    """
+    Guarda por host: hostid, host, name, customer id, nombre y serial ONU extraídos del nombre
+    (como en la exportación), serialno_a y los campos de INVENTORY_FIELDS en JSON.
+
+    sincronizar() trae solo lo nuevo o modificado desde la última vez: los hostids mayores al
+    último conocido y los hosts que aparecen en auditlog.get desde entonces. Si el auditlog no
+    está disponible, o es la primera vez, recorre todos los hosts y elimina los que ya no existen.
+    aplicar() actualiza la copia con lo enviado en host.create/host.update.
+
+    Las llamadas a Zabbix se hacen sin tomar el lock de la base: solo se toma para escribir cada
+    página, así aplicar() no espera a que termine una sincronización.
+    """
+
+    def __init__(self, db_path=INVENTORY_PATH):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS hosts (
+                hostid INTEGER PRIMARY KEY,
+                host TEXT NOT NULL,
+                name TEXT NOT NULL,
+                customer_id TEXT,
+                nombre TEXT,
+                serial_onu TEXT,
+                serialno_a TEXT,
+                inventory TEXT,
+                sincronizado REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS hosts_customer_id ON hosts (customer_id);
+            CREATE INDEX IF NOT EXISTS hosts_serial_onu ON hosts (serial_onu);
+            CREATE INDEX IF NOT EXISTS hosts_serialno_a ON hosts (serialno_a);
+            CREATE TABLE IF NOT EXISTS estado (
+                clave TEXT PRIMARY KEY,
+                valor TEXT
+            );
+        """)
+        self.conn.commit()
+        # _lock protege la conexión; _sync_lock evita dos sincronizaciones a la vez
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._invalidada = False
+
+    def close(self):
+        self.conn.close()
+
+    def _estado(self, clave):
+        fila = self.conn.execute("SELECT valor FROM estado WHERE clave = ?", (clave,)).fetchone()
+        return fila[0] if fila else None
+
+    def _guardar_estado(self, clave, valor):
+        self.conn.execute("INSERT OR REPLACE INTO estado (clave, valor) VALUES (?, ?)", (clave, valor))
+
+    # Inserta o reemplaza una página de hosts con el formato de host.get
+    def _guardar(self, hosts):
+        if not hosts:
+            return
+        ahora = time.time()
+        nombres = [host.get("name") or host["host"] for host in hosts]
+        datos = extraer_datos_hosts(nombres)
+        filas = []
+        for host, nombre_host, customer, nombre, serial in zip(
+                hosts, nombres, datos["customer id"], datos["nombre"], datos["serial onu"]):
+            inventario = {campo: valor for campo, valor in inventario_host(host).items() if campo in INVENTORY_FIELDS}
+            filas.append((
+                int(host["hostid"]), host["host"], nombre_host, customer, nombre, serial,
+                inventario.get("serialno_a", ""), json.dumps(inventario, ensure_ascii=False), ahora
+            ))
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO hosts (hostid, host, name, customer_id, nombre, serial_onu, serialno_a, inventory, sincronizado) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            filas
+        )
+
+    def _max_hostid(self):
+        return self.conn.execute("SELECT MAX(hostid) FROM hosts").fetchone()[0]
+
+    # Guarda una página y la confirma, tomando el lock solo mientras se escribe
+    def _guardar_pagina(self, hosts, eliminados=()):
+        with self._lock:
+            self._guardar(hosts)
+            self.conn.executemany("DELETE FROM hosts WHERE hostid = ?", [(hostid,) for hostid in eliminados])
+            self.conn.commit()
+
+    def _paginas(self, client, **extra_params):
+        return iter_hosts(client, ("hostid", "host", "name"), HOSTS_PAGE_SIZE,
+                          selectInventory=INVENTORY_FIELDS, **extra_params)
+
+    # Los hosts que no se escribieron desde `inicio` (ni por host.get ni por aplicar()) ya no existen
+    def _sincronizacion_completa(self, client, inicio):
+        for pagina in self._paginas(client):
+            self._guardar_pagina(pagina)
+        with self._lock:
+            eliminados = self.conn.execute("DELETE FROM hosts WHERE sincronizado < ?", (inicio,)).rowcount
+            self.conn.commit()
+        return eliminados
+
+    # Hostids con cambios según el auditlog desde `desde`, separados en modificados y eliminados
+    def _cambios_auditlog(self, client, desde):
+        params = {
+            "output": ["resourceid", "action"],
+            "filter": {"resourcetype": AUDIT_RESOURCE_HOST},
+            "time_from": int(desde),
+            "sortfield": "clock",
+            "limit": AUDITLOG_LIMIT,
+        }
+        registros = client.call("auditlog.get", params, "Error al obtener el auditlog")
+        if len(registros) >= AUDITLOG_LIMIT:
+            raise ValueError("Demasiados cambios en el auditlog para una sincronización incremental")
+        modificados, eliminados = set(), set()
+        for registro in registros:
+            hostid = int(registro["resourceid"])
+            if int(registro["action"]) == AUDIT_ACTION_DELETE:
+                eliminados.add(hostid)
+                modificados.discard(hostid)
+            else:
+                modificados.add(hostid)
+                eliminados.discard(hostid)
+        return modificados, eliminados
+
+    def _sincronizacion_incremental(self, client, desde):
+        modificados, eliminados = self._cambios_auditlog(client, desde)
+
+        # Hosts nuevos: los hostids de Zabbix son crecientes
+        with self._lock:
+            ultimo = self._max_hostid()
+        nuevos = 0
+        for pagina in self._paginas(client, **({} if ultimo is None else {"desde": ultimo + 1})):
+            self._guardar_pagina(pagina)
+            nuevos += len(pagina)
+
+        # Hosts modificados: se vuelven a pedir; los que ya no devuelve host.get fueron eliminados
+        modificados = sorted(modificados)
+        for inicio in range(0, len(modificados), HOSTS_PAGE_SIZE):
+            hostids = modificados[inicio:inicio + HOSTS_PAGE_SIZE]
+            params = {
+                "output": ["hostid", "host", "name"],
+                "hostids": [str(hostid) for hostid in hostids],
+                "selectInventory": INVENTORY_FIELDS,
+            }
+            hosts = client.call("host.get", params, "Error al obtener los hosts")
+            eliminados |= set(hostids) - {int(host["hostid"]) for host in hosts}
+            self._guardar_pagina(hosts)
+
+        self._guardar_pagina([], eliminados)
+        return {"nuevos": nuevos, "modificados": len(modificados), "eliminados": len(eliminados)}
+
+    def sincronizar(self, client, completa=False):
+        """
+        Sincroniza la copia con Zabbix y devuelve un resumen con el tipo de sincronización y los conteos.
+        """
+        with self._sync_lock:
+            with self._lock:
+                inicio = time.time()
+                ultima = self._estado("ultima_sincronizacion")
+                self._invalidada = False
+            resumen = None
+            if ultima and not completa:
+                try:
+                    resumen = dict(self._sincronizacion_incremental(client, float(ultima) - SYNC_MARGIN), tipo="incremental")
+                except Exception as e:
+                    # Sin auditlog (permisos, versión) o con demasiados cambios se recorre todo; las
+                    # páginas ya guardadas son válidas y la completa las vuelve a escribir
+                    print(f"Sincronización incremental no disponible, se hace completa: {e}")
+                    with self._lock:
+                        self.conn.rollback()
+            if resumen is None:
+                resumen = {"tipo": "completa", "eliminados": self._sincronizacion_completa(client, inicio)}
+            with self._lock:
+                # Si aplicar() falló mientras tanto, la próxima sincronización sigue siendo completa
+                if not self._invalidada:
+                    self._guardar_estado("ultima_sincronizacion", str(inicio))
+                    self.conn.commit()
+                resumen["hosts"] = self.contar()
+            return resumen
+
+    def aplicar(self, hosts):
+        """
+        Actualiza la copia con los parámetros enviados en host.create/host.update (cada uno con su
+        hostid), en una sola transacción. Los campos no enviados conservan el valor de la copia; los
+        hosts que la copia no tiene y que no traen su nombre (host.update parcial) se omiten y los
+        trae la próxima sincronización. Nunca lanza: si la copia no se puede actualizar, por el motivo
+        que sea, se marca para que la próxima sincronización sea completa.
+        """
+        if not hosts:
+            return
+        with self._lock:
+            try:
+                actuales = {}
+                hostids = [int(host["hostid"]) for host in hosts]
+                for inicio in range(0, len(hostids), 500):
+                    lote = hostids[inicio:inicio + 500]
+                    consulta = f"SELECT hostid, host, name, inventory FROM hosts WHERE hostid IN ({', '.join('?' for _ in lote)})"
+                    for hostid, host, name, inventario in self.conn.execute(consulta, lote):
+                        actuales[hostid] = {"hostid": hostid, "host": host, "name": name, "inventory": json.loads(inventario or "{}")}
+
+                combinados = []
+                for host in hosts:
+                    actual = actuales.get(int(host["hostid"]))
+                    if actual is None:
+                        if "host" not in host:
+                            continue
+                        actual = {"hostid": host["hostid"], "host": host["host"], "name": host["host"], "inventory": {}}
+                    nombre_host = host.get("host", actual["host"])
+                    combinados.append({
+                        "hostid": host["hostid"],
+                        "host": nombre_host,
+                        "name": host.get("name", nombre_host if "host" in host else actual["name"]),
+                        "inventory": {**actual["inventory"], **host.get("inventory", {})},
+                    })
+                self._guardar(combinados)
+                self.conn.commit()
+            except Exception as e:
+                print(f"No se pudo actualizar la copia local de hosts, la próxima sincronización será completa: {e}")
+                self.invalidar()
+
+    # Fuerza una sincronización completa la próxima vez. Se llama con el lock tomado
+    def invalidar(self):
+        self._invalidada = True
+        try:
+            self.conn.rollback()
+            self.conn.execute("DELETE FROM estado WHERE clave = 'ultima_sincronizacion'")
+            self.conn.commit()
+        except Exception as e:
+            print(f"No se pudo invalidar la copia local de hosts: {e}")
+
+    def contar(self):
+        return self.conn.execute("SELECT COUNT(*) FROM hosts").fetchone()[0]
+
+    def iter_exportacion(self, tamano=HOSTS_PAGE_SIZE):
+        """
+        Recorre la copia en orden de hostid, en listas de filas (customer id, hostid, nombre, serial onu).
+        Usa una conexión propia de lectura para no bloquear las sincronizaciones mientras se exporta.
+        """
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            cursor = conn.execute("SELECT customer_id, hostid, nombre, serial_onu FROM hosts ORDER BY hostid")
+            while True:
+                filas = cursor.fetchmany(tamano)
+                if not filas:
+                    return
+                yield [(customer, str(hostid), nombre, serial) for customer, hostid, nombre, serial in filas]
+        finally:
+            conn.close()
+
+_inventario = None
+_inventario_lock = threading.Lock()
+
+# Función que devuelve la copia local de hosts compartida por todo el proceso
+def get_inventario():
+    global _inventario
+    with _inventario_lock:
+        if _inventario is None:
+            _inventario = InventoryMirror()
+        return _inventario
+
+# Función que aplica a la copia local lo enviado a Zabbix; un error de la copia nunca afecta a la carga
+def aplicar_en_inventario(hosts):
+    try:
+        get_inventario().aplicar(hosts)
+    except Exception as e:
+        print(f"No se pudo abrir la copia local de hosts: {e}")
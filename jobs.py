@@ -0,0 +1,115 @@
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Cantidad de cargas que se procesan en paralelo y segundos que se conservan los trabajos terminados
+JOBS_WORKERS = 4
+JOBS_RETENTION = 24 * 60 * 60
+
+# Trabajo en segundo plano que procesa una hoja cargada
+class Job:
+    """
+    Además de guardar el estado y el resultado, funciona como objeto de progreso para
+    process_excel/process_update_zabbix: reciben el job y llaman a iniciar() y registrar(),
+    y su Cronometro suma el tiempo de cada etapa con registrar_tiempo().
+    """
+
+    def __init__(self, tipo):
+        self.id = uuid.uuid4().hex
+        self.tipo = tipo
+        self.estado = "pendiente"
+        self.total = None
+        self.procesadas = 0
+        self.fallidas = 0
+        self.creado = time.time()
+        self.inicio = None
+        self.fin = None
+        self.resultado = None
+        self.error = None
+        self.tiempos = {}
+        self._lock = threading.Lock()
+
+    def iniciar(self, total):
+        self.total = total
+
+    def registrar(self, exito=True):
+        with self._lock:
+            self.procesadas += 1
+            if not exito:
+                self.fallidas += 1
+
+    def registrar_tiempo(self, etapa, segundos):
+        with self._lock:
+            self.tiempos[etapa] = self.tiempos.get(etapa, 0.0) + segundos
+
+    @property
+    def terminado(self):
+        return self.estado in ("terminado", "error")
+
+    def resumen(self):
+        fin = self.fin or time.time()
+        duracion = fin - self.inicio if self.inicio else 0.0
+        return {
+            "id": self.id,
+            "tipo": self.tipo,
+            "estado": self.estado,
+            "total": self.total,
+            "procesadas": self.procesadas,
+            "fallidas": self.fallidas,
+            "duracion": round(duracion, 2),
+            "filas_por_segundo": round(self.procesadas / duracion, 2) if duracion else 0.0,
+            "error": self.error,
+            "tiempos": {etapa: round(segundos, 3) for etapa, segundos in self.tiempos.items()},
+        }
+
+# Administrador de trabajos con un pool local de hilos
+class JobManager:
+
+    def __init__(self, max_workers=JOBS_WORKERS, retencion=JOBS_RETENTION):
+        self.retencion = retencion
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, tipo, funcion, *args, **kwargs):
+        """
+        Encola funcion(*args, progreso=job, **kwargs) y devuelve el Job de inmediato.
+        """
+        job = Job(tipo)
+        with self._lock:
+            self._limpiar()
+            self._jobs[job.id] = job
+        self._executor.submit(self._ejecutar, job, funcion, args, kwargs)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _ejecutar(self, job, funcion, args, kwargs):
+        job.estado = "en_proceso"
+        job.inicio = time.time()
+        try:
+            job.resultado = funcion(*args, progreso=job, **kwargs)
+            job.estado = "terminado"
+        except Exception as e:
+            job.error = str(e)
+            job.estado = "error"
+        finally:
+            job.fin = time.time()
+
+    # Elimina los trabajos terminados hace más de `retencion` segundos
+    def _limpiar(self):
+        limite = time.time() - self.retencion
+        for job_id in [j.id for j in self._jobs.values() if j.terminado and j.fin < limite]:
+            del self._jobs[job_id]
+
+    def contar_por_estado(self):
+        with self._lock:
+            conteo = {}
+            for job in self._jobs.values():
+                conteo[job.estado] = conteo.get(job.estado, 0) + 1
+            return conteo
+
+job_manager = JobManager()
@@ -0,0 +1,99 @@
+import json
+import time
+import hashlib
+import sqlite3
+
+# Base SQLite donde se registra el resultado de cada fila procesada
+JOURNAL_PATH = "journal.sqlite3"
+
+# Función que identifica una ejecución por el contenido del archivo cargado y sus opciones
+def clave_ejecucion(file_path, *opciones):
+    sha = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for bloque in iter(lambda: f.read(1024 * 1024), b""):
+            sha.update(bloque)
+    for opcion in opciones:
+        sha.update(b"\0" + str(opcion).encode("utf-8"))
+    return sha.hexdigest()
+
+# Registro local del resultado de cada fila de una carga, para poder reanudarla
+class Journal:
+    """
+    Cada fila se identifica por (ejecucion, fila), donde ejecucion es la clave de la carga y
+    fila su posición en la hoja. Se guarda el estado, el hostid, el mensaje mostrado al
+    usuario y los datos de la fila para el reporte.
+    """
+
+    def __init__(self, db_path=JOURNAL_PATH):
+        self.conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS filas (
+                ejecucion TEXT NOT NULL,
+                fila INTEGER NOT NULL,
+                estado TEXT NOT NULL,
+                hostid TEXT,
+                mensaje TEXT,
+                datos TEXT,
+                registrado REAL NOT NULL,
+                PRIMARY KEY (ejecucion, fila)
+            )
+        """)
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # Sin reanudar se descartan los resultados anteriores de la misma carga
+    def iniciar(self, ejecucion, reanudar=False):
+        if not reanudar:
+            self.conn.execute("DELETE FROM filas WHERE ejecucion = ?", (ejecucion,))
+            self.conn.commit()
+
+    def completadas(self, ejecucion, desde=0, hasta=None):
+        """
+        Devuelve {fila: (mensaje, datos)} de las filas que ya terminaron bien (creadas, actualizadas o sin cambios),
+        opcionalmente solo las de las filas desde <= fila < hasta, para no cargar toda la hoja en memoria.
+        """
+        consulta = "SELECT fila, mensaje, datos FROM filas WHERE ejecucion = ? AND estado IN ('success', 'updated', 'unchanged') AND fila >= ?"
+        parametros = [ejecucion, desde]
+        if hasta is not None:
+            consulta += " AND fila < ?"
+            parametros.append(hasta)
+        cursor = self.conn.execute(consulta, parametros)
+        return {fila: (mensaje, json.loads(datos) if datos else None) for fila, mensaje, datos in cursor}
+
+    def registrar(self, ejecucion, filas):
+        """
+        filas: lista de tuplas (fila, estado, hostid, mensaje, datos). Se confirma de inmediato.
+        """
+        ahora = time.time()
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO filas (ejecucion, fila, estado, hostid, mensaje, datos, registrado) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (ejecucion, fila, estado, hostid, mensaje, json.dumps(datos, ensure_ascii=False, default=str), ahora)
+                for fila, estado, hostid, mensaje, datos in filas
+            ]
+        )
+        self.conn.commit()
+
+    def iter_filas(self, ejecucion, estados=None):
+        """
+        Recorre las filas registradas en el orden de la hoja como tuplas
+        (fila, estado, hostid, mensaje, datos), opcionalmente solo las de ciertos estados.
+        """
+        consulta = "SELECT fila, estado, hostid, mensaje, datos FROM filas WHERE ejecucion = ?"
+        parametros = [ejecucion]
+        if estados:
+            consulta += f" AND estado IN ({', '.join('?' for _ in estados)})"
+            parametros.extend(estados)
+        for fila, estado, hostid, mensaje, datos in self.conn.execute(consulta + " ORDER BY fila", parametros):
+            yield fila, estado, hostid, mensaje, json.loads(datos) if datos else None
@@ -1,10 +1,18 @@
 import os
-import re
+import zlib
+import uuid
+import tempfile
 from datetime import datetime
-from flask import Flask, request, render_template, redirect, url_for, send_from_directory, flash
-import pandas as pd
-from zabbix_functions import login_zabbix, get_hosts, URL, USERNAME, PASSWORD
-from create_update import process_excel, process_update_zabbix, UPDATABLE_FIELDS
+from flask import Flask, Request, request, render_template, redirect, url_for, send_from_directory, flash, jsonify, Response, abort
+from werkzeug.security import safe_join
+from werkzeug.utils import secure_filename
+from zabbix_functions import get_client, CLAVES_HOST, CLAVE_HOSTID
+from inventory import get_inventario
+from journal import Journal
+from create_update import process_excel, process_update_zabbix, UPDATABLE_FIELDS, DUPLICADOS_ACTUALIZAR, DUPLICADOS_REPORTAR, ETIQUETAS_ESTADOS
+from jobs import job_manager
+from metrics import Cronometro, metricas, muestras_cliente, exportar
+from report_writer import ReportWriter, FORMATOS_REPORTE, REPORT_FORMAT
 
 # Configuración de Flask
 app = Flask(__name__)
@@ -15,7 +23,83 @@ os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(RESULTS_FOLDER, exist_ok=True)
 app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
 app.config["RESULTS_FOLDER"] = RESULTS_FOLDER
+# Tamaño máximo de una carga; las más grandes se rechazan con 413 antes de leerlas
+app.config["MAX_CONTENT_LENGTH"] = int(os.environ.get("MAX_UPLOAD_MB", 200)) * 1024 * 1024
 
+# Request que escribe los archivos subidos por bloques a un temporal en UPLOAD_FOLDER, sin tenerlos en memoria
+class SubidaEnDisco(Request):
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        temporal = tempfile.NamedTemporaryFile("wb+", dir=app.config["UPLOAD_FOLDER"], prefix=".subida-", delete=False)
+        self.temporales = getattr(self, "temporales", []) + [temporal.name]
+        return temporal
+
+    def close(self):
+        super().close()
+        # Los temporales que guardar_subida no movió (formulario inválido, error) se eliminan al terminar el pedido
+        for ruta in getattr(self, "temporales", []):
+            if os.path.exists(ruta):
+                os.remove(ruta)
+
+app.request_class = SubidaEnDisco
+
+# Función que guarda un archivo subido en un directorio propio del pedido y devuelve su ruta
+def guardar_subida(file):
+    """
+    Cada carga va a UPLOAD_FOLDER/<uuid>/<nombre seguro>: dos cargas con el mismo nombre no se
+    pisan. El temporal de SubidaEnDisco se mueve al destino en lugar de copiarse.
+    """
+    directorio = os.path.join(app.config["UPLOAD_FOLDER"], uuid.uuid4().hex)
+    os.makedirs(directorio)
+    nombre = secure_filename(file.filename) or secure_filename("archivo" + os.path.splitext(file.filename)[1])
+    file_path = os.path.join(directorio, nombre)
+    temporal = getattr(file.stream, "name", None)
+    if temporal in getattr(request, "temporales", []):
+        # En Windows un archivo abierto no se puede mover
+        file.stream.close()
+        os.replace(temporal, file_path)
+    else:
+        file.save(file_path)
+    return file_path
+
+
+# Archivos de texto que se comprimen con gzip al descargarlos (xlsx y parquet ya vienen comprimidos)
+EXTENSIONES_COMPRIMIBLES = (".csv",)
+GZIP_CHUNK_SIZE = 256 * 1024
+
+# Formatos que ofrecen los formularios de carga (parquet solo si pyarrow está instalado)
+@app.context_processor
+def formatos_disponibles():
+    return {"formatos_reporte": FORMATOS_REPORTE}
+
+# Función que devuelve el formato de reporte pedido en un formulario o query string
+def formato_solicitado(datos):
+    formato = datos.get("formato", REPORT_FORMAT)
+    return formato if formato in FORMATOS_REPORTE else REPORT_FORMAT
+
+# Función que envía un archivo de resultados; los CSV se comprimen al vuelo si el navegador acepta gzip
+def enviar_archivo(filename):
+    if not filename.lower().endswith(EXTENSIONES_COMPRIMIBLES) or "gzip" not in request.accept_encodings:
+        return send_from_directory(directory=app.config["RESULTS_FOLDER"], path=filename, as_attachment=True)
+
+    file_path = safe_join(app.config["RESULTS_FOLDER"], filename)
+    if file_path is None or not os.path.isfile(file_path):
+        abort(404)
+
+    def comprimir():
+        compresor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        with open(file_path, "rb") as f:
+            for bloque in iter(lambda: f.read(GZIP_CHUNK_SIZE), b""):
+                datos = compresor.compress(bloque)
+                if datos:
+                    yield datos
+        yield compresor.flush()
+
+    response = Response(comprimir(), mimetype="text/csv")
+    response.headers["Content-Encoding"] = "gzip"
+    response.headers["Vary"] = "Accept-Encoding"
+    response.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
 
 @app.route("/crear_hosts", methods=["GET", "POST"])
 def upload_file_create():
@@ -28,48 +112,42 @@ def upload_file_create():
             flash("No se seleccionó un archivo.")
             return redirect(request.url)
         if file:
-            file_path = os.path.join(app.config["UPLOAD_FOLDER"], file.filename)
-            file.save(file_path)
-            resultados, report_filename = process_excel(file_path)
-            success = [r for r in resultados if "Host creado exitosamente" in r]
-            return render_template("resultados_create.html", resultados=resultados, success=success, report_filename=report_filename)
+            file_path = guardar_subida(file)
+            reanudar = request.form.get("reanudar") == "1"
+            duplicados = DUPLICADOS_ACTUALIZAR if request.form.get("actualizar_duplicados") == "1" else DUPLICADOS_REPORTAR
+            job = job_manager.submit("crear", process_excel, file_path, reanudar=reanudar, duplicados=duplicados,
+                                     formato_reporte=formato_solicitado(request.form))
+            return redirect(url_for("ver_job", job_id=job.id))
 
     return render_template("upload_create.html")
 
 @app.route("/download-hosts")
 def descargar_hosts():
     try:
-        auth_token = login_zabbix(URL, USERNAME, PASSWORD)
-        hosts = get_hosts(URL, auth_token)
-
-        data = []
-        for host in hosts:
-            hostid = host["hostid"]
-            name = host["name"]
-
-            serial_onu_pattern = r"(TPLG\w{8}|FHTT\w{8}|ALCL\w{8})"
-            customer_id_pattern = r"(ID\d{6,9})"
-
-            serial_onu_match = re.search(serial_onu_pattern, name)
-            customer_id_match = re.search(customer_id_pattern, name)
-
-            serial_onu = serial_onu_match.group(0) if serial_onu_match else "N/A"
-            customer_id_full = customer_id_match.group(0) if customer_id_match else "N/A"
-
-            customer_id = customer_id_full[2:] if customer_id_full != "N/A" else "N/A"
-
-            nombre = name.split(serial_onu)[0].strip() if serial_onu != "N/A" else name
-
-            data.append([customer_id, hostid, nombre, serial_onu])
-
-        df = pd.DataFrame(data, columns=["customer id", "hostid", "nombre", "serial onu"])
-
+        # Se sincroniza la copia local (solo lo nuevo o modificado) y se exporta desde ella por páginas
+        formato = formato_solicitado(request.args)
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"hosts_zabbix_{timestamp}.xlsx"
+        filename = f"hosts_zabbix_{timestamp}_{uuid.uuid4().hex[:8]}.{formato}"
         file_path = os.path.join(app.config["RESULTS_FOLDER"], filename)
-        df.to_excel(file_path, index=False)
+        encabezados = ["customer id", "hostid", "nombre", "serial onu"]
+        cronometro = Cronometro("descarga")
 
-        return send_from_directory(directory=app.config["RESULTS_FOLDER"], path=filename, as_attachment=True)
+        with cronometro.etapa("sincronizacion"):
+            get_inventario().sincronizar(get_client())
+
+        try:
+            with ReportWriter(file_path, encabezados, formato) as reporte:
+                for filas in cronometro.iterar("lectura", get_inventario().iter_exportacion()):
+                    cronometro.contar("exportado", len(filas))
+                    with cronometro.etapa("escritura"):
+                        reporte.agregar(filas)
+        except Exception:
+            # No se deja en results/ un archivo a medio escribir
+            if os.path.exists(file_path):
+                os.remove(file_path)
+            raise
+
+        return enviar_archivo(filename)
 
     except Exception as e:
         return f"Error al generar el archivo: {str(e)}", 500
@@ -93,36 +171,125 @@ def upload_file_update():
                 flash("No se seleccionaron campos para actualizar.")
                 return redirect(request.url)
             
-            file_path = os.path.join(app.config["UPLOAD_FOLDER"], file.filename)
-            file.save(file_path)
+            file_path = guardar_subida(file)
             
-            try:
-                process_result = process_update_zabbix(file_path, selected_fields)
-                if "error" in process_result:
-                    flash(process_result["error"])
-                    return redirect(request.url)
-                
-                return render_template(
-                    "resultados_update.html",
-                    resultados=process_result["resultados"],
-                    report_filename=process_result["report_filename"]
-                )
-            except Exception as e:
-                flash(f"Error al procesar el archivo: {str(e)}")
-                return redirect(request.url)
+            solo_cambios = request.form.get("solo_cambios") == "1"
+            reanudar = request.form.get("reanudar") == "1"
+            grupos_masivos = request.form.get("grupos_masivos") == "1"
+            clave = request.form.get("clave", CLAVE_HOSTID)
+            if clave not in CLAVES_HOST:
+                clave = CLAVE_HOSTID
+            job = job_manager.submit("actualizar", process_update_zabbix, file_path, selected_fields,
+                                     solo_cambios=solo_cambios, reanudar=reanudar,
+                                     formato_reporte=formato_solicitado(request.form), clave=clave,
+                                     grupos_masivos=grupos_masivos)
+            return redirect(url_for("ver_job", job_id=job.id))
     
     return render_template("upload_update.html", fields=UPDATABLE_FIELDS)
 
+# Función que devuelve el nombre del reporte de un trabajo terminado, si se generó
+def reporte_job(job):
+    if job.estado != "terminado":
+        return None
+    if job.tipo == "crear":
+        return job.resultado[1]
+    return job.resultado.get("report_filename")
+
+# Función que devuelve el resumen de la carga de un trabajo terminado (conteo por estado y primeros errores)
+def resumen_carga(job):
+    if job.estado != "terminado":
+        return None
+    if job.tipo == "crear":
+        return job.resultado[0]
+    return job.resultado.get("resumen")
+
+@app.route("/jobs/<job_id>")
+def estado_job(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": "Trabajo no encontrado"}), 404
+
+    estado = job.resumen()
+    report_filename = reporte_job(job)
+    if report_filename:
+        estado["report_filename"] = report_filename
+        estado["report_url"] = url_for("descargar_archivo", filename=report_filename)
+    return jsonify(estado)
+
+@app.route("/jobs/<job_id>/ver")
+def ver_job(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return "Trabajo no encontrado", 404
+
+    # Mientras el trabajo está en proceso se muestra el avance, la página se recarga sola
+    if not job.terminado:
+        return render_template("progreso_job.html", job=job.resumen())
+
+    upload_url = url_for("upload_file_create") if job.tipo == "crear" else url_for("upload_file_update")
+    if job.estado == "error":
+        flash(f"Error al procesar el archivo: {job.error}")
+        return redirect(upload_url)
+
+    resumen = job.resumen()
+    if job.tipo == "crear":
+        return render_template("resultados_create.html", resumen=resumen_carga(job), etiquetas=ETIQUETAS_ESTADOS,
+                               report_filename=reporte_job(job), job=resumen)
+
+    process_result = job.resultado
+    if "error" in process_result:
+        flash(process_result["error"])
+        return redirect(upload_url)
+
+    return render_template(
+        "resultados_update.html",
+        resumen=process_result["resumen"],
+        etiquetas=ETIQUETAS_ESTADOS,
+        report_filename=process_result["report_filename"],
+        job=resumen
+    )
+
+# Detalle de todas las filas de un trabajo, leído del journal: la página de resultados solo muestra los primeros errores
+@app.route("/jobs/<job_id>/detalle")
+def detalle_job(job_id):
+    job = job_manager.get(job_id)
+    resumen = resumen_carga(job) if job else None
+    if not resumen or not resumen["ejecucion"]:
+        return "Trabajo no encontrado", 404
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    filename = f"detalle_{job.tipo}_{timestamp}_{uuid.uuid4().hex[:8]}.csv"
+    file_path = os.path.join(app.config["RESULTS_FOLDER"], filename)
+    try:
+        with Journal() as journal, ReportWriter(file_path, ["fila", "estado", "hostid", "mensaje"], "csv") as reporte:
+            reporte.agregar(
+                [fila + 1, estado, hostid, mensaje]
+                for fila, estado, hostid, mensaje, _ in journal.iter_filas(resumen["ejecucion"])
+            )
+    except Exception:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        raise
+    return enviar_archivo(filename)
+
+# Métricas del proceso en formato de texto de Prometheus: etapas, filas, llamadas a Zabbix y trabajos
+@app.route("/metrics")
+def metrics():
+    muestras = metricas.muestras() + muestras_cliente(get_client())
+    muestras += [("zabbix_jobs", "gauge", {"estado": estado}, cantidad)
+                 for estado, cantidad in job_manager.contar_por_estado().items()]
+    return Response(exportar(muestras), mimetype="text/plain; version=0.0.4")
+
 @app.route("/descargar/<filename>")
 def descargar_archivo(filename):
-    
-    return send_from_directory(
-        directory=app.config["RESULTS_FOLDER"],
-        path=filename,
-        as_attachment=True
-    )
+    return enviar_archivo(filename)
+
+@app.errorhandler(413)
+def archivo_demasiado_grande(e):
+    return f"El archivo supera el tamaño máximo permitido ({app.config['MAX_CONTENT_LENGTH'] // (1024 * 1024)} MB)", 413
 
 
+# Servidor de desarrollo; en producción se usa wsgi.py (ver gunicorn.conf.py)
 if __name__ == "__main__":
-    app.run(debug=False)
+    app.run(debug=False, threaded=True)
 
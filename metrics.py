@@ -0,0 +1,120 @@
+import time
+import threading
+from contextlib import contextmanager
+
+# Descripción de cada métrica para el # HELP del formato de Prometheus
+AYUDAS = {
+    "zabbix_stage_seconds_total": "Segundos acumulados por etapa de cada proceso",
+    "zabbix_stage_total": "Veces que se ejecutó cada etapa de cada proceso",
+    "zabbix_rows_total": "Filas procesadas por proceso y estado",
+    "zabbix_api_calls_total": "Llamadas a la API de Zabbix por método",
+    "zabbix_api_errors_total": "Llamadas a la API de Zabbix con error por método",
+    "zabbix_api_wait_seconds_total": "Segundos de espera por el techo de llamadas y el control de concurrencia",
+    "zabbix_api_latency_seconds": "Latencia de las llamadas a la API de Zabbix por método",
+    "zabbix_api_concurrency_limit": "Límite actual de llamadas simultáneas a Zabbix",
+    "zabbix_api_in_flight": "Llamadas a Zabbix en curso",
+    "zabbix_jobs": "Trabajos conocidos por estado",
+}
+
+# Registro en memoria de los contadores del proceso, que /metrics expone en formato de Prometheus
+class Metricas:
+
+    def __init__(self):
+        self._contadores = {}
+        self._lock = threading.Lock()
+
+    def sumar(self, nombre, valor=1, **etiquetas):
+        clave = (nombre, tuple(sorted(etiquetas.items())))
+        with self._lock:
+            self._contadores[clave] = self._contadores.get(clave, 0) + valor
+
+    def muestras(self):
+        """
+        Devuelve una lista de tuplas (nombre, tipo, etiquetas, valor) con todos los contadores.
+        """
+        with self._lock:
+            return [(nombre, "counter", dict(etiquetas), valor) for (nombre, etiquetas), valor in self._contadores.items()]
+
+metricas = Metricas()
+
+# Mide las etapas de una ejecución de process_excel, process_update_zabbix o descargar_hosts
+class Cronometro:
+    """
+    El tiempo de cada etapa se suma a las métricas globales y, si la ejecución corre como
+    trabajo, al job (registrar_tiempo) para mostrar el detalle en la página de resultados.
+    """
+
+    def __init__(self, proceso, progreso=None):
+        self.proceso = proceso
+        self.progreso = progreso
+
+    @contextmanager
+    def etapa(self, nombre):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._sumar(nombre, time.perf_counter() - inicio)
+
+    # Recorre un iterable (por ejemplo los bloques de la hoja) sumando a la etapa el tiempo de cada next();
+    # el último next() (el que termina el recorrido) suma su tiempo pero no cuenta como una ejecución
+    def iterar(self, nombre, iterable):
+        iterador = iter(iterable)
+        while True:
+            inicio = time.perf_counter()
+            try:
+                elemento = next(iterador)
+            except StopIteration:
+                self._sumar(nombre, time.perf_counter() - inicio, veces=0)
+                return
+            self._sumar(nombre, time.perf_counter() - inicio)
+            yield elemento
+
+    def contar(self, estado, cantidad=1):
+        metricas.sumar("zabbix_rows_total", cantidad, proceso=self.proceso, estado=estado)
+
+    def _sumar(self, nombre, segundos, veces=1):
+        metricas.sumar("zabbix_stage_seconds_total", segundos, proceso=self.proceso, etapa=nombre)
+        metricas.sumar("zabbix_stage_total", veces, proceso=self.proceso, etapa=nombre)
+        if self.progreso:
+            self.progreso.registrar_tiempo(nombre, segundos)
+
+# Función que convierte las estadísticas de ZabbixClient en muestras de Prometheus
+def muestras_cliente(client):
+    muestras = []
+    for method, s in client.stats().items():
+        etiquetas = {"method": method}
+        muestras += [
+            ("zabbix_api_calls_total", "counter", etiquetas, s["calls"]),
+            ("zabbix_api_errors_total", "counter", etiquetas, s["errors"]),
+            ("zabbix_api_wait_seconds_total", "counter", etiquetas, s["wait_time"]),
+            ("zabbix_api_latency_seconds", "summary", dict(etiquetas, quantile="0.5"), s["p50_ms"] / 1000),
+            ("zabbix_api_latency_seconds", "summary", dict(etiquetas, quantile="0.99"), s["p99_ms"] / 1000),
+            ("zabbix_api_latency_seconds_sum", "summary", etiquetas, s["total_time"]),
+            ("zabbix_api_latency_seconds_count", "summary", etiquetas, s["calls"]),
+        ]
+    carga = client.carga()
+    muestras += [
+        ("zabbix_api_concurrency_limit", "gauge", {}, carga["limite"]),
+        ("zabbix_api_in_flight", "gauge", {}, carga["en_vuelo"]),
+    ]
+    return muestras
+
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+# Función que arma el texto de /metrics (formato de exposición de Prometheus 0.0.4)
+def exportar(muestras):
+    lineas = []
+    familias = {}
+    for nombre, tipo, etiquetas, valor in muestras:
+        familia = nombre[:-len("_sum")] if tipo == "summary" and nombre.endswith("_sum") else nombre
+        familia = familia[:-len("_count")] if tipo == "summary" and familia.endswith("_count") else familia
+        familias.setdefault(familia, (tipo, []))[1].append((nombre, etiquetas, valor))
+    for familia, (tipo, filas) in sorted(familias.items()):
+        lineas.append(f"# HELP {familia} {AYUDAS.get(familia, familia)}")
+        lineas.append(f"# TYPE {familia} {tipo}")
+        for nombre, etiquetas, valor in filas:
+            texto_etiquetas = ",".join(f'{clave}="{_escapar(v)}"' for clave, v in sorted(etiquetas.items()))
+            lineas.append(f"{nombre}{{{texto_etiquetas}}} {float(valor)}" if etiquetas else f"{nombre} {float(valor)}")
+    return "\n".join(lineas) + "\n"
@@ -0,0 +1,88 @@
+import os
+import csv
+import importlib.util
+from openpyxl import Workbook
+
+# Formatos de reporte disponibles; parquet requiere pyarrow, que no es obligatorio: solo se ofrece si está instalado
+FORMATOS_REPORTE = ("xlsx", "csv") + (("parquet",) if importlib.util.find_spec("pyarrow") else ())
+REPORT_FORMAT = "xlsx"
+
+# Filas que se acumulan antes de escribir un grupo de filas en Parquet
+PARQUET_ROW_GROUP = 10000
+
+# Escritor de reportes que agrega filas a medida que avanza la carga
+class ReportWriter:
+    """
+    Las filas se escriben al archivo con agregar() en lugar de armar un DataFrame al final:
+    xlsx usa un libro de openpyxl en modo write-only, csv escribe cada fila al disco y parquet
+    escribe grupos de PARQUET_ROW_GROUP filas. Al cerrar, el reporte queda listo.
+    """
+
+    def __init__(self, file_path, encabezados, formato=None):
+        self.file_path = file_path
+        self.encabezados = list(encabezados)
+        self.formato = formato or os.path.splitext(file_path)[1].lstrip(".").lower()
+        self.filas = 0
+        if self.formato == "xlsx":
+            self._wb = Workbook(write_only=True)
+            self._ws = self._wb.create_sheet()
+            self._ws.append(self.encabezados)
+        elif self.formato == "csv":
+            self._archivo = open(file_path, "w", newline="", encoding="utf-8-sig")
+            self._writer = csv.writer(self._archivo)
+            self._writer.writerow(self.encabezados)
+        elif self.formato == "parquet":
+            try:
+                import pyarrow
+                import pyarrow.parquet
+            except ImportError:
+                raise ValueError("El formato parquet requiere el paquete pyarrow")
+            self._pa = pyarrow
+            self._schema = pyarrow.schema([(columna, pyarrow.string()) for columna in self.encabezados])
+            self._writer = pyarrow.parquet.ParquetWriter(file_path, self._schema)
+            self._pendientes = []
+        else:
+            raise ValueError(f"Formato de reporte no soportado: {self.formato}")
+
+    def agregar(self, filas):
+        """
+        filas: iterable de listas con un valor por encabezado.
+        """
+        if self.formato == "xlsx":
+            for fila in filas:
+                self._ws.append(fila)
+                self.filas += 1
+        elif self.formato == "csv":
+            for fila in filas:
+                self._writer.writerow(fila)
+                self.filas += 1
+        else:
+            for fila in filas:
+                self._pendientes.append(fila)
+                self.filas += 1
+                if len(self._pendientes) >= PARQUET_ROW_GROUP:
+                    self._escribir_parquet()
+
+    def _escribir_parquet(self):
+        columnas = [
+            self._pa.array([None if fila[i] is None else str(fila[i]) for fila in self._pendientes], self._pa.string())
+            for i in range(len(self.encabezados))
+        ]
+        self._writer.write_table(self._pa.table(columnas, schema=self._schema))
+        self._pendientes = []
+
+    def cerrar(self):
+        if self.formato == "xlsx":
+            self._wb.save(self.file_path)
+        elif self.formato == "csv":
+            self._archivo.close()
+        else:
+            if self._pendientes:
+                self._escribir_parquet()
+            self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
@@ -0,0 +1,122 @@
+import os
+import csv
+import codecs
+import pandas as pd
+from openpyxl import load_workbook
+
+# Cantidad de filas que se entregan en cada bloque
+READ_CHUNK_SIZE = 1000
+
+# Codificación de los CSV que no son UTF-8: la que usa Excel al guardar CSV en Windows en español
+CSV_FALLBACK_ENCODING = "cp1252"
+
+# Función que convierte el valor de una celda al texto que se envía a Zabbix
+def normalizar_valor(valor, relleno):
+    if valor is None or (isinstance(valor, float) and pd.isna(valor)):
+        return relleno
+    if isinstance(valor, str):
+        return valor if valor != "" else relleno
+    if isinstance(valor, float) and valor.is_integer():
+        # Los números enteros de Excel llegan como float: 4121234567.0 -> "4121234567"
+        return str(int(valor))
+    return str(valor)
+
+def _filas_xlsx(file_path):
+    wb = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        # Igual que pd.read_excel: se lee la primera hoja del libro
+        for fila in wb.worksheets[0].iter_rows(values_only=True):
+            yield fila
+    finally:
+        wb.close()
+
+# Función que decide la codificación de un CSV: UTF-8 si todo el archivo lo es, si no CSV_FALLBACK_ENCODING
+def codificacion_csv(file_path):
+    decodificador = codecs.getincrementaldecoder("utf-8-sig")()
+    with open(file_path, "rb") as f:
+        try:
+            # Se valida por bloques para no cargar el archivo en memoria
+            for bloque in iter(lambda: f.read(1024 * 1024), b""):
+                decodificador.decode(bloque)
+            decodificador.decode(b"", final=True)
+        except UnicodeDecodeError:
+            return CSV_FALLBACK_ENCODING
+    return "utf-8-sig"
+
+def _filas_csv(file_path):
+    with open(file_path, newline="", encoding=codificacion_csv(file_path)) as f:
+        muestra = f.read(4096)
+        f.seek(0)
+        try:
+            dialecto = csv.Sniffer().sniff(muestra, delimiters=",;\t")
+        except csv.Error:
+            dialecto = csv.excel
+        yield from csv.reader(f, dialecto)
+
+def _filas_xls(file_path):
+    # openpyxl no lee el formato .xls antiguo: se carga con pandas y se recorre igual
+    df = pd.read_excel(file_path, header=None, dtype=object)
+    yield from df.itertuples(index=False, name=None)
+
+# Función que recorre las filas de la hoja (xlsx, xls o csv) como tuplas, empezando por los encabezados
+def iter_filas(file_path):
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension == ".csv":
+        return _filas_csv(file_path)
+    if extension == ".xls":
+        return _filas_xls(file_path)
+    return _filas_xlsx(file_path)
+
+# Función que devuelve los nombres de columna de la hoja
+def leer_encabezados(file_path):
+    filas = iter_filas(file_path)
+    try:
+        encabezados = next(filas, ())
+    finally:
+        filas.close()
+    return [normalizar_valor(valor, "").strip() for valor in encabezados]
+
+# Función que estima la cantidad de filas de datos sin leer la hoja (None si no se puede saber)
+def contar_filas(file_path):
+    if os.path.splitext(file_path)[1].lower() != ".xlsx":
+        return None
+    wb = load_workbook(file_path, read_only=True)
+    try:
+        max_row = wb.worksheets[0].max_row
+    finally:
+        wb.close()
+    return max_row - 1 if max_row else None
+
+def iter_bloques(file_path, columnas=None, chunk_size=READ_CHUNK_SIZE, relleno=None):
+    """
+    Generador que lee la hoja fila por fila y entrega listas de hasta chunk_size registros
+    (diccionario columna -> texto). Las celdas vacías toman el valor `relleno` y las filas
+    completamente vacías se omiten. Si se indican columnas, solo se devuelven esas y falta
+    alguna en la hoja se lanza ValueError.
+    """
+    filas = iter_filas(file_path)
+    try:
+        encabezados = [normalizar_valor(valor, "").strip() for valor in next(filas, ())]
+        if columnas is None:
+            columnas = [c for c in encabezados if c]
+        faltantes = [c for c in columnas if c not in encabezados]
+        if faltantes:
+            raise ValueError(f"Faltan las siguientes columnas en la hoja: {', '.join(faltantes)}")
+        posiciones = [(columna, encabezados.index(columna)) for columna in columnas]
+
+        bloque = []
+        for fila in filas:
+            # Las celdas vacías llegan como None (xlsx), "" (csv) o NaN (xls)
+            if all(normalizar_valor(valor, None) is None for valor in fila):
+                continue
+            bloque.append({
+                columna: normalizar_valor(fila[posicion] if posicion < len(fila) else None, relleno)
+                for columna, posicion in posiciones
+            })
+            if len(bloque) >= chunk_size:
+                yield bloque
+                bloque = []
+        if bloque:
+            yield bloque
+    finally:
+        filas.close()
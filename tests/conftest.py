@@ -0,0 +1,73 @@
+import os
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.join(RAIZ, "benchmarks"))
+
+import pytest
+
+import inventory
+import create_update
+import zabbix_functions
+from mock_zabbix import MockZabbix, iniciar
+from generar_hojas import escribir_hoja
+
+# Hosts que el mock tiene al iniciar cada prueba
+HOSTS_EXISTENTES = 20
+
+
+# Mock de Zabbix en un puerto libre, con el cliente compartido apuntando a él.
+# Cada prueba corre en su propio directorio (journal, copia local de hosts y reportes);
+# mock.llamadas(metodo) devuelve los params de cada llamada atendida de ese método
+@pytest.fixture
+def zabbix(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("results")
+    monkeypatch.setattr(create_update, "RESULTS_FOLDER", str(tmp_path / "results"))
+    monkeypatch.setattr(inventory, "_inventario", None)
+    zabbix_functions.group_cache.invalidar()
+
+    mock = MockZabbix()
+    mock.sembrar(HOSTS_EXISTENTES)
+    registro = []
+    atender = mock.atender
+
+    def registrar(metodo, params, auth):
+        registro.append((metodo, params))
+        return atender(metodo, params, auth)
+
+    mock.atender = registrar
+    mock.llamadas = lambda metodo: [params for nombre, params in registro if nombre == metodo]
+    servidor = iniciar(mock, 0)
+    mock.url = f"http://127.0.0.1:{servidor.server_address[1]}/api_jsonrpc.php"
+    zabbix_functions.configurar_cliente(mock.url, "Admin", "zabbix", max_rps=0, retry_backoff=0)
+    yield mock
+
+    servidor.shutdown()
+    servidor.server_close()
+    if inventory._inventario is not None:
+        inventory._inventario.close()
+    zabbix_functions.group_cache.invalidar()
+
+
+# Escribe una hoja de carga en el directorio de la prueba y devuelve su ruta
+@pytest.fixture
+def hoja(tmp_path):
+    def escribir(nombre, columnas, filas):
+        file_path = str(tmp_path / nombre)
+        escribir_hoja(file_path, columnas, filas)
+        return file_path
+    return escribir
+
+
+# Aplicación Flask con uploads y results en el directorio de la prueba. Las plantillas
+# están en la raíz del repositorio
+@pytest.fixture
+def app(zabbix, tmp_path, monkeypatch):
+    import main_zabbix
+    monkeypatch.setitem(main_zabbix.app.config, "UPLOAD_FOLDER", str(tmp_path / "uploads"))
+    monkeypatch.setitem(main_zabbix.app.config, "RESULTS_FOLDER", str(tmp_path / "results"))
+    monkeypatch.setattr(main_zabbix.app, "template_folder", RAIZ)
+    os.makedirs(tmp_path / "uploads", exist_ok=True)
+    return main_zabbix.app
@@ -0,0 +1,66 @@
+import csv
+
+import requests
+
+from create_update import process_update_zabbix, update_host_con_reintentos
+from generar_hojas import filas_actualizar, COLUMNAS_ACTUALIZAR
+
+
+def leer_reporte(file_path):
+    with open(file_path, newline="", encoding="utf-8-sig") as f:
+        return list(csv.DictReader(f))
+
+
+def test_actualiza_en_paralelo_y_reporta_en_el_orden_de_la_hoja(zabbix, hoja):
+    filas = list(filas_actualizar(20))
+    file_path = hoja("actualizar.csv", COLUMNAS_ACTUALIZAR, filas)
+
+    resultado = process_update_zabbix(file_path, ["NAP"], max_workers=4, read_chunk_size=7, formato_reporte="csv")
+
+    assert resultado["resumen"]["conteo"] == {"success": 20}
+    assert [fila["hostid"] for fila in leer_reporte(resultado["report_path"])] == [fila["hostid"] for fila in filas]
+    assert len(zabbix.llamadas("host.update")) == 20
+    for fila in filas:
+        assert zabbix.hosts[fila["hostid"]]["inventory"]["notes"] == f"NAP: {fila['NAP']}"
+
+
+def test_fila_sin_hostid_queda_con_error(zabbix, hoja):
+    filas = list(filas_actualizar(3))
+    filas[1]["hostid"] = ""
+    file_path = hoja("actualizar.csv", COLUMNAS_ACTUALIZAR, filas)
+
+    resultado = process_update_zabbix(file_path, ["NAP"], formato_reporte="csv")
+
+    assert resultado["resumen"]["conteo"] == {"success": 2, "error": 1}
+    assert resultado["resumen"]["mensajes"] == ["Host ID no encontrado para fila 2"]
+
+
+class ClienteInestable:
+    def __init__(self, fallas):
+        self.fallas = fallas
+        self.llamadas = 0
+
+    def call(self, method, params, contexto=""):
+        self.llamadas += 1
+        if self.llamadas <= self.fallas:
+            raise requests.exceptions.ConnectionError("conexión reiniciada")
+        return {"hostids": [params["hostid"]]}
+
+
+def test_reintenta_ante_errores_de_red():
+    cliente = ClienteInestable(fallas=2)
+    resultado = update_host_con_reintentos(cliente, "10001", ["NAP"], {"NAP": "NAP-1"}, None, backoff=0)
+
+    assert resultado["status"] == "success"
+    assert cliente.llamadas == 3
+
+
+def test_agota_los_reintentos():
+    cliente = ClienteInestable(fallas=10)
+    try:
+        update_host_con_reintentos(cliente, "10001", ["NAP"], {"NAP": "NAP-1"}, None, reintentos=2, backoff=0)
+    except requests.exceptions.ConnectionError:
+        pass
+    else:
+        raise AssertionError("se esperaba ConnectionError")
+    assert cliente.llamadas == 3
@@ -0,0 +1,52 @@
+import pytest
+
+from create_update import process_update_zabbix
+from generar_hojas import filas_actualizar, COLUMNAS_ACTUALIZAR
+from zabbix_functions import buscar_hostids, get_client, CLAVE_CUSTOMER, CLAVE_SERIAL
+
+
+def test_busca_por_customer_con_coincidencia_exacta(zabbix):
+    # "ID100001" aparece dentro de ID1000010..ID1000019, pero ningún host tiene ese customer id
+    encontrados = buscar_hostids(get_client(), CLAVE_CUSTOMER, ["1000001", " 1000002 ", "100001", "9999999"])
+
+    assert encontrados == {"1000001": ["10002"], " 1000002 ": ["10003"], "100001": [], "9999999": []}
+
+
+def test_busca_por_serial_sin_distinguir_mayusculas(zabbix):
+    serial = zabbix.hosts["10007"]["inventory"]["serialno_a"]
+
+    assert buscar_hostids(get_client(), CLAVE_SERIAL, [serial.lower(), "N/A"]) == {serial.lower(): ["10007"], "N/A": []}
+
+
+def test_agrupa_los_valores_en_pocas_llamadas(zabbix):
+    customers = [str(1000000 + i) for i in range(20)]
+
+    encontrados = buscar_hostids(get_client(), CLAVE_CUSTOMER, customers, chunk_size=8)
+
+    assert all(len(hostids) == 1 for hostids in encontrados.values())
+    assert len(zabbix.llamadas("host.get")) == 3
+
+
+def test_clave_no_soportada():
+    with pytest.raises(ValueError):
+        buscar_hostids(None, "hostid", ["1"])
+
+
+@pytest.mark.parametrize("clave", [CLAVE_CUSTOMER, CLAVE_SERIAL])
+def test_actualiza_identificando_los_hosts_por_clave(zabbix, hoja, clave):
+    filas = list(filas_actualizar(6))
+    for fila in filas:
+        fila["hostid"] = ""
+    filas[2][clave] = "TPLGFFFFFFFF" if clave == CLAVE_SERIAL else "8888888"
+    # Dos hosts con el mismo valor de clave
+    zabbix.hosts["10005"]["inventory"]["serialno_a"] = zabbix.hosts["10004"]["inventory"]["serialno_a"]
+    zabbix.hosts["10005"]["name"] = zabbix.hosts["10005"]["name"].replace(f"ID{filas[4]['Customer']}", f"ID{filas[3]['Customer']}")
+    file_path = hoja("actualizar.csv", COLUMNAS_ACTUALIZAR, filas)
+
+    resultado = process_update_zabbix(file_path, ["NAP"], clave=clave, formato_reporte="csv")
+
+    assert resultado["resumen"]["conteo"] == {"success": 3, "error": 3}
+    assert sorted(params["hostid"] for params in zabbix.llamadas("host.update")) == ["10001", "10002", "10006"]
+    mensajes = resultado["resumen"]["mensajes"]
+    assert mensajes[0].startswith(f"Error en fila 3: No se encontró ningún host con {clave}")
+    assert "corresponde a varios hosts: 10004, 10005" in mensajes[1]
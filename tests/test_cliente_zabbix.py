@@ -0,0 +1,48 @@
+import pytest
+import requests
+
+from zabbix_functions import ZabbixClient, ZabbixAPIError, get_client
+
+
+def test_inicia_sesion_una_sola_vez(zabbix):
+    cliente = get_client()
+    assert cliente.login() == "mock-token"
+    for _ in range(5):
+        cliente.call("hostgroup.get", {"output": "extend"})
+
+    assert len(zabbix.llamadas("user.login")) == 1
+    assert cliente.stats()["hostgroup.get"]["calls"] == 5
+
+
+def test_vuelve_a_iniciar_sesion_si_el_token_vence(zabbix):
+    cliente = get_client()
+    cliente.login()
+    cliente._token = "token-vencido"
+
+    assert cliente.call("hostgroup.get", {"output": "extend"})
+    assert len(zabbix.llamadas("user.login")) == 2
+    assert cliente.login() == "mock-token"
+
+
+def test_error_de_la_api_conserva_el_objeto_error(zabbix):
+    with pytest.raises(ZabbixAPIError) as error:
+        get_client().call("metodo.inexistente", {}, "Error de prueba")
+
+    assert str(error.value).startswith("Error de prueba")
+    assert error.value.error["message"] == "Method not found."
+
+
+def test_reintenta_solo_las_lecturas(zabbix):
+    cliente = ZabbixClient(zabbix.url, "Admin", "zabbix", max_rps=0, read_retries=2, retry_backoff=0)
+    cliente.login()
+    zabbix.errores = 1.0
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        cliente.call("host.get", {"output": ["hostid"]})
+    with pytest.raises(requests.exceptions.HTTPError):
+        cliente.call("host.create", {"host": "nuevo"})
+
+    stats = cliente.stats()
+    assert stats["host.get"]["calls"] == 3
+    assert stats["host.create"]["calls"] == 1
+    assert stats["host.get"]["errors"] == 3
@@ -0,0 +1,61 @@
+import requests
+
+from create_update import crear_lote, process_excel, CREATE_BATCH_SIZE
+from generar_hojas import filas_crear, COLUMNAS_CREAR
+from zabbix_functions import get_client
+
+
+def params_host(nombre):
+    return {"host": nombre, "groups": [{"groupid": "35"}], "interfaces": [{"ip": "10.0.0.1"}], "inventory": {}}
+
+
+def test_crear_lote_envia_un_solo_host_create(zabbix):
+    lote = [(i, params_host(f"nuevo-{i}")) for i in range(8)]
+    resultado = crear_lote(get_client(), lote)
+
+    assert [indice for indice, _, _ in resultado] == list(range(8))
+    assert all(hostid and error is None for _, hostid, error in resultado)
+    assert len(zabbix.llamadas("host.create")) == 1
+
+
+def test_crear_lote_aisla_la_fila_con_error(zabbix):
+    existente = next(iter(zabbix.hosts.values()))["host"]
+    lote = [(i, params_host(f"nuevo-{i}")) for i in range(8)]
+    lote[5] = (5, params_host(existente))
+
+    resultado = crear_lote(get_client(), lote)
+
+    errores = [indice for indice, _, error in resultado if error is not None]
+    assert errores == [5]
+    assert "already exists" in str(resultado[5][2])
+    creados = {hostid for _, hostid, _ in resultado if hostid}
+    assert len(creados) == 7
+    assert creados <= set(zabbix.hosts)
+    # 8 (falla) -> 0-3 (ok) + 4-7 (falla) -> 4-5 (falla) + 6-7 (ok) -> 4 (ok) + 5 (falla)
+    assert [len(lote) for lote in zabbix.llamadas("host.create")] == [8, 4, 4, 2, 1, 1, 2]
+
+
+def test_crear_lote_no_divide_ante_error_de_red():
+    enviados = []
+
+    def enviar(client, hosts):
+        enviados.append(hosts)
+        raise requests.exceptions.ConnectionError("sin conexión")
+
+    resultado = crear_lote(None, [(i, params_host(f"h{i}")) for i in range(4)], enviar)
+
+    assert len(enviados) == 1
+    assert [(indice, hostid) for indice, hostid, _ in resultado] == [(i, None) for i in range(4)]
+    assert all(isinstance(error, requests.exceptions.ConnectionError) for _, _, error in resultado)
+
+
+def test_process_excel_crea_por_lotes(zabbix, hoja):
+    file_path = hoja("crear.csv", COLUMNAS_CREAR, filas_crear(CREATE_BATCH_SIZE + 10))
+    antes = len(zabbix.hosts)
+
+    resumen, report_filename = process_excel(file_path)
+
+    assert resumen["conteo"] == {"success": CREATE_BATCH_SIZE + 10}
+    assert report_filename
+    assert len(zabbix.hosts) == antes + CREATE_BATCH_SIZE + 10
+    assert [len(lote) for lote in zabbix.llamadas("host.create")] == [CREATE_BATCH_SIZE, 10]
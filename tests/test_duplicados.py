@@ -0,0 +1,82 @@
+import pytest
+
+from create_update import process_excel, DUPLICADOS_ACTUALIZAR, DUPLICADOS_REPORTAR
+from generar_hojas import filas_crear, hosts_existentes, COLUMNAS_CREAR
+from zabbix_functions import HostIndex, get_client
+
+
+@pytest.fixture
+def existentes():
+    return [datos for _, datos in hosts_existentes(3)]
+
+
+def procesar(hoja, filas, duplicados=DUPLICADOS_REPORTAR):
+    resumen, _ = process_excel(hoja("crear.csv", COLUMNAS_CREAR, filas), duplicados=duplicados)
+    return resumen
+
+
+@pytest.mark.parametrize("columna, etiqueta", [
+    ("Dirección IP", "IP"),
+    ("ONT/ONU", "serial ONU"),
+])
+def test_detecta_duplicados_con_zabbix_por_clave(zabbix, hoja, existentes, columna, etiqueta):
+    filas = list(filas_crear(3))
+    filas[1][columna] = existentes[0][columna]
+
+    resumen = procesar(hoja, filas)
+
+    assert resumen["conteo"] == {"success": 2, "duplicate": 1}
+    assert f"{etiqueta} {existentes[0][columna]} ya existe en Zabbix (hostid 10001)" in resumen["mensajes"][0]
+    assert len(zabbix.llamadas("host.create")) == 1
+
+
+def test_detecta_duplicados_por_nombre(zabbix, hoja, existentes):
+    # El serial forma parte del nombre: coinciden ambos, pero no la IP
+    resumen = procesar(hoja, [dict(existentes[0], **{"Dirección IP": "10.9.9.9"})])
+
+    assert resumen["conteo"] == {"duplicate": 1}
+    assert resumen["mensajes"][0].endswith(
+        f"nombre {existentes[0]['hostname']} ya existe en Zabbix (hostid 10001); "
+        f"serial ONU {existentes[0]['ONT/ONU']} ya existe en Zabbix (hostid 10001)"
+    )
+    assert zabbix.llamadas("host.create") == []
+
+
+def test_detecta_duplicados_dentro_de_la_hoja(zabbix, hoja):
+    filas = list(filas_crear(4))
+    filas[3]["ONT/ONU"] = filas[0]["ONT/ONU"].lower()
+
+    resumen = procesar(hoja, filas)
+
+    assert resumen["conteo"] == {"success": 3, "duplicate": 1}
+    assert f"serial ONU {filas[0]['ONT/ONU']} repetido en la fila 1" in resumen["mensajes"][0]
+
+
+def test_valores_sin_identidad_no_son_duplicados(zabbix, hoja):
+    filas = list(filas_crear(3))
+    for fila in filas:
+        fila["ONT/ONU"] = "N/A"
+
+    assert procesar(hoja, filas)["conteo"] == {"success": 3}
+
+
+def test_actualizar_duplicados_solo_por_nombre(zabbix, hoja, existentes):
+    mismo_nombre = dict(existentes[0], NAP="NAP-nuevo")
+    misma_ip = dict(next(iter(filas_crear(1))), **{"Dirección IP": existentes[1]["Dirección IP"]})
+
+    resumen = procesar(hoja, [mismo_nombre, misma_ip], DUPLICADOS_ACTUALIZAR)
+
+    assert resumen["conteo"] == {"updated": 1, "duplicate": 1}
+    [actualizado] = [host for lote in zabbix.llamadas("host.update") for host in lote]
+    assert actualizado["hostid"] == "10001"
+    assert "interfaces" not in actualizado and "templates" not in actualizado
+    assert zabbix.hosts["10001"]["description"] == "NAP: NAP-nuevo"
+    # La IP repetida puede ser de otro host: no se actualiza el host 10002 con el nombre de la hoja
+    assert zabbix.hosts["10002"]["host"] == existentes[1]["hostname"]
+
+
+def test_host_index_desde_zabbix(zabbix, existentes):
+    indice = HostIndex.from_client(get_client(), page_size=7)
+
+    coincidencias = indice.buscar(existentes[2]["hostname"], ["0.0.0.0"], existentes[2]["ONT/ONU"].lower())
+    assert coincidencias == [("nombre", existentes[2]["hostname"], "10003"), ("serial", existentes[2]["ONT/ONU"], "10003")]
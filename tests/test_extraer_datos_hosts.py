@@ -0,0 +1,30 @@
+import pandas as pd
+
+from zabbix_functions import extraer_datos_hosts
+from bench_extraccion_hosts import extraer_con_bucle, generar_nombres
+
+
+def test_separa_nombre_customer_y_serial():
+    datos = extraer_datos_hosts([
+        "Jose Perez TPLG1A2B3C4D ID1234567 CCS",
+        "Maria Gonzalez PDFN ID7654321 VLC",
+        "host sin datos",
+    ])
+
+    assert datos.to_dict(orient="records") == [
+        {"customer id": "1234567", "nombre": "Jose Perez", "serial onu": "TPLG1A2B3C4D"},
+        {"customer id": "7654321", "nombre": "Maria Gonzalez PDFN ID7654321 VLC", "serial onu": "N/A"},
+        {"customer id": "N/A", "nombre": "host sin datos", "serial onu": "N/A"},
+    ]
+
+
+def test_conserva_el_indice_de_la_serie():
+    nombres = pd.Series(["Ana FHTT00000001 ID1000001 MCY"], index=[42])
+
+    assert list(extraer_datos_hosts(nombres).index) == [42]
+
+
+def test_coincide_con_la_extraccion_fila_por_fila():
+    nombres = generar_nombres(2000)
+
+    assert extraer_datos_hosts(nombres).values.tolist() == extraer_con_bucle(nombres)
@@ -0,0 +1,45 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from create_update import resolver_grupos
+from zabbix_functions import GroupCache, get_client, group_cache
+
+
+def test_reutiliza_los_grupos_hasta_que_vence(zabbix):
+    cache = GroupCache(ttl=60)
+
+    assert cache.get(get_client()) is cache.get(get_client())
+    assert len(zabbix.llamadas("hostgroup.get")) == 1
+
+    cache.invalidar()
+    cache.get(get_client())
+    assert len(zabbix.llamadas("hostgroup.get")) == 2
+
+
+def test_sin_ttl_consulta_siempre(zabbix):
+    cache = GroupCache(ttl=0)
+    cache.get(get_client())
+    cache.get(get_client())
+
+    assert len(zabbix.llamadas("hostgroup.get")) == 2
+
+
+def test_pedidos_simultaneos_comparten_una_consulta(zabbix):
+    cache = GroupCache(ttl=60)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        resolvers = list(executor.map(lambda _: cache.get(get_client()), range(16)))
+
+    assert len({id(resolver) for resolver in resolvers}) == 1
+    assert len(zabbix.llamadas("hostgroup.get")) == 1
+
+
+def test_un_grupo_nuevo_en_zabbix_renueva_la_cache(zabbix):
+    combinaciones = [("Maracay", "OLT-nueva", "N/A")]
+    _, errores = resolver_grupos(get_client(), combinaciones)
+    assert errores
+
+    zabbix.grupos.append({"groupid": "5000", "name": "OLT-nueva"})
+    resolver, errores = resolver_grupos(get_client(), combinaciones)
+
+    assert errores == []
+    assert "5000" in resolver.resolver(*combinaciones[0])
+    assert group_cache.get(get_client()) is resolver
@@ -0,0 +1,71 @@
+import itertools
+
+import pytest
+
+from create_update import process_update_zabbix
+from generar_hojas import filas_actualizar, OLTS, FEEDERS, COLUMNAS_ACTUALIZAR
+from mock_zabbix import MockZabbix
+from zabbix_functions import GroupResolver, GRUPOS_LOCALIDAD, GRUPO_INICIAL_ID, GRUPO_RED_NO_PROPIA_ID, GRUPO_FINAL_ID, get_client, obtener_ids
+
+
+@pytest.fixture
+def grupos():
+    return MockZabbix().grupos
+
+
+def test_resuelve_igual_que_obtener_ids(grupos):
+    resolver = GroupResolver(grupos)
+    group_ids = {grupo["name"]: grupo["groupid"] for grupo in grupos}
+
+    for combinacion in itertools.product(GRUPOS_LOCALIDAD, OLTS[:3] + ["N/A"], FEEDERS[:3] + ["No aplica"]):
+        assert resolver.resolver(*combinacion) == obtener_ids(*combinacion, group_ids)
+
+
+def test_red_propia_no_lleva_el_grupo_de_red_no_propia(grupos):
+    resolver = GroupResolver(grupos)
+
+    propia = resolver.resolver("Caracas (Red propia)", "N/A", "N/A")
+    alquilada = resolver.resolver("Caracas (Red alquilada)", "N/A", "N/A")
+
+    assert propia[0] == GRUPO_INICIAL_ID and propia[-1] == GRUPO_FINAL_ID
+    assert GRUPO_RED_NO_PROPIA_ID not in propia
+    assert GRUPO_RED_NO_PROPIA_ID in alquilada
+
+
+def test_informa_todos_los_grupos_faltantes(grupos):
+    resolver = GroupResolver(grupos)
+
+    with pytest.raises(ValueError) as error:
+        resolver.resolver("Mérida", "OLT-99", "Feeder 99")
+    assert "Mérida" in str(error.value) and "OLT-99" in str(error.value) and "Feeder 99" in str(error.value)
+
+
+def test_validar_agrupa_las_filas_por_error(grupos):
+    errores = GroupResolver(grupos).validar([
+        ("Maracay", "OLT-1", "N/A"),
+        ("Maracay", "OLT-99", "N/A"),
+        ("Valencia", "OLT-99", "Feeder 1"),
+    ])
+
+    assert errores == ["OLT: 'OLT-99' no definida en Zabbix (filas: 2, 3)"]
+
+
+def test_from_client_consulta_hostgroup_get_una_vez(zabbix):
+    resolver = GroupResolver.from_client(get_client())
+
+    assert resolver.resolver("Maracay", "OLT-1", "Feeder 1")
+    assert len(zabbix.llamadas("hostgroup.get")) == 1
+
+
+def test_actualizar_grupos_con_celdas_vacias(zabbix, hoja):
+    filas = list(filas_actualizar(2))
+    filas[0].update(Localidad="Maracay", OLT="OLT-1", Feeder="")
+    filas[1].update(Localidad="Valencia", OLT="", Feeder="", **{"Ubicación de la caja NAP (Coordenadas)": ""})
+    file_path = hoja("actualizar.csv", COLUMNAS_ACTUALIZAR, filas)
+
+    resultado = process_update_zabbix(file_path, ["modify_groups", "Latitud"])
+
+    assert resultado["resumen"]["conteo"] == {"success": 2}
+    resolver = GroupResolver(zabbix.grupos)
+    assert [grupo["groupid"] for grupo in zabbix.hosts[filas[0]["hostid"]]["groups"]] == resolver.resolver("Maracay", "OLT-1", "N/A")
+    assert [grupo["groupid"] for grupo in zabbix.hosts[filas[1]["hostid"]]["groups"]] == resolver.resolver("Valencia", "N/A", "N/A")
@@ -0,0 +1,58 @@
+from create_update import actualizar_grupos_masivo, process_update_zabbix
+from generar_hojas import filas_actualizar, COLUMNAS_ACTUALIZAR
+from zabbix_functions import get_client
+
+
+def test_un_massupdate_por_conjunto_de_grupos(zabbix):
+    hosts_grupos = [
+        (0, "10001", ["35", "1000"]),
+        (1, "10002", ["1000", "35"]),
+        (2, "10003", ["35", "1000"]),
+        (3, "10004", ["35", "1001"]),
+        (4, "10005", ["35", "1002"]),
+        (5, "10006", ["35", "1002"]),
+    ]
+
+    errores = actualizar_grupos_masivo(get_client(), hosts_grupos, batch_size=2)
+
+    # El conjunto de un solo host (fila 3) queda para host.update
+    assert errores == {0: None, 1: None, 2: None, 4: None, 5: None}
+    llamadas = zabbix.llamadas("host.massupdate")
+    assert sorted(len(params["hosts"]) for params in llamadas) == [1, 2, 2]
+    assert {grupo["groupid"] for grupo in zabbix.hosts["10003"]["groups"]} == {"35", "1000"}
+
+
+def test_un_host_inexistente_no_afecta_al_resto_del_lote(zabbix):
+    hosts_grupos = [(i, hostid, ["35"]) for i, hostid in enumerate(["10001", "10002", "999999", "10003"])]
+
+    errores = actualizar_grupos_masivo(get_client(), hosts_grupos)
+
+    assert [indice for indice, error in errores.items() if error is not None] == [2]
+    assert all(zabbix.hosts[hostid]["groups"] == [{"groupid": "35"}] for hostid in ("10001", "10002", "10003"))
+
+
+def test_carga_con_grupos_masivos(zabbix, hoja):
+    filas = list(filas_actualizar(12))
+    for fila in filas[:10]:
+        fila.update(Localidad="Valencia", OLT="OLT-1", Feeder="N/A")
+    filas[10].update(Localidad="Maracay", OLT="OLT-2", Feeder="N/A")
+    filas[11].update(Localidad="Barcelona", OLT="OLT-3", Feeder="N/A")
+    file_path = hoja("actualizar.csv", COLUMNAS_ACTUALIZAR, filas)
+
+    resultado = process_update_zabbix(file_path, ["modify_groups"], grupos_masivos=True)
+
+    assert resultado["resumen"]["conteo"] == {"success": 12}
+    assert [len(params["hosts"]) for params in zabbix.llamadas("host.massupdate")] == [10]
+    # Las filas 11 y 12 son las únicas con sus grupos y van por host.update
+    assert sorted(params["hostid"] for params in zabbix.llamadas("host.update")) == [filas[10]["hostid"], filas[11]["hostid"]]
+
+
+def test_modo_diferencial_omite_los_hosts_que_ya_tienen_los_grupos(zabbix, hoja):
+    file_path = hoja("actualizar.csv", COLUMNAS_ACTUALIZAR, filas_actualizar(8))
+    process_update_zabbix(file_path, ["modify_groups", "NAP"], solo_cambios=True, grupos_masivos=True)
+    antes = (len(zabbix.llamadas("host.massupdate")), len(zabbix.llamadas("host.update")))
+
+    resultado = process_update_zabbix(file_path, ["modify_groups", "NAP"], solo_cambios=True, grupos_masivos=True)
+
+    assert resultado["resumen"]["conteo"] == {"unchanged": 8}
+    assert (len(zabbix.llamadas("host.massupdate")), len(zabbix.llamadas("host.update"))) == antes
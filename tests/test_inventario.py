@@ -0,0 +1,125 @@
+import threading
+
+import pytest
+
+import inventory
+from create_update import process_excel, process_update_zabbix
+from generar_hojas import filas_crear, filas_actualizar, COLUMNAS_CREAR, COLUMNAS_ACTUALIZAR
+from inventory import InventoryMirror, get_inventario
+from zabbix_functions import get_client
+
+
+@pytest.fixture
+def copia(zabbix):
+    copia = InventoryMirror("copia.sqlite3")
+    yield copia
+    copia.close()
+
+
+def hosts_copia(copia):
+    return {str(hostid): (host, name) for hostid, host, name in copia.conn.execute("SELECT hostid, host, name FROM hosts")}
+
+
+def test_primera_sincronizacion_completa_y_luego_incremental(zabbix, copia):
+    cliente = get_client()
+    assert copia.sincronizar(cliente) == {"tipo": "completa", "eliminados": 0, "hosts": 20}
+
+    nuevo = cliente.call("host.create", {"host": "nuevo"})["hostids"][0]
+    cliente.call("host.update", {"hostid": "10003", "name": "renombrado"})
+    eliminado = zabbix.hosts.pop("10004")
+    zabbix.auditar([eliminado["hostid"]], 1)
+
+    resumen = copia.sincronizar(cliente)
+
+    assert resumen == {"tipo": "incremental", "nuevos": 1, "modificados": 3, "eliminados": 1, "hosts": 20}
+    assert hosts_copia(copia)[nuevo] == ("nuevo", "nuevo")
+    assert hosts_copia(copia)["10003"][1] == "renombrado"
+    assert "10004" not in hosts_copia(copia)
+
+
+def test_sin_auditlog_util_se_recorre_todo(zabbix, copia, monkeypatch):
+    cliente = get_client()
+    copia.sincronizar(cliente)
+    del zabbix.hosts["10002"]
+    cliente.call("host.update", {"hostid": "10001", "name": "otro"})
+    monkeypatch.setattr(inventory, "AUDITLOG_LIMIT", 1)
+
+    resumen = copia.sincronizar(cliente)
+
+    assert resumen == {"tipo": "completa", "eliminados": 1, "hosts": 19}
+
+
+def test_exportacion_en_orden_de_hostid(zabbix, copia):
+    copia.sincronizar(get_client())
+
+    paginas = list(copia.iter_exportacion(tamano=8))
+
+    assert [len(pagina) for pagina in paginas] == [8, 8, 4]
+    customer, hostid, nombre, serial = paginas[0][0]
+    host = zabbix.hosts["10001"]
+    assert hostid == "10001"
+    assert host["name"].startswith(f"{nombre} {serial} ID{customer} ")
+
+
+def test_las_cargas_actualizan_la_copia_sin_volver_a_sincronizar(zabbix, hoja):
+    cliente = get_client()
+    get_inventario().sincronizar(cliente)
+    consultas = len(zabbix.llamadas("host.get"))
+
+    process_excel(hoja("crear.csv", COLUMNAS_CREAR, filas_crear(5)))
+    process_update_zabbix(hoja("actualizar.csv", COLUMNAS_ACTUALIZAR, filas_actualizar(3)), ["Hostname", "NAP"])
+
+    copia = hosts_copia(get_inventario())
+    assert len(copia) == len(zabbix.hosts) == 25
+    assert all(copia[hostid] == (host["host"], host["name"]) for hostid, host in zabbix.hosts.items())
+    # Solo el índice de duplicados de process_excel consulta hosts; la copia no se volvió a pedir
+    assert len(zabbix.llamadas("host.get")) - consultas <= 2
+
+
+def test_aplicar_omite_hosts_desconocidos_sin_nombre(copia):
+    copia.aplicar([{"hostid": "999", "inventory": {"notes": "x"}}, {"hostid": "1000", "host": "h1000"}])
+
+    assert hosts_copia(copia) == {"1000": ("h1000", "h1000")}
+
+
+def test_aplicar_conserva_los_campos_no_enviados(zabbix, copia):
+    copia.sincronizar(get_client())
+    copia.aplicar([{"hostid": "10001", "inventory": {"notes": "NAP: nueva"}}])
+
+    inventario = copia.conn.execute("SELECT inventory FROM hosts WHERE hostid = 10001").fetchone()[0]
+    assert '"notes": "NAP: nueva"' in inventario
+    assert zabbix.hosts["10001"]["inventory"]["serialno_a"] in inventario
+
+
+def test_un_error_al_aplicar_fuerza_una_sincronizacion_completa(zabbix, copia):
+    copia.sincronizar(get_client())
+    copia.conn.execute("UPDATE hosts SET inventory = '{roto' WHERE hostid = 10002")
+    copia.conn.commit()
+
+    copia.aplicar([{"hostid": "10002", "inventory": {"notes": "x"}}])
+
+    assert copia._estado("ultima_sincronizacion") is None
+    assert copia.sincronizar(get_client())["tipo"] == "completa"
+
+
+def test_aplicar_no_espera_a_la_sincronizacion(zabbix, copia, monkeypatch):
+    paginas = copia._paginas
+    terminados = []
+
+    # Mientras la sincronización completa recorre host.get, otra carga crea un host
+    def paginas_con_carga(client, **extra_params):
+        for pagina in paginas(client, **extra_params):
+            yield pagina
+            if not terminados:
+                hilo = threading.Thread(target=copia.aplicar, args=([{"hostid": "20000", "host": "creado"}],))
+                hilo.start()
+                hilo.join(timeout=5)
+                terminados.append(not hilo.is_alive())
+
+    monkeypatch.setattr(copia, "_paginas", paginas_con_carga)
+
+    resumen = copia.sincronizar(get_client())
+
+    assert terminados == [True]
+    assert resumen == {"tipo": "completa", "eliminados": 0, "hosts": 21}
+    assert hosts_copia(copia)["20000"] == ("creado", "creado")
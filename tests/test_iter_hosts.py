@@ -0,0 +1,32 @@
+from zabbix_functions import get_client, iter_hosts
+
+
+def test_recorre_todos_los_hosts_por_paginas(zabbix):
+    paginas = list(iter_hosts(get_client(), page_size=7))
+
+    assert [len(pagina) for pagina in paginas] == [7, 7, 6]
+    hostids = [host["hostid"] for pagina in paginas for host in pagina]
+    assert hostids == sorted(zabbix.hosts, key=int)
+    assert set(paginas[0][0]) == {"hostid", "name"}
+
+
+def test_los_huecos_entre_hostids_no_agregan_llamadas(zabbix):
+    # Quedan 5 hosts con hostids muy separados
+    for hostid in list(zabbix.hosts)[5:]:
+        del zabbix.hosts[hostid]
+    zabbix.hosts["900000"] = dict(zabbix.hosts["10001"], hostid="900000")
+
+    paginas = list(iter_hosts(get_client(), page_size=2))
+
+    assert [host["hostid"] for pagina in paginas for host in pagina] == ["10001", "10002", "10003", "10004", "10005", "900000"]
+    # Una llamada liviana por los hostids y una por página
+    assert len(zabbix.llamadas("host.get")) == 1 + 3
+
+
+def test_desde_omite_los_hostids_menores(zabbix):
+    paginas = list(iter_hosts(get_client(), output=["hostid"], desde=10016, selectInventory=["serialno_a"]))
+
+    assert [host["hostid"] for pagina in paginas for host in pagina] == ["10016", "10017", "10018", "10019", "10020"]
+    assert all("inventory" in host for pagina in paginas for host in pagina)
+    # Los select* solo se piden en las páginas, no en la lista de hostids
+    assert "selectInventory" not in zabbix.llamadas("host.get")[0]
@@ -0,0 +1,78 @@
+import threading
+import time
+
+from jobs import Job, JobManager
+
+
+def esperar(job, limite=10):
+    fin = time.time() + limite
+    while not job.terminado:
+        assert time.time() < fin, "el trabajo no terminó"
+        time.sleep(0.01)
+    return job
+
+
+def test_ejecuta_en_segundo_plano_con_el_job_como_progreso():
+    liberar = threading.Event()
+
+    def proceso(cantidad, progreso=None):
+        progreso.iniciar(cantidad)
+        liberar.wait(5)
+        for i in range(cantidad):
+            progreso.registrar(exito=i % 2 == 0)
+        progreso.registrar_tiempo("zabbix", 0.5)
+        return "listo"
+
+    manager = JobManager(max_workers=1)
+    job = manager.submit("crear", proceso, 4)
+    assert job.estado in ("pendiente", "en_proceso")
+    assert manager.get(job.id) is job
+
+    liberar.set()
+    esperar(job)
+
+    resumen = job.resumen()
+    assert job.resultado == "listo"
+    assert (resumen["estado"], resumen["total"], resumen["procesadas"], resumen["fallidas"]) == ("terminado", 4, 4, 2)
+    assert resumen["tiempos"] == {"zabbix": 0.5}
+
+
+def test_un_error_queda_en_el_job():
+    def proceso(progreso=None):
+        raise RuntimeError("hoja inválida")
+
+    manager = JobManager(max_workers=1)
+    job = esperar(manager.submit("actualizar", proceso))
+
+    assert job.estado == "error"
+    assert job.error == "hoja inválida"
+    assert manager.contar_por_estado() == {"error": 1}
+
+
+def test_descarta_los_trabajos_vencidos():
+    manager = JobManager(max_workers=1, retencion=0)
+    viejo = esperar(manager.submit("crear", lambda progreso=None: None))
+    viejo.fin -= 1
+
+    nuevo = manager.submit("crear", lambda progreso=None: None)
+
+    assert manager.get(viejo.id) is None
+    assert manager.get(nuevo.id) is nuevo
+
+
+def test_estado_del_trabajo_en_json(app, monkeypatch):
+    import main_zabbix
+    manager = JobManager(max_workers=1)
+    monkeypatch.setattr(main_zabbix, "job_manager", manager)
+    job = esperar(manager.submit("actualizar", lambda progreso=None: {"error": "sin hosts"}))
+
+    cliente = app.test_client()
+    respuesta = cliente.get(f"/jobs/{job.id}")
+    assert respuesta.status_code == 200
+    assert respuesta.get_json()["estado"] == "terminado"
+    assert cliente.get("/jobs/inexistente").status_code == 404
+
+
+def test_job_nuevo_no_tiene_duracion():
+    resumen = Job("crear").resumen()
+    assert (resumen["duracion"], resumen["filas_por_segundo"]) == (0.0, 0.0)
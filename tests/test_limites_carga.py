@@ -0,0 +1,87 @@
+import threading
+import time
+
+from zabbix_functions import AdaptiveConcurrency, TokenBucket, ZABBIX_MAX_RPS
+
+
+def test_sin_tasa_no_limita():
+    bucket = TokenBucket(0, 1)
+    inicio = time.monotonic()
+    for _ in range(1000):
+        bucket.tomar()
+
+    assert time.monotonic() - inicio < 0.5
+    assert ZABBIX_MAX_RPS == 0
+
+
+def test_la_rafaga_pasa_y_el_resto_espera_la_tasa():
+    bucket = TokenBucket(tasa=50, rafaga=5)
+    inicio = time.monotonic()
+    for _ in range(5):
+        bucket.tomar()
+    rafaga = time.monotonic() - inicio
+    for _ in range(10):
+        bucket.tomar()
+
+    assert rafaga < 0.05
+    assert time.monotonic() - inicio >= 10 / 50 * 0.9
+
+
+def test_aumenta_de_a_uno_por_ronda_y_respeta_el_maximo():
+    concurrencia = AdaptiveConcurrency(1, 8, latencia_objetivo=1.0)
+    assert concurrencia.estado()["limite"] == 4
+
+    # Cada llamada suma 1/limite: con el límite en 4 hacen falta 5 llamadas para llegar a 5
+    for _ in range(5):
+        concurrencia.entrar()
+        concurrencia.salir(0.01, sobrecarga=False)
+    assert concurrencia.estado()["limite"] == 5
+
+    for _ in range(100):
+        concurrencia.entrar()
+        concurrencia.salir(0.01, sobrecarga=False)
+    assert concurrencia.estado() == {"limite": 8, "en_vuelo": 0}
+
+
+def test_reduce_a_la_mitad_una_vez_por_ventana():
+    concurrencia = AdaptiveConcurrency(1, 16, latencia_objetivo=0.01)
+    for _ in range(3):
+        concurrencia.entrar()
+    # Tres llamadas en curso terminan con sobrecarga: solo la primera reduce el límite
+    for _ in range(3):
+        concurrencia.salir(0.5, sobrecarga=True)
+    assert concurrencia.estado()["limite"] == 4
+
+    # Una llamada lenta que empezó después de la reducción vuelve a reducir
+    time.sleep(0.1)
+    concurrencia.entrar()
+    concurrencia.salir(0.05, sobrecarga=False)
+    assert concurrencia.estado()["limite"] == 2
+
+
+def test_no_baja_del_minimo():
+    concurrencia = AdaptiveConcurrency(2, 4, latencia_objetivo=1.0)
+    for _ in range(5):
+        concurrencia._ultima_reduccion = 0.0
+        concurrencia.entrar()
+        concurrencia.salir(0.1, sobrecarga=True)
+
+    assert concurrencia.estado()["limite"] == 2
+
+
+def test_entrar_espera_si_se_alcanza_el_limite():
+    concurrencia = AdaptiveConcurrency(1, 2, latencia_objetivo=1.0)
+    concurrencia.entrar()
+    entro = threading.Event()
+
+    def llamada():
+        concurrencia.entrar()
+        entro.set()
+
+    hilo = threading.Thread(target=llamada)
+    hilo.start()
+    assert not entro.wait(0.1)
+
+    concurrencia.salir(0.01, sobrecarga=False)
+    assert entro.wait(1)
+    hilo.join()
@@ -0,0 +1,82 @@
+import time
+
+import pytest
+
+import metrics
+from jobs import Job
+from metrics import Cronometro, Metricas, exportar, muestras_cliente
+from zabbix_functions import get_client
+
+
+@pytest.fixture
+def metricas(monkeypatch):
+    registro = Metricas()
+    monkeypatch.setattr(metrics, "metricas", registro)
+    return registro
+
+
+def valores(registro, nombre):
+    return {etiquetas["etapa"]: valor for muestra, _, etiquetas, valor in registro.muestras() if muestra == nombre}
+
+
+def test_etapas_suman_tiempo_y_ejecuciones(metricas):
+    job = Job("crear")
+    cronometro = Cronometro("crear", job)
+    for _ in range(3):
+        with cronometro.etapa("zabbix"):
+            time.sleep(0.01)
+
+    assert valores(metricas, "zabbix_stage_total") == {"zabbix": 3}
+    assert valores(metricas, "zabbix_stage_seconds_total")["zabbix"] >= 0.03
+    assert job.tiempos["zabbix"] == valores(metricas, "zabbix_stage_seconds_total")["zabbix"]
+
+
+def test_iterar_cuenta_un_paso_por_elemento(metricas):
+    cronometro = Cronometro("actualizar")
+
+    assert list(cronometro.iterar("lectura", iter([1, 2, 3]))) == [1, 2, 3]
+    assert list(cronometro.iterar("vacio", iter([]))) == []
+
+    assert valores(metricas, "zabbix_stage_total") == {"lectura": 3, "vacio": 0}
+
+
+def test_filas_por_estado(metricas):
+    cronometro = Cronometro("crear")
+    cronometro.contar("success", 5)
+    cronometro.contar("error")
+
+    filas = {etiquetas["estado"]: valor for nombre, _, etiquetas, valor in metricas.muestras() if nombre == "zabbix_rows_total"}
+    assert filas == {"success": 5, "error": 1}
+
+
+def test_exportar_en_formato_prometheus():
+    texto = exportar([
+        ("zabbix_rows_total", "counter", {"proceso": "crear", "estado": 'con "comillas"'}, 2),
+        ("zabbix_api_latency_seconds", "summary", {"method": "host.get", "quantile": "0.5"}, 0.01),
+        ("zabbix_api_latency_seconds_sum", "summary", {"method": "host.get"}, 1.5),
+        ("zabbix_api_in_flight", "gauge", {}, 0),
+    ])
+
+    assert texto.splitlines() == [
+        "# HELP zabbix_api_in_flight Llamadas a Zabbix en curso",
+        "# TYPE zabbix_api_in_flight gauge",
+        "zabbix_api_in_flight 0.0",
+        "# HELP zabbix_api_latency_seconds Latencia de las llamadas a la API de Zabbix por método",
+        "# TYPE zabbix_api_latency_seconds summary",
+        'zabbix_api_latency_seconds{method="host.get",quantile="0.5"} 0.01',
+        'zabbix_api_latency_seconds_sum{method="host.get"} 1.5',
+        "# HELP zabbix_rows_total Filas procesadas por proceso y estado",
+        "# TYPE zabbix_rows_total counter",
+        'zabbix_rows_total{estado="con \\"comillas\\"",proceso="crear"} 2.0',
+    ]
+
+
+def test_endpoint_metrics(app):
+    get_client().call("hostgroup.get", {"output": "extend"})
+    assert any(nombre == "zabbix_api_calls_total" and valor == 1 for nombre, _, _, valor in muestras_cliente(get_client()))
+
+    respuesta = app.test_client().get("/metrics")
+
+    assert respuesta.status_code == 200
+    assert respuesta.mimetype == "text/plain"
+    assert 'zabbix_api_calls_total{method="hostgroup.get"} 1.0' in respuesta.get_data(as_text=True)
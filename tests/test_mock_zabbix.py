@@ -0,0 +1,59 @@
+import pytest
+
+from bench_zabbix import ejecutar_escenario
+from generar_hojas import filas_crear, filas_actualizar, COLUMNAS_CREAR, COLUMNAS_ACTUALIZAR
+from mock_zabbix import ErrorAPI
+from zabbix_functions import ZabbixAPIError, get_client
+
+
+def test_host_create_es_una_transaccion(zabbix):
+    antes = len(zabbix.hosts)
+    existente = zabbix.hosts["10001"]["host"]
+
+    with pytest.raises(ZabbixAPIError, match="already exists"):
+        get_client().call("host.create", [{"host": "nuevo-1"}, {"host": existente}])
+
+    assert len(zabbix.hosts) == antes
+    assert get_client().call("host.create", [{"host": "nuevo-1"}])["hostids"] == [str(10001 + antes)]
+
+
+def test_host_get_con_search_y_search_inventory(zabbix):
+    cliente = get_client()
+    host = zabbix.hosts["10005"]
+    serial = host["inventory"]["serialno_a"]
+
+    por_nombre = cliente.call("host.get", {"output": ["hostid"], "search": {"name": host["name"].split()[0].upper()}})
+    por_serial = cliente.call("host.get", {"output": ["hostid"], "searchInventory": {"serialno_a": [serial.lower(), "NO-EXISTE"]}})
+    cualquiera = cliente.call("host.get", {"output": ["hostid"], "searchByAny": True,
+                                           "search": {"name": "NO-EXISTE"}, "searchInventory": {"serialno_a": serial}})
+
+    assert {"hostid": "10005"} in por_nombre
+    assert por_serial == [{"hostid": "10005"}]
+    assert cualquiera == [{"hostid": "10005"}]
+
+
+def test_massupdate_y_auditlog(zabbix):
+    cliente = get_client()
+    cliente.call("host.massupdate", {"hosts": [{"hostid": "10001"}, {"hostid": "10002"}], "groups": [{"groupid": "35"}]})
+
+    assert zabbix.hosts["10002"]["groups"] == [{"groupid": "35"}]
+    registros = cliente.call("auditlog.get", {"time_from": 0})
+    assert [(registro["resourceid"], registro["action"]) for registro in registros] == [("10001", "1"), ("10002", "1")]
+
+
+def test_rechaza_tokens_invalidos(zabbix):
+    with pytest.raises(ErrorAPI, match="re-login"):
+        zabbix.atender("host.get", {}, "otro-token")
+
+
+@pytest.mark.parametrize("escenario", ["crear", "diferencial", "descarga"])
+def test_escenarios_del_benchmark(zabbix, hoja, escenario):
+    if escenario == "crear":
+        archivo = hoja("crear.csv", COLUMNAS_CREAR, filas_crear(15))
+    else:
+        archivo = hoja("actualizar.csv", COLUMNAS_ACTUALIZAR, filas_actualizar(15))
+
+    medicion = ejecutar_escenario(escenario, archivo, 15, "csv", zabbix.url)
+
+    assert medicion["errores"] == 0
+    assert medicion["metodos"]["host.get"]["calls"] >= 1
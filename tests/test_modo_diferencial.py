@@ -0,0 +1,57 @@
+from create_update import calcular_cambios, process_update_zabbix
+from generar_hojas import filas_actualizar, COLUMNAS_ACTUALIZAR
+
+
+def test_solo_envia_los_hosts_y_campos_que_cambian(zabbix, hoja):
+    filas = list(filas_actualizar(12))
+    filas[3]["NAP"] = "NAP-nuevo"
+    filas[7]["Numero de telefono"] = "04240000000"
+    originales = {hostid: dict(host["inventory"]) for hostid, host in zabbix.hosts.items()}
+    cambian = {
+        fila["hostid"]: {
+            campo for campo, valor in (("notes", f"NAP: {fila['NAP']}"), ("contact", fila["Numero de telefono"]))
+            if originales[fila["hostid"]][campo] != valor
+        }
+        for fila in filas
+    }
+    cambian = {hostid: campos for hostid, campos in cambian.items() if campos}
+    file_path = hoja("actualizar.csv", COLUMNAS_ACTUALIZAR, filas)
+
+    resultado = process_update_zabbix(file_path, ["NAP", "Numero de telefono"], solo_cambios=True)
+
+    enviados = {params["hostid"]: params for params in zabbix.llamadas("host.update")}
+    assert set(enviados) == set(cambian)
+    for hostid, params in enviados.items():
+        assert set(params["inventory"]) == cambian[hostid]
+        assert set(params) == {"hostid", "inventory", "inventory_mode"}
+    assert resultado["resumen"]["conteo"] == {"success": len(cambian), "unchanged": 12 - len(cambian)}
+
+
+def test_una_segunda_pasada_no_envia_nada(zabbix, hoja):
+    file_path = hoja("actualizar.csv", COLUMNAS_ACTUALIZAR, filas_actualizar(10))
+    process_update_zabbix(file_path, ["NAP", "OLT", "modify_groups"], solo_cambios=True)
+    antes = len(zabbix.llamadas("host.update"))
+
+    resultado = process_update_zabbix(file_path, ["NAP", "OLT", "modify_groups"], solo_cambios=True)
+
+    assert len(zabbix.llamadas("host.update")) == antes
+    assert resultado["resumen"]["conteo"] == {"unchanged": 10}
+
+
+def test_calcular_cambios():
+    actual = {
+        "host": "h1", "name": "h1", "description": "NAP: 1", "inventory_mode": "0",
+        "groups": [{"groupid": "2"}, {"groupid": "1"}], "inventory": {"notes": "NAP: 1", "contact": "0412"},
+    }
+    params = {"hostid": "1", "inventory_mode": 0, "description": "NAP: 1",
+              "groups": [{"groupid": "1"}, {"groupid": "2"}], "inventory": {"notes": "NAP: 1", "contact": "0414"}}
+
+    assert calcular_cambios(params, actual) == {"hostid": "1", "inventory": {"contact": "0414"}, "inventory_mode": 0}
+    assert calcular_cambios(dict(params, inventory={"notes": "NAP: 1"}), actual) is None
+
+
+def test_inventario_deshabilitado_envia_todo_el_inventario():
+    actual = {"host": "h1", "inventory_mode": "-1", "inventory": []}
+    params = {"hostid": "1", "inventory_mode": 0, "inventory": {"notes": "NAP: 1"}}
+
+    assert calcular_cambios(params, actual) == params
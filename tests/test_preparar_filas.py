@@ -0,0 +1,79 @@
+import random
+
+import pandas as pd
+
+from create_update import preparar_filas
+from generar_hojas import datos_cliente, COLUMNAS_CREAR
+from mock_zabbix import MockZabbix
+from zabbix_functions import GroupResolver
+
+
+def hoja(*filas):
+    return pd.DataFrame(list(filas), columns=COLUMNAS_CREAR)
+
+
+def fila(**cambios):
+    datos = {
+        "Nombre": "José Pérez ", "Customer": "1234567", "Localidad": "Maracay", "OLT": "OLT-1", "Feeder": "N/A",
+        "Slot": "1", "PON": "2", "NAP": "NAP-7", "ONT/ONU": "TPLG00000001", "Dirección IP": " 10.0.0.1 ",
+        "MAC address": "aa:bb:cc:dd:ee:ff", "Ubicación de la caja NAP (Coordenadas)": "10.1, -66.9",
+        "Dirección": "Calle 1", "Numero de telefono": "04120000000",
+    }
+    datos.update(cambios)
+    return datos
+
+
+def resolver():
+    return GroupResolver(MockZabbix().grupos)
+
+
+def test_arma_hostname_y_params():
+    [(row, params, error)] = preparar_filas(hoja(fila()), resolver())
+
+    assert error is None
+    assert row["hostname"] == "Jose Perez TPLG00000001 ID1234567 MCY OSS"
+    assert params["host"] == row["hostname"]
+    assert params["interfaces"][0]["ip"] == "10.0.0.1"
+    assert params["inventory"]["location_lat"] == "10.1"
+    assert params["inventory"]["location_lon"] == "-66.9"
+    assert params["groups"] == [{"groupid": groupid} for groupid in resolver().resolver("Maracay", "OLT-1", "N/A")]
+
+
+def test_sin_serial_usa_pdfn_y_sin_coordenadas_quedan_vacias():
+    [(row, params, error)] = preparar_filas(hoja(fila(**{"ONT/ONU": "N/A", "Ubicación de la caja NAP (Coordenadas)": "N/A"})), resolver())
+
+    assert error is None
+    assert row["hostname"] == "Jose Perez PDFN ID1234567 MCY OSS"
+    assert params["inventory"]["location_lat"] == ""
+    assert params["inventory"]["location_lon"] == ""
+
+
+def test_errores_por_fila_sin_afectar_a_las_demas():
+    filas = preparar_filas(hoja(
+        fila(),
+        fila(**{"Ubicación de la caja NAP (Coordenadas)": "10, 20, 30"}),
+        fila(OLT="OLT-inexistente"),
+    ), resolver())
+
+    assert [params is not None for _, params, _ in filas] == [True, False, False]
+    assert "coordenadas" in str(filas[1][2])
+    assert "OLT-inexistente" in str(filas[2][2])
+
+
+def test_cada_combinacion_de_grupos_se_resuelve_una_vez():
+    class Contador(GroupResolver):
+        llamadas = 0
+
+        def resolver(self, *combinacion):
+            Contador.llamadas += 1
+            return super().resolver(*combinacion)
+
+    rnd = random.Random(1)
+    filas = [datos_cliente(i, rnd) for i in range(50)]
+    for datos in filas:
+        datos.update(Localidad="Valencia", OLT="OLT-2", Feeder="Feeder 3")
+
+    preparadas = preparar_filas(pd.DataFrame(filas, columns=COLUMNAS_CREAR), Contador(MockZabbix().grupos))
+
+    assert len(preparadas) == 50
+    assert Contador.llamadas == 1
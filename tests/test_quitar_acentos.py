@@ -0,0 +1,38 @@
+import pandas as pd
+import pytest
+
+from zabbix_functions import quitar_acentos, quitar_acentos_nfkd, quitar_acentos_serie, TABLA_ACENTOS
+
+
+@pytest.mark.parametrize("cadena, esperado", [
+    ("José Pérez", "Jose Perez"),
+    ("Ñandú Núñez", "Nandu Nunez"),
+    ("Ángel Güiraldes", "Angel Guiraldes"),
+    ("Łukasz Čapek", "Łukasz Capek"),
+    ("sin acentos", "sin acentos"),
+    ("", ""),
+])
+def test_quita_acentos(cadena, esperado):
+    assert quitar_acentos(cadena) == esperado
+
+
+def test_coincide_con_la_normalizacion_nfkd():
+    cadena = "".join(chr(codigo) for codigo in range(0x20, 0x180))
+    assert quitar_acentos(cadena) == quitar_acentos_nfkd(cadena)
+    assert all(valor.isascii() for valor in TABLA_ACENTOS.values())
+
+
+def test_valores_que_no_son_texto_no_cambian():
+    assert quitar_acentos(None) is None
+    assert quitar_acentos(12) == 12
+
+
+def test_serie_conserva_indice_y_vacios():
+    serie = pd.Series(["María", None, "María", "Óscar"], index=[3, 5, 7, 9])
+
+    limpia = quitar_acentos_serie(serie)
+
+    assert list(limpia.index) == [3, 5, 7, 9]
+    assert limpia.tolist()[0] == "Maria"
+    assert limpia.tolist()[2:] == ["Maria", "Oscar"]
+    assert limpia.isna().tolist() == [False, True, False, False]
@@ -0,0 +1,89 @@
+import csv
+import time
+
+from create_update import process_excel, process_update_zabbix, ResumenCarga
+from generar_hojas import filas_crear, filas_actualizar, COLUMNAS_CREAR, COLUMNAS_ACTUALIZAR
+from journal import Journal
+
+
+def test_crear_reanuda_solo_las_filas_pendientes(zabbix, hoja):
+    filas = list(filas_crear(30))
+    file_path = hoja("crear.csv", COLUMNAS_CREAR, filas)
+    # Un host con la IP de la fila 6 hace que esa fila quede como duplicada
+    zabbix.hosts["10001"]["interfaces"] = [{"ip": filas[5]["Dirección IP"]}]
+
+    primera, _ = process_excel(file_path, read_chunk_size=8)
+    assert primera["conteo"] == {"success": 29, "duplicate": 1}
+
+    zabbix.hosts["10001"]["interfaces"] = [{"ip": "172.0.0.1"}]
+    creados = len(zabbix.llamadas("host.create"))
+    segunda, report_filename = process_excel(file_path, read_chunk_size=8, reanudar=True, formato_reporte="csv")
+
+    assert segunda["conteo"] == {"reanudado": 29, "success": 1}
+    assert [len(lote) for lote in zabbix.llamadas("host.create")[creados:]] == [1]
+    # El reporte incluye los hosts creados en la primera ejecución
+    with open(f"results/{report_filename}", newline="", encoding="utf-8-sig") as f:
+        assert len(list(csv.DictReader(f))) == 30
+
+
+def test_sin_reanudar_se_vuelve_a_procesar_todo(zabbix, hoja):
+    file_path = hoja("actualizar.csv", COLUMNAS_ACTUALIZAR, filas_actualizar(6))
+    process_update_zabbix(file_path, ["NAP"])
+    process_update_zabbix(file_path, ["NAP"])
+
+    assert len(zabbix.llamadas("host.update")) == 12
+
+
+def test_actualizar_reanuda_solo_las_filas_con_error(zabbix, hoja):
+    filas = list(filas_actualizar(10))
+    host = zabbix.hosts.pop(filas[4]["hostid"])
+    file_path = hoja("actualizar.csv", COLUMNAS_ACTUALIZAR, filas)
+
+    primera = process_update_zabbix(file_path, ["NAP"], read_chunk_size=3, formato_reporte="csv")
+    assert primera["resumen"]["conteo"] == {"success": 9, "error": 1}
+
+    zabbix.hosts[host["hostid"]] = host
+    enviados = len(zabbix.llamadas("host.update"))
+    segunda = process_update_zabbix(file_path, ["NAP"], read_chunk_size=3, formato_reporte="csv", reanudar=True)
+
+    assert segunda["resumen"]["conteo"] == {"reanudado": 9, "success": 1}
+    assert [params["hostid"] for params in zabbix.llamadas("host.update")[enviados:]] == [host["hostid"]]
+    with open(segunda["report_path"], newline="", encoding="utf-8-sig") as f:
+        assert [fila["hostid"] for fila in csv.DictReader(f)] == [fila["hostid"] for fila in filas]
+
+
+def test_el_journal_guarda_todas_las_filas(zabbix, hoja):
+    file_path = hoja("actualizar.csv", COLUMNAS_ACTUALIZAR, filas_actualizar(5))
+    resultado = process_update_zabbix(file_path, ["NAP"])
+
+    with Journal() as journal:
+        filas = list(journal.iter_filas(resultado["resumen"]["ejecucion"]))
+        assert [(fila, estado) for fila, estado, _, _, _ in filas] == [(i, "success") for i in range(5)]
+        assert sorted(journal.completadas(resultado["resumen"]["ejecucion"], 1, 3)) == [1, 2]
+
+
+def test_el_resumen_conserva_solo_los_primeros_errores():
+    resumen = ResumenCarga("clave", max_mensajes=2)
+    for i in range(5):
+        resumen.agregar("error", f"error {i}")
+        resumen.agregar("success", f"ok {i}")
+
+    assert resumen.como_dict() == {
+        "ejecucion": "clave", "total": 10, "conteo": {"error": 5, "success": 5},
+        "mensajes": ["error 0", "error 1"], "omitidos": 3,
+    }
+
+
+def test_detalle_del_trabajo_desde_el_journal(app, hoja):
+    import main_zabbix
+    file_path = hoja("actualizar.csv", COLUMNAS_ACTUALIZAR, filas_actualizar(4))
+    job = main_zabbix.job_manager.submit("actualizar", process_update_zabbix, file_path, ["NAP"])
+    while not job.terminado:
+        time.sleep(0.01)
+
+    cliente = app.test_client()
+    assert "Correctos: 4" in cliente.get(f"/jobs/{job.id}/ver").get_data(as_text=True)
+    detalle = cliente.get(f"/jobs/{job.id}/detalle").get_data(as_text=True).lstrip("\ufeff").splitlines()
+
+    assert detalle[0] == "fila,estado,hostid,mensaje"
+    assert [linea.split(",")[:2] for linea in detalle[1:]] == [[str(i), "success"] for i in range(1, 5)]
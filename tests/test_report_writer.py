@@ -0,0 +1,89 @@
+import csv
+import gzip
+import importlib.util
+import os
+
+import pytest
+from openpyxl import load_workbook
+
+from report_writer import ReportWriter, FORMATOS_REPORTE
+
+
+def test_xlsx_por_bloques(tmp_path):
+    file_path = str(tmp_path / "reporte.xlsx")
+    with ReportWriter(file_path, ["hostid", "status"]) as reporte:
+        reporte.agregar([["1", "success"], ["2", "error"]])
+        reporte.agregar(iter([["3", "unchanged"]]))
+
+    assert reporte.filas == 3
+    wb = load_workbook(file_path, read_only=True)
+    assert [list(fila) for fila in wb.active.iter_rows(values_only=True)] == [
+        ["hostid", "status"], ["1", "success"], ["2", "error"], ["3", "unchanged"]
+    ]
+    wb.close()
+
+
+def test_csv_con_formato_explicito(tmp_path):
+    file_path = str(tmp_path / "reporte.txt")
+    with ReportWriter(file_path, ["hostid", "nombre"], "csv") as reporte:
+        reporte.agregar([["1", "José"]])
+
+    with open(file_path, newline="", encoding="utf-8-sig") as f:
+        assert list(csv.reader(f)) == [["hostid", "nombre"], ["1", "José"]]
+
+
+def test_formato_no_soportado(tmp_path):
+    with pytest.raises(ValueError, match="no soportado"):
+        ReportWriter(str(tmp_path / "reporte.json"), ["hostid"])
+
+
+@pytest.mark.skipif(importlib.util.find_spec("pyarrow") is not None, reason="pyarrow instalado")
+def test_parquet_sin_pyarrow(tmp_path):
+    assert "parquet" not in FORMATOS_REPORTE
+    with pytest.raises(ValueError, match="pyarrow"):
+        ReportWriter(str(tmp_path / "reporte.parquet"), ["hostid"])
+
+
+@pytest.mark.skipif(importlib.util.find_spec("pyarrow") is None, reason="requiere pyarrow")
+def test_parquet(tmp_path):
+    import pyarrow.parquet
+    file_path = str(tmp_path / "reporte.parquet")
+    with ReportWriter(file_path, ["hostid", "status"]) as reporte:
+        reporte.agregar([["1", "success"], [2, None]])
+
+    assert pyarrow.parquet.read_table(file_path).to_pylist() == [
+        {"hostid": "1", "status": "success"}, {"hostid": "2", "status": None}
+    ]
+
+
+def test_formato_solicitado(app):
+    import main_zabbix
+    assert main_zabbix.formato_solicitado({"formato": "csv"}) == "csv"
+    assert main_zabbix.formato_solicitado({"formato": "json"}) == "xlsx"
+    assert main_zabbix.formato_solicitado({}) == "xlsx"
+
+
+def test_descarga_de_hosts_en_csv_comprimido(app):
+    cliente = app.test_client()
+
+    respuesta = cliente.get("/download-hosts?formato=csv", headers={"Accept-Encoding": "gzip"})
+    segunda = cliente.get("/download-hosts?formato=csv")
+
+    assert respuesta.status_code == 200
+    assert respuesta.headers["Content-Encoding"] == "gzip"
+    filas = list(csv.reader(gzip.decompress(respuesta.get_data()).decode("utf-8-sig").splitlines()))
+    assert filas[0] == ["customer id", "hostid", "nombre", "serial onu"]
+    assert len(filas) == 1 + 20
+    assert len(os.listdir(app.config["RESULTS_FOLDER"])) == 2
+    assert segunda.headers["Content-Disposition"] != respuesta.headers["Content-Disposition"]
+
+
+def test_descarga_con_error_no_deja_archivos(app, monkeypatch):
+    def fallar(self, filas):
+        raise OSError("disco lleno")
+
+    monkeypatch.setattr(ReportWriter, "agregar", fallar)
+    respuesta = app.test_client().get("/download-hosts?formato=csv")
+
+    assert respuesta.status_code == 500
+    assert os.listdir(app.config["RESULTS_FOLDER"]) == []
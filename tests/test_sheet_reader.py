@@ -0,0 +1,57 @@
+import pytest
+from openpyxl import Workbook
+
+from sheet_reader import iter_bloques, leer_encabezados, contar_filas, codificacion_csv, CSV_FALLBACK_ENCODING
+
+
+def escribir_xlsx(file_path, filas):
+    wb = Workbook()
+    for fila in filas:
+        wb.active.append(fila)
+    wb.save(file_path)
+    return str(file_path)
+
+
+def test_lee_xlsx_por_bloques(tmp_path):
+    file_path = escribir_xlsx(tmp_path / "hoja.xlsx", [["hostid", "NAP", "Telefono"]] + [[10000 + i, f"NAP-{i}", 4121234567.0] for i in range(5)])
+
+    bloques = list(iter_bloques(file_path, chunk_size=2))
+
+    assert [len(bloque) for bloque in bloques] == [2, 2, 1]
+    assert bloques[0][0] == {"hostid": "10000", "NAP": "NAP-0", "Telefono": "4121234567"}
+    assert contar_filas(file_path) == 5
+
+
+def test_omite_filas_vacias_y_rellena_celdas(tmp_path):
+    file_path = escribir_xlsx(tmp_path / "hoja.xlsx", [["hostid", "NAP"], [1, None], [None, None], [2, "NAP-2"]])
+
+    [bloque] = iter_bloques(file_path, relleno="N/A")
+
+    assert bloque == [{"hostid": "1", "NAP": "N/A"}, {"hostid": "2", "NAP": "NAP-2"}]
+
+
+def test_columnas_pedidas_y_faltantes(tmp_path):
+    file_path = escribir_xlsx(tmp_path / "hoja.xlsx", [[" hostid ", "NAP", "OLT"], [1, "NAP-1", "OLT-1"]])
+
+    assert leer_encabezados(file_path) == ["hostid", "NAP", "OLT"]
+    assert list(iter_bloques(file_path, ["OLT"])) == [[{"OLT": "OLT-1"}]]
+    with pytest.raises(ValueError, match="Feeder"):
+        list(iter_bloques(file_path, ["OLT", "Feeder"]))
+
+
+def test_csv_utf8_con_punto_y_coma(tmp_path):
+    file_path = tmp_path / "hoja.csv"
+    file_path.write_text("Nombre;NAP\nJosé Pérez;NAP-1\n;\n", encoding="utf-8-sig")
+
+    assert codificacion_csv(file_path) == "utf-8-sig"
+    assert list(iter_bloques(str(file_path))) == [[{"Nombre": "José Pérez", "NAP": "NAP-1"}]]
+    assert contar_filas(str(file_path)) is None
+
+
+def test_csv_de_excel_en_cp1252(tmp_path):
+    file_path = tmp_path / "hoja.csv"
+    file_path.write_bytes("Nombre,Dirección\nMaría Núñez,Calle Ñ\n".encode("cp1252"))
+
+    assert codificacion_csv(file_path) == CSV_FALLBACK_ENCODING
+    assert leer_encabezados(str(file_path)) == ["Nombre", "Dirección"]
+    assert list(iter_bloques(str(file_path))) == [[{"Nombre": "María Núñez", "Dirección": "Calle Ñ"}]]
@@ -0,0 +1,59 @@
+import io
+import os
+
+
+def formulario(contenido=b"hostid,NAP\n10001,NAP-1\n", nombre="hoja.csv"):
+    return {"data": {"file": (io.BytesIO(contenido), nombre)}, "content_type": "multipart/form-data"}
+
+
+def archivos(directorio):
+    return sorted(os.path.relpath(os.path.join(raiz, nombre), directorio)
+                  for raiz, _, nombres in os.walk(directorio) for nombre in nombres)
+
+
+def test_cada_subida_va_a_una_ruta_propia(app):
+    import main_zabbix
+    rutas = []
+    for contenido in (b"primera", b"segunda"):
+        with app.test_request_context("/", method="POST", **formulario(contenido)):
+            rutas.append(main_zabbix.guardar_subida(main_zabbix.request.files["file"]))
+
+    assert rutas[0] != rutas[1]
+    assert [os.path.basename(ruta) for ruta in rutas] == ["hoja.csv", "hoja.csv"]
+    assert [open(ruta, "rb").read() for ruta in rutas] == [b"primera", b"segunda"]
+    # El temporal se movió al destino: no queda ninguna copia en UPLOAD_FOLDER
+    assert len(archivos(app.config["UPLOAD_FOLDER"])) == 2
+
+
+def test_nombres_inseguros(app):
+    import main_zabbix
+    with app.test_request_context("/", method="POST", **formulario(nombre="../../ñandú.xlsx")):
+        ruta = main_zabbix.guardar_subida(main_zabbix.request.files["file"])
+
+    assert os.path.dirname(os.path.dirname(ruta)) == app.config["UPLOAD_FOLDER"]
+    assert ruta.endswith(".xlsx")
+
+
+def test_los_temporales_no_usados_se_eliminan(app):
+    import main_zabbix
+    with app.test_request_context("/", method="POST", **formulario()):
+        temporal = main_zabbix.request.files["file"].stream.name
+        assert os.path.exists(temporal)
+
+    assert not os.path.exists(temporal)
+    assert archivos(app.config["UPLOAD_FOLDER"]) == []
+
+
+def test_rechaza_archivos_demasiado_grandes(app, monkeypatch):
+    monkeypatch.setitem(app.config, "MAX_CONTENT_LENGTH", 1024 * 1024)
+
+    respuesta = app.test_client().post("/crear_hosts", **formulario(b"x" * (2 * 1024 * 1024)))
+
+    assert respuesta.status_code == 413
+    assert "1 MB" in respuesta.get_data(as_text=True)
+    assert archivos(app.config["UPLOAD_FOLDER"]) == []
+
+
+def test_punto_de_entrada_wsgi(app):
+    import wsgi
+    assert wsgi.application is app
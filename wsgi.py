@@ -0,0 +1,13 @@
+"""
+Punto de entrada WSGI para producción, con varios pedidos atendidos a la vez:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+    waitress-serve --listen=0.0.0.0:8000 --threads=16 wsgi:app   (Windows)
+
+Se usa un solo proceso con hilos: los trabajos (jobs.py), las métricas, el cliente de Zabbix
+con su control de carga y la copia local de hosts viven en la memoria del proceso, y con
+varios procesos /jobs/<id> no encontraría los trabajos iniciados en otro.
+"""
+from main_zabbix import app
+
+application = app
@@ -1,6 +1,15 @@
+import os
 import requests
 import json
+import functools
+import itertools
+import re
+import threading
+import time
 import unicodedata
+from collections import deque
+import pandas as pd
+from requests.adapters import HTTPAdapter
 
 MAPA_LOCALIDADES = {
     "Los teques": "LTQ OSS",
@@ -17,107 +26,662 @@ URL = "http://10.177.255.28/zabbix/api_jsonrpc.php"
 USERNAME = "Monitoreo"
 PASSWORD = "MonitoreS1mpl3##"
 
-# Función para iniciar sesión en Zabbix
-def login_zabbix(url, username, password):
-    data = {
-        "jsonrpc": "2.0",
-        "method": "user.login",
-        "params": {"username": username, "password": password},
-        "id": 1,
-    }
-    headers = {"Content-Type": "application/json"}
-    response = requests.post(url, headers=headers, data=json.dumps(data))
-    response_json = response.json()
-
-    if "result" in response_json and "error" not in response_json:
-        return response_json["result"]
-    else:
-        raise Exception(f"Error al iniciar sesión: {response_json}")
-
-# Función para extraer todos los hosts registrados en Zabbix con sus hostids
-def get_hosts(url, token):
-    """
-    Obtiene una lista de todos los hosts y sus IDs, nombres y direcciones IP.
-    """
-    data = {
-        "jsonrpc": "2.0",
-        "method": "host.get",
-        "params": {
-            "output": ["hostid", "name"],  # Obtener hostid y name
-        },
-        "auth": token,
-        "id": 2
-    }
-    headers = {"Content-Type": "application/json"}
-    response = requests.post(url, headers=headers, data=json.dumps(data))
-    response_json = response.json()
-    if "result" in response_json:
+# Tamaño del pool de conexiones HTTP hacia Zabbix (debe cubrir los hilos que llaman a la API en paralelo)
+ZABBIX_POOL_SIZE = 20
+
+# Cantidad de latencias recientes que se guardan por método para calcular percentiles
+LATENCY_SAMPLES = 10000
+
+# Control de carga sobre el frontend de Zabbix, configurable por variables de entorno en cada despliegue:
+# timeouts (conexión, lectura) en segundos, techo de llamadas por segundo (0 = sin techo) y ráfaga del
+# token bucket, límites de llamadas simultáneas y latencia a partir de la cual se reduce la concurrencia.
+# Por defecto no hay techo de llamadas por segundo: la carga la regula AdaptiveConcurrency según la
+# latencia y los errores de Zabbix. Un techo fijo (por ejemplo 50) limita las actualizaciones fila por
+# fila a esa cantidad de filas por segundo, aunque Zabbix pueda atender más.
+ZABBIX_TIMEOUT = (float(os.environ.get("ZABBIX_CONNECT_TIMEOUT", 5)), float(os.environ.get("ZABBIX_READ_TIMEOUT", 120)))
+ZABBIX_MAX_RPS = float(os.environ.get("ZABBIX_MAX_RPS", 0))
+ZABBIX_BURST = int(os.environ.get("ZABBIX_BURST", 10))
+ZABBIX_MIN_CONCURRENCY = int(os.environ.get("ZABBIX_MIN_CONCURRENCY", 1))
+ZABBIX_MAX_CONCURRENCY = int(os.environ.get("ZABBIX_MAX_CONCURRENCY", ZABBIX_POOL_SIZE))
+ZABBIX_TARGET_LATENCY = float(os.environ.get("ZABBIX_TARGET_LATENCY", 2.0))
+
+# Reintentos ante errores de red o sobrecarga, solo para métodos de lectura (espera inicial en segundos, se duplica)
+ZABBIX_READ_RETRIES = 3
+ZABBIX_RETRY_BACKOFF = 1
+
+# Techo de llamadas por segundo: cada llamada toma una ficha, que se reponen a tasa fichas por segundo
+class TokenBucket:
+    def __init__(self, tasa, rafaga):
+        self.tasa = tasa
+        self.capacidad = max(1, rafaga)
+        self._fichas = float(self.capacidad)
+        self._ultimo = time.monotonic()
+        self._lock = threading.Lock()
+
+    def tomar(self):
+        if not self.tasa:
+            return
+        while True:
+            with self._lock:
+                ahora = time.monotonic()
+                self._fichas = min(self.capacidad, self._fichas + (ahora - self._ultimo) * self.tasa)
+                self._ultimo = ahora
+                if self._fichas >= 1:
+                    self._fichas -= 1
+                    return
+                espera = (1 - self._fichas) / self.tasa
+            time.sleep(espera)
+
+# Límite de llamadas simultáneas que se ajusta con AIMD según la latencia y los errores observados
+class AdaptiveConcurrency:
+    """
+    Cada llamada terminada a tiempo suma 1/limite al límite (+1 por cada ronda completa de llamadas);
+    una llamada lenta, con timeout, error de conexión, HTTP 429 o 5xx lo reduce a la mitad.
+    """
+
+    def __init__(self, minimo, maximo, latencia_objetivo):
+        self.minimo = max(1, minimo)
+        self.maximo = max(self.minimo, maximo)
+        self.latencia_objetivo = latencia_objetivo
+        self.limite = float(max(self.minimo, self.maximo // 2))
+        self.en_vuelo = 0
+        self._ultima_reduccion = 0.0
+        self._cond = threading.Condition()
+
+    def entrar(self):
+        with self._cond:
+            while self.en_vuelo >= int(self.limite):
+                self._cond.wait()
+            self.en_vuelo += 1
+
+    def salir(self, duracion, sobrecarga):
+        with self._cond:
+            self.en_vuelo -= 1
+            ahora = time.monotonic()
+            if sobrecarga or duracion > self.latencia_objetivo:
+                # Una sola reducción por ventana: las llamadas que ya estaban en curso no la repiten
+                if ahora - self._ultima_reduccion > duracion:
+                    self.limite = max(self.minimo, self.limite / 2)
+                    self._ultima_reduccion = ahora
+            else:
+                self.limite = min(self.maximo, self.limite + 1 / self.limite)
+            self._cond.notify_all()
+
+    def estado(self):
+        with self._cond:
+            return {"limite": int(self.limite), "en_vuelo": self.en_vuelo}
+
+# Función que indica si un método de la API solo lee datos y se puede reintentar sin efectos duplicados
+def es_lectura(method):
+    return method.endswith(".get") or method in ("user.login", "apiinfo.version")
+
+# Error devuelto por la API de Zabbix, conserva el objeto "error" de la respuesta
+class ZabbixAPIError(Exception):
+    def __init__(self, mensaje, error=None):
+        super().__init__(mensaje)
+        self.error = error
+
+# Cliente reutilizable de la API de Zabbix
+class ZabbixClient:
+    """
+    Mantiene una sesión HTTP con keep-alive y un pool de conexiones, guarda el token de
+    autenticación y vuelve a iniciar sesión solo cuando Zabbix lo rechaza.
+    Cada llamada pasa por el token bucket y el control de concurrencia, y las de lectura
+    se reintentan ante errores de red o sobrecarga.
+    Lleva un conteo de llamadas, errores y latencia por método de la API.
+    """
+
+    def __init__(self, url, username, password, pool_size=ZABBIX_POOL_SIZE, timeout=ZABBIX_TIMEOUT,
+                 max_rps=ZABBIX_MAX_RPS, burst=ZABBIX_BURST, min_concurrency=ZABBIX_MIN_CONCURRENCY,
+                 max_concurrency=ZABBIX_MAX_CONCURRENCY, target_latency=ZABBIX_TARGET_LATENCY,
+                 read_retries=ZABBIX_READ_RETRIES, retry_backoff=ZABBIX_RETRY_BACKOFF):
+        self.url = url
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.read_retries = read_retries
+        self.retry_backoff = retry_backoff
+        self.bucket = TokenBucket(max_rps, burst)
+        self.concurrencia = AdaptiveConcurrency(min_concurrency, max_concurrency, target_latency)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Content-Type": "application/json"})
+        self._ids = itertools.count(1)
+        self._token = None
+        self._login_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {}
+
+    def _post(self, method, params, auth):
+        data = {
+            "jsonrpc": "2.0",
+            "method": method,
+            "params": params,
+            "id": next(self._ids),
+        }
+        if auth is not None:
+            data["auth"] = auth
+        inicio_espera = time.perf_counter()
+        self.bucket.tomar()
+        self.concurrencia.entrar()
+        inicio = time.perf_counter()
+        error = True
+        sobrecarga = True
+        try:
+            response = self.session.post(self.url, data=json.dumps(data), timeout=self.timeout)
+            sobrecarga = response.status_code == 429 or response.status_code >= 500
+            response.raise_for_status()
+            response_json = response.json()
+            error = "error" in response_json
+            return response_json
+        finally:
+            duracion = time.perf_counter() - inicio
+            self.concurrencia.salir(duracion, sobrecarga)
+            self._registrar(method, duracion, error, inicio - inicio_espera)
+
+    # Los métodos de escritura no se reintentan aquí: host.create podría haberse aplicado aunque no llegue la respuesta
+    def _post_con_reintentos(self, method, params, auth):
+        reintentos = self.read_retries if es_lectura(method) else 0
+        for intento in range(reintentos + 1):
+            try:
+                return self._post(method, params, auth)
+            except requests.exceptions.RequestException:
+                if intento == reintentos:
+                    raise
+                time.sleep(self.retry_backoff * 2 ** intento)
+
+    def _registrar(self, method, duracion, error, espera=0.0):
+        with self._stats_lock:
+            stats = self._stats.setdefault(method, {
+                "calls": 0, "errors": 0, "total_time": 0.0, "max_time": 0.0, "wait_time": 0.0,
+                "latencias": deque(maxlen=LATENCY_SAMPLES),
+            })
+            stats["calls"] += 1
+            stats["errors"] += int(error)
+            stats["total_time"] += duracion
+            stats["max_time"] = max(stats["max_time"], duracion)
+            stats["wait_time"] += espera
+            stats["latencias"].append(duracion)
+
+    def _login(self):
+        response_json = self._post_con_reintentos("user.login", {"username": self.username, "password": self.password}, None)
+        if "result" in response_json and "error" not in response_json:
+            self._token = response_json["result"]
+        else:
+            raise ZabbixAPIError(f"Error al iniciar sesión: {response_json}", response_json.get("error"))
+
+    # Token de autenticación, se inicia sesión solo la primera vez o después de que expire
+    @property
+    def token(self):
+        if self._token is None:
+            with self._login_lock:
+                if self._token is None:
+                    self._login()
+        return self._token
+
+    # Inicia sesión si todavía no hay token (para verificar las credenciales antes de procesar una carga)
+    def login(self):
+        return self.token
+
+    def _renovar_token(self, token_vencido):
+        with self._login_lock:
+            # Otro hilo pudo haber renovado el token mientras se esperaba el lock
+            if self._token == token_vencido:
+                self._login()
+        return self._token
+
+    def call(self, method, params, contexto="Error en la llamada a Zabbix"):
+        token = self.token
+        response_json = self._post_con_reintentos(method, params, token)
+        if "error" in response_json and sesion_expirada(response_json["error"]):
+            response_json = self._post_con_reintentos(method, params, self._renovar_token(token))
+        if "error" in response_json:
+            raise ZabbixAPIError(f"{contexto}: {response_json['error']}", response_json["error"])
         return response_json["result"]
+
+    def stats(self):
+        """
+        Devuelve por método: llamadas, errores, tiempo total, tiempo de espera por los límites de carga,
+        y promedio, p50, p99 y máximo en milisegundos.
+        Los percentiles se calculan sobre las últimas LATENCY_SAMPLES llamadas de cada método.
+        """
+        with self._stats_lock:
+            return {
+                method: {
+                    "calls": s["calls"],
+                    "errors": s["errors"],
+                    "total_time": s["total_time"],
+                    "wait_time": s["wait_time"],
+                    "avg_ms": s["total_time"] / s["calls"] * 1000 if s["calls"] else 0.0,
+                    "p50_ms": percentil(s["latencias"], 50) * 1000,
+                    "p99_ms": percentil(s["latencias"], 99) * 1000,
+                    "max_ms": s["max_time"] * 1000,
+                }
+                for method, s in self._stats.items()
+            }
+
+    def carga(self):
+        """
+        Devuelve el límite actual de llamadas simultáneas y cuántas hay en curso.
+        """
+        return self.concurrencia.estado()
+
+# Función que devuelve el percentil (0-100) de una lista de valores, por el método del rango más cercano
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    if not ordenados:
+        return 0.0
+    return ordenados[max(0, -(-len(ordenados) * p // 100) - 1)]
+
+# Función que indica si un error de la API corresponde a una sesión vencida o inválida
+def sesion_expirada(error):
+    detalle = f"{error.get('message', '')} {error.get('data', '')}".lower()
+    return "re-login" in detalle or "not authorised" in detalle or "not authorized" in detalle
+
+_client = None
+_client_lock = threading.Lock()
+
+# Función que devuelve el cliente de Zabbix compartido por todo el proceso
+def get_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = ZabbixClient(URL, USERNAME, PASSWORD)
+        return _client
+
+# Función que reemplaza el cliente compartido, por ejemplo para apuntar a otro servidor o cambiar los límites de carga
+def configurar_cliente(url=URL, username=USERNAME, password=PASSWORD, **opciones):
+    global _client
+    with _client_lock:
+        _client = ZabbixClient(url, username, password, **opciones)
+        return _client
+
+# Cantidad de hostids que se consultan en cada página de host.get
+HOSTS_PAGE_SIZE = 1000
+
+# Función que recorre los hosts de Zabbix por páginas, sin cargarlos todos en memoria
+def iter_hosts(client, output=("hostid", "name"), page_size=HOSTS_PAGE_SIZE, desde=None, **extra_params):
+    """
+    Generador que devuelve una página (lista de hosts) por vez.
+    host.get no tiene offset ni filtros por rango, así que primero se piden solo los hostids
+    (una llamada liviana) y después los hosts de a page_size hostids existentes: la cantidad de
+    llamadas depende de la cantidad de hosts y no de los huecos entre hostids.
+    Con desde solo se recorren los hostids mayores o iguales a ese valor.
+    """
+    params = {"output": ["hostid"], **{clave: valor for clave, valor in extra_params.items() if not clave.startswith("select")}}
+    hostids = sorted(int(host["hostid"]) for host in client.call("host.get", params, "Error al obtener los hosts"))
+    if desde is not None:
+        hostids = [hostid for hostid in hostids if hostid >= desde]
+
+    for inicio in range(0, len(hostids), page_size):
+        params = {
+            "output": list(output),
+            "hostids": [str(hostid) for hostid in hostids[inicio:inicio + page_size]],
+            "sortfield": "hostid",
+            **extra_params,
+        }
+        pagina = client.call("host.get", params, "Error al obtener los hosts")
+        if pagina:
+            yield pagina
+
+# Función que obtiene el estado actual de una lista de hosts, consultando page_size hostids por llamada
+def get_hosts_by_ids(client, hostids, inventory_fields="extend", page_size=HOSTS_PAGE_SIZE):
+    """
+    Devuelve un diccionario hostid -> host con host, name, description, inventory_mode,
+    groups (solo groupid) e inventory (los campos pedidos). Los hostids inexistentes no aparecen.
+    """
+    hostids = [str(hostid) for hostid in hostids]
+    hosts = {}
+    for inicio in range(0, len(hostids), page_size):
+        params = {
+            "output": ["hostid", "host", "name", "description", "inventory_mode"],
+            "hostids": hostids[inicio:inicio + page_size],
+            "selectGroups": ["groupid"],
+            "selectInventory": inventory_fields,
+        }
+        for host in client.call("host.get", params, "Error al obtener los hosts"):
+            hosts[host["hostid"]] = host
+    return hosts
+
+# Función que devuelve el inventario de un host de host.get como diccionario.
+# Con el inventario deshabilitado Zabbix devuelve una lista vacía en lugar de un objeto
+def inventario_host(host):
+    return host.get("inventory") or {}
+
+# Claves por las que se puede identificar un host en la hoja de actualización (nombre de la columna)
+CLAVE_HOSTID = "hostid"
+CLAVE_CUSTOMER = "Customer"
+CLAVE_SERIAL = "ONT/ONU"
+CLAVES_HOST = (CLAVE_HOSTID, CLAVE_CUSTOMER, CLAVE_SERIAL)
+
+# Cantidad de valores que se buscan en cada llamada host.get al resolver claves
+SEARCH_CHUNK_SIZE = 200
+
+# Función que busca los hostids de una lista de Customer IDs o seriales de ONU en pocas llamadas host.get
+def buscar_hostids(client, clave, valores, chunk_size=SEARCH_CHUNK_SIZE):
+    """
+    Devuelve un diccionario con cada valor recibido -> lista de hostids (vacía si no hay ninguno).
+    Customer busca "ID<valor>" en el nombre del host y serial busca en serialno_a del
+    inventario, con searchByAny para pedir chunk_size valores por llamada. search compara
+    por contenido (ID123 encuentra ID1234), así que cada resultado se verifica exacto:
+    el customer id extraído del nombre o el serial en mayúsculas.
+    """
+    if clave == CLAVE_CUSTOMER:
+        normalizar = str.strip
+    elif clave == CLAVE_SERIAL:
+        normalizar = lambda valor: valor.strip().upper()
     else:
-        raise Exception(f"Error al obtener los hosts: {response_json}")
+        raise ValueError(f"Clave de búsqueda no soportada: {clave}")
+
+    valores = list(valores)
+    buscados = sorted({normalizar(str(valor)) for valor in valores} - VALORES_SIN_IDENTIDAD)
+    encontrados = {valor: [] for valor in buscados}
+    for inicio in range(0, len(buscados), chunk_size):
+        lote = buscados[inicio:inicio + chunk_size]
+        params = {"output": ["hostid", "name"], "searchByAny": True}
+        if clave == CLAVE_CUSTOMER:
+            params["search"] = {"name": [f"ID{valor}" for valor in lote]}
+        else:
+            params["searchInventory"] = {"serialno_a": lote}
+            params["selectInventory"] = ["serialno_a"]
+        hosts = client.call("host.get", params, "Error al buscar los hosts")
+        if clave == CLAVE_CUSTOMER:
+            claves_hosts = extraer_datos_hosts([host["name"] for host in hosts])["customer id"]
+        else:
+            claves_hosts = [normalizar(inventario_host(host).get("serialno_a", "")) for host in hosts]
+        for host, valor in zip(hosts, claves_hosts):
+            if valor in encontrados and host["hostid"] not in encontrados[valor]:
+                encontrados[valor].append(host["hostid"])
+    return {valor: encontrados.get(normalizar(str(valor)), []) for valor in valores}
+
+# Valores de nombre, IP o serial que no identifican a un host y no se comparan al buscar duplicados
+VALORES_SIN_IDENTIDAD = {"", "N/A", "PDFN"}
+
+# Índices en memoria de hosts por nombre, IP y serial de la ONU, para detectar duplicados antes de crear
+class HostIndex:
+    """
+    Cada índice es un diccionario valor -> dueño, donde el dueño es el hostid de un host de Zabbix
+    (from_client) o la fila de la hoja que usó el valor primero. Los seriales se comparan en mayúsculas.
+    """
+
+    CAMPOS = ("nombre", "ip", "serial")
+
+    def __init__(self):
+        self.indices = {campo: {} for campo in self.CAMPOS}
+
+    @staticmethod
+    def _valores(nombre, ips, serial):
+        yield "nombre", nombre
+        for ip in ips:
+            yield "ip", ip
+        yield "serial", str(serial).upper()
+
+    def agregar(self, dueno, nombre, ips, serial):
+        for campo, valor in self._valores(nombre, ips, serial):
+            valor = str(valor).strip()
+            if valor not in VALORES_SIN_IDENTIDAD:
+                self.indices[campo].setdefault(valor, dueno)
+
+    def buscar(self, nombre, ips, serial):
+        """
+        Devuelve una lista de tuplas (campo, valor, dueño) con los valores de la fila que ya están indexados.
+        """
+        coincidencias = []
+        for campo, valor in self._valores(nombre, ips, serial):
+            valor = str(valor).strip()
+            if valor not in VALORES_SIN_IDENTIDAD and valor in self.indices[campo]:
+                coincidencias.append((campo, valor, self.indices[campo][valor]))
+        return coincidencias
+
+    @classmethod
+    def from_client(cls, client, page_size=HOSTS_PAGE_SIZE):
+        """
+        Indexa todos los hosts de Zabbix recorriéndolos por páginas con su nombre técnico,
+        las IP de sus interfaces y el serialno_a del inventario.
+        """
+        indice = cls()
+        paginas = iter_hosts(client, ("hostid", "host"), page_size,
+                             selectInterfaces=["ip"], selectInventory=["serialno_a"])
+        for pagina in paginas:
+            for host in pagina:
+                inventario = inventario_host(host)
+                ips = [interfaz["ip"] for interfaz in host.get("interfaces", [])]
+                indice.agregar(host["hostid"], host["host"], ips, inventario.get("serialno_a", ""))
+        return indice
 
 # Función para extraer los grupos de hosts creados en Zabbix con sus respectivos IDs 
-def get_host_groups(url, token):
+def get_host_groups(client):
     """
     Obtiene una lista de todos los grupos de hosts y sus IDs.
     """
-    data = {
-        "jsonrpc": "2.0",
-        "method": "hostgroup.get",
-        "params": {},
-        "auth": token,
-        "id": 2
-    }
-    headers = {"Content-Type": "application/json"}
-    response = requests.post(url, headers=headers, data=json.dumps(data))
-    response_json = response.json()
-    if "result" in response_json:
-        return response_json["result"]
-    else:
-        raise Exception(f"Error al obtener los grupos de hosts: {response_json}")
+    return client.call("hostgroup.get", {}, "Error al obtener los grupos de hosts")
     
+# Grupo de Zabbix de cada localidad
+GRUPOS_LOCALIDAD = {
+    "Los teques": "Clientes FTTH POC (Los Teques)",
+    "Maracay": "Clientes FTTH POC (Maracay)",
+    "Valencia": "Clientes FTTH POC (Valencia)",
+    "Barquisimeto": "Clientes FTTH POC (Barquisimeto)",
+    "Caracas (Red propia)": "Clientes FTTH POC (Caracas) - Red propia",
+    "Caracas (Red alquilada)": "Clientes FTTH POC (Caracas) - Red alquilada",
+    "Barcelona": "Clientes FTTH POC (Barcelona)"
+}
+
+# IDs de grupos fijos: el primero y el último se asignan a toda conexión cliente,
+# GRUPO_RED_NO_PROPIA_ID a todas las localidades salvo las de red propia
+GRUPO_INICIAL_ID = "35"
+GRUPO_RED_NO_PROPIA_ID = "34"
+GRUPO_FINAL_ID = "90"
+LOCALIDADES_RED_PROPIA = {"Caracas (Red propia)"}
+
+# Valores de OLT/Feeder que indican que la conexión no tiene ese grupo
+VALORES_NO_APLICA = {"No aplica", "N/A", ""}
+
 # Función para mapear los grupos de la conexión cliente con los IDs registrados en Zabbix
 def obtener_ids(localidad, olt, feeder, group_ids_dict):
-    
-    group_loc = {
-        "Los teques": "Clientes FTTH POC (Los Teques)",
-        "Maracay": "Clientes FTTH POC (Maracay)",
-        "Valencia": "Clientes FTTH POC (Valencia)",
-        "Barquisimeto": "Clientes FTTH POC (Barquisimeto)",
-        "Caracas (Red propia)": "Clientes FTTH POC (Caracas) - Red propia",
-        "Caracas (Red alquilada)": "Clientes FTTH POC (Caracas) - Red alquilada",
-        "Barcelona": "Clientes FTTH POC (Barcelona)"
-    }
-
-    if localidad == "Caracas (Red propia)":
-        ids = ["35"]
+
+    if localidad in LOCALIDADES_RED_PROPIA:
+        ids = [GRUPO_INICIAL_ID]
     else:
-        ids = ["35","34"]
+        ids = [GRUPO_INICIAL_ID, GRUPO_RED_NO_PROPIA_ID]
 
-    if group_loc.get(localidad) in group_ids_dict:
-        ids.append(str(group_ids_dict[group_loc.get(localidad)]))
+    if GRUPOS_LOCALIDAD.get(localidad) in group_ids_dict:
+        ids.append(str(group_ids_dict[GRUPOS_LOCALIDAD.get(localidad)]))
     else:
-        raise ValueError(f"Localidad: '{group_loc.get(localidad)}' no definido en Zabbix")
+        raise ValueError(f"Localidad: '{GRUPOS_LOCALIDAD.get(localidad)}' no definido en Zabbix")
 
-    if olt not in ["No aplica","N/A",""]:
+    if olt not in VALORES_NO_APLICA:
         if olt in group_ids_dict:
             ids.append(str(group_ids_dict[olt]))
         else:
             raise ValueError(f"OLT: '{olt}' no definida en Zabbix")
         
 
-    if feeder not in ["No aplica","N/A",""]:
+    if feeder not in VALORES_NO_APLICA:
         if feeder in group_ids_dict:
             ids.append(str(group_ids_dict[feeder]))
         else:
             raise ValueError(f"Feeder '{feeder}' no encontrado en group_ids_dict")
 
-    ids.append("90")
+    ids.append(GRUPO_FINAL_ID)
     return ids
 
+# Función que normaliza los nombres de grupo para compararlos con los de la hoja
+def normalizar_grupo(nombre):
+    return str(nombre).strip()
+
+# Índice de grupos de Zabbix para resolver los grupos de cada conexión cliente
+class GroupResolver:
+    """
+    Se construye una vez a partir de hostgroup.get y resuelve (Localidad, OLT, Feeder) a la
+    lista de groupids que se envía a Zabbix. Cada combinación se calcula una sola vez.
+    """
+
+    def __init__(self, host_groups):
+        self.group_ids = {normalizar_grupo(group["name"]): normalizar_grupo(group["groupid"]) for group in host_groups}
+        # Grupos de localidad precalculados: localidad -> (groupids fijos + localidad, error)
+        self._localidades = {}
+        for localidad, nombre_grupo in GRUPOS_LOCALIDAD.items():
+            ids = [GRUPO_INICIAL_ID] if localidad in LOCALIDADES_RED_PROPIA else [GRUPO_INICIAL_ID, GRUPO_RED_NO_PROPIA_ID]
+            if nombre_grupo in self.group_ids:
+                self._localidades[localidad] = (ids + [self.group_ids[nombre_grupo]], None)
+            else:
+                self._localidades[localidad] = (None, f"Localidad: '{nombre_grupo}' no definido en Zabbix")
+        self._combinaciones = {}
+
+    @classmethod
+    def from_client(cls, client):
+        return cls(get_host_groups(client))
+
+    # Devuelve (groupids, errores) para una combinación, con todos los grupos faltantes
+    def _resolver(self, localidad, olt, feeder):
+        clave = (localidad, olt, feeder)
+        if clave not in self._combinaciones:
+            localidad, olt, feeder = normalizar_grupo(localidad), normalizar_grupo(olt), normalizar_grupo(feeder)
+            errores = []
+            ids, error = self._localidades.get(localidad, (None, f"Localidad: '{localidad}' sin grupo asociado"))
+            if error:
+                errores.append(error)
+            ids = list(ids or [])
+            if olt not in VALORES_NO_APLICA:
+                if olt in self.group_ids:
+                    ids.append(self.group_ids[olt])
+                else:
+                    errores.append(f"OLT: '{olt}' no definida en Zabbix")
+            if feeder not in VALORES_NO_APLICA:
+                if feeder in self.group_ids:
+                    ids.append(self.group_ids[feeder])
+                else:
+                    errores.append(f"Feeder: '{feeder}' no definido en Zabbix")
+            ids.append(GRUPO_FINAL_ID)
+            self._combinaciones[clave] = (ids, errores)
+        return self._combinaciones[clave]
+
+    def resolver(self, localidad, olt, feeder):
+        ids, errores = self._resolver(localidad, olt, feeder)
+        if errores:
+            raise ValueError("; ".join(errores))
+        return list(ids)
+
+    def validar(self, combinaciones):
+        """
+        Recorre las combinaciones (Localidad, OLT, Feeder) de toda la hoja y devuelve un mensaje
+        por cada grupo no definido en Zabbix, con las filas donde aparece (vacío si todo existe).
+        """
+        filas_por_error = {}
+        for fila, combinacion in enumerate(combinaciones, start=1):
+            for error in self._resolver(*combinacion)[1]:
+                filas_por_error.setdefault(error, []).append(fila)
+        return [
+            f"{error} (filas: {', '.join(map(str, filas))})"
+            for error, filas in filas_por_error.items()
+        ]
+
+# Segundos durante los que se reutilizan los grupos obtenidos con hostgroup.get
+GROUPS_CACHE_TTL = 300
+
+# Caché de grupos de Zabbix compartida por todas las cargas del proceso
+class GroupCache:
+    """
+    Guarda el GroupResolver construido con hostgroup.get y lo vuelve a construir cuando vence
+    el TTL o después de invalidar(). Si varias cargas lo piden al mismo tiempo, solo una
+    consulta a Zabbix y las demás esperan ese mismo resultado.
+    """
+
+    def __init__(self, ttl=GROUPS_CACHE_TTL):
+        self.ttl = ttl
+        self._resolver = None
+        self._vence = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, client):
+        resolver = self._resolver
+        if resolver is not None and time.monotonic() < self._vence:
+            return resolver
+        with self._lock:
+            if self._resolver is None or time.monotonic() >= self._vence:
+                self._resolver = GroupResolver.from_client(client)
+                self._vence = time.monotonic() + self.ttl
+            return self._resolver
+
+    def invalidar(self):
+        with self._lock:
+            self._resolver = None
+            self._vence = 0.0
+
+group_cache = GroupCache()
+
+# Cantidad máxima de nombres distintos que guarda la caché de quitar_acentos
+ACENTOS_CACHE_SIZE = 65536
+
+# Función que elimina acentos con normalización NFKD, usada para los caracteres fuera de la tabla
+def quitar_acentos_nfkd(cadena):
+    cadena = unicodedata.normalize("NFKD", cadena)
+    return "".join(c for c in cadena if not unicodedata.combining(c)).replace("ñ", "n").replace("Ñ", "N")
+
+# Tabla para str.translate con los caracteres Latin-1 y Latin Extended-A que quedan en ASCII al quitarles el acento
+TABLA_ACENTOS = {
+    codigo: quitar_acentos_nfkd(chr(codigo))
+    for codigo in range(0x80, 0x180)
+    if quitar_acentos_nfkd(chr(codigo)).isascii()
+}
+
+# Misma tabla para bytes Latin-1 (reemplazos de un solo carácter), mucho más rápida que str.translate
+TABLA_ACENTOS_LATIN1 = bytes(
+    ord(TABLA_ACENTOS[codigo]) if len(TABLA_ACENTOS.get(codigo, "")) == 1 else codigo
+    for codigo in range(256)
+)
+
+@functools.lru_cache(maxsize=ACENTOS_CACHE_SIZE)
+def _quitar_acentos_texto(cadena):
+    if cadena.isascii():
+        return cadena
+    try:
+        return cadena.encode("latin-1").translate(TABLA_ACENTOS_LATIN1).decode("ascii")
+    except UnicodeError:
+        pass
+    traducida = cadena.translate(TABLA_ACENTOS)
+    if traducida.isascii():
+        return traducida
+    return quitar_acentos_nfkd(cadena)
+
 # Función para eliminar acentos y caracteres no reconocidos por Zabbix
 def quitar_acentos(cadena):
     if not isinstance(cadena, str):
         return cadena
-    cadena = unicodedata.normalize("NFKD", cadena)
-    return "".join(c for c in cadena if not unicodedata.combining(c)).replace("ñ", "n").replace("Ñ", "N")
\ No newline at end of file
+    return _quitar_acentos_texto(cadena)
+
+# Función que elimina acentos de una Series, procesando una sola vez cada valor distinto
+def quitar_acentos_serie(serie):
+    codigos, unicos = pd.factorize(serie)
+    limpios = unicos.map(quitar_acentos)
+    return pd.Series(limpios.take(codigos), index=serie.index, dtype=object).where(codigos >= 0, serie)
+
+# Patrones para extraer el serial de la ONU y el ID de cliente desde el nombre del host
+SERIAL_ONU_REGEX = re.compile(r"(?P<serial>(?:TPLG|FHTT|ALCL)\w{8})")
+DESDE_SERIAL_REGEX = re.compile(r"(?:TPLG|FHTT|ALCL)\w{8}.*", re.DOTALL)
+CUSTOMER_ID_REGEX = re.compile(r"ID(?P<customer>\d{6,9})")
+
+# Función que separa nombre, ID de cliente y serial ONU de una serie de nombres de host
+def extraer_datos_hosts(nombres):
+    """
+    Recibe una Series (o lista) de nombres de host y devuelve un DataFrame con las columnas
+    "customer id", "nombre" y "serial onu", con el mismo índice. El nombre es el texto previo
+    al serial; si no hay serial es el nombre completo. Lo no encontrado queda como "N/A".
+    No es una versión vectorizada: pandas evalúa cada expresión nombre por nombre en Python
+    (los textos son object), solo evita el bucle explícito. Unir las tres en un único
+    str.extract resultó más lento que hacerlas por separado.
+    """
+    nombres = pd.Series(nombres, dtype=object)
+    serial = nombres.str.extract(SERIAL_ONU_REGEX, expand=False)
+    customer = nombres.str.extract(CUSTOMER_ID_REGEX, expand=False)
+    con_serial = serial.notna()
+    nombre = nombres.copy()
+    nombre[con_serial] = nombres[con_serial].str.replace(DESDE_SERIAL_REGEX, "", n=1, regex=True).str.strip()
+    return pd.DataFrame({
+        "customer id": customer.fillna("N/A"),
+        "nombre": nombre,
+        "serial onu": serial.fillna("N/A"),
+    }, index=nombres.index)